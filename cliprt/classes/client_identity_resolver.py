@@ -14,6 +14,9 @@ class ClientIdentityResolver:
     determine of the data matches an existing client identity or
     belongs to a new client identity.
     """
+    # Valid email format.
+    EMAIL_REGEX = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
     def __init__(self, client_registry, identifier_registry):
         """
         Create a new identity resolver.
@@ -23,6 +26,7 @@ class ClientIdentityResolver:
         self.identifier_reg = identifier_registry
 
         # Class attributes.
+        self.identifiers_fuzzy_matched = []
         self.identifiers_matched = []
         self.identifiers_matched_key_list = []
         self.identifiers_unmatched = []
@@ -32,10 +36,21 @@ class ClientIdentityResolver:
         """
         If the identifiers don't match an existing identity, per the
         registry search, this is a new identity to be add to the
-        registry.
+        registry.  Hashed client ids are derived from the identifiers.
         """
+        if self.client_reg.hashed_client_idnos:
+            return self.client_reg.create_identity(self.identity_signature())
         return self.client_reg.create_identity()
 
+    def identity_signature(self):
+        """
+        The set of identifiers of the row, as a string.
+        """
+        return '\n'.join(sorted(
+            [identifier.key for identifier in self.identifiers_matched]\
+                + [identifier.key for identifier in self.identifiers_unmatched]
+            ))
+
     @staticmethod
     def client_idno_matcher(client_idno_sets):
         """
@@ -77,18 +92,25 @@ class ClientIdentityResolver:
         # tuple.
         return sorted_idno_by_cnt[0][0]
 
+    @staticmethod
+    def is_placeholder_email(de_value):
+        """
+        Detect the values entered in place of an email, e.g.
+        noemail@example.com.
+        """
+        return 'noemail' in de_value
+
     @staticmethod
     def is_useful_email_identifier(de_value):
         """
         Detect and reject bogus data in order to help reduce invalid
         identity matches.
         """
-        if 'noemail' in de_value:
+        if ClientIdentityResolver.is_placeholder_email(de_value):
             return False
 
         # Validate the format of the email.
-        regex = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        return re.fullmatch(regex, de_value)
+        return re.fullmatch(ClientIdentityResolver.EMAIL_REGEX, de_value)
 
     @staticmethod
     def is_useful_phone_identifier(de_value):
@@ -110,7 +132,7 @@ class ClientIdentityResolver:
         existing identity.
         """
         client_id_sets = []
-        for identifier in self.identifiers_matched:
+        for identifier in self.identifiers_matched + self.identifiers_fuzzy_matched:
             idno_set =\
                 self.identifier_reg.identifier_list[identifier.key].client_ids
             client_id_sets.append(idno_set)
@@ -127,7 +149,18 @@ class ClientIdentityResolver:
             # No useful identifiers provided.
             return None
 
-        if len(self.matched_identifier_types) < threshold:
+        # When the registries are persisted, the same identifiers always
+        # resolve to the same client.
+        identity = None
+        identity_signature = None
+        if self.client_reg.keeps_identity_signatures:
+            identity_signature = self.identity_signature()
+            identity = self.client_reg.get_identity_by_signature(identity_signature)
+
+        if identity is not None:
+            # Exactly the same identifiers were resolved before.
+            pass
+        elif len(self.matched_identifier_types) < threshold:
             # Too few identifiers match, so this is a new identity.
             identity = self.create_identity()
         else:
@@ -136,6 +169,11 @@ class ClientIdentityResolver:
             # current row of client data.
             client_idno = self.match_existing_identity()
             identity = self.client_reg.get_identity_by_idno(client_idno)
+        if identity_signature is not None:
+            self.client_reg.save_identity_signature(
+                identity_signature,
+                identity.client_idno
+                )
 
         # Now that we have a client id, the identifiers can be updated
         # to reflect the new client id with which they are now
@@ -153,12 +191,16 @@ class ClientIdentityResolver:
 
         return identity
 
-    def save_identifier(self, identifier):
+    def save_identifier(self, identifier, is_validated=False):
         """
         Search for the identifier value to see if we have a potential
         identity match. Add the identifier to the identifier registry.
+        Identifiers already validated in bulk, by the identifier column
+        normalizer, skip the phone and email checks.
         """
-        if identifier.type == 'phone':
+        if is_validated:
+            pass
+        elif identifier.type == 'phone':
             if not self.is_useful_phone_identifier(identifier.de_value):
                 # Ignore useless phone identifiers.
                 return False
@@ -166,6 +208,10 @@ class ClientIdentityResolver:
             if not self.is_useful_email_identifier(identifier.de_value):
                 # Ignore useless email identifiers.
                 return False
+        if self.identifier_reg.is_stopped(identifier):
+            # Ignore placeholders and identifiers shared by too many
+            # clients.
+            return False
 
         if identifier.key in self.identifier_reg.identifier_list:
             if not identifier.key in self.identifiers_matched_key_list:
@@ -181,5 +227,33 @@ class ClientIdentityResolver:
             # existing saved identifier.
             self.identifier_reg.add_identifier(identifier)
             self.identifiers_unmatched.append(identifier)
+        self.save_fuzzy_matches(identifier)
+
+        return True
 
+    def save_fuzzy_matches(self, identifier):
+        """
+        If fuzzy name matching is enabled, names that are similar to the
+        name identifier count as a match, whether the name identifier is
+        known or not.  Only the similar names that can match a client
+        count.  The similar names are only used to determine the client,
+        they are not reported.
+        """
+        fuzzy_name_matcher = self.identifier_reg.fuzzy_name_matcher
+        if fuzzy_name_matcher is None:
+            return False
+        similar_identifiers = [
+            self.identifier_reg.identifier_list[key]
+            for key in fuzzy_name_matcher.similar_keys(identifier)
+            if key not in self.identifiers_matched_key_list
+            ]
+        similar_identifiers = [
+            similar_identifier for similar_identifier in similar_identifiers
+            if self.identifier_reg.is_matchable(similar_identifier)
+            ]
+        if not similar_identifiers:
+            return False
+        self.identifiers_fuzzy_matched.extend(similar_identifiers)
+        if not identifier.type in self.matched_identifier_types:
+            self.matched_identifier_types.append(identifier.type)
         return True
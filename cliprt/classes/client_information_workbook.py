@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 #pylint: disable=too-many-instance-attributes
+#pylint: disable=too-many-public-methods
 #pylint: disable=import-error
 """
 Project:    CLIPRT - Client Information Parsing and Reporting Tool.
@@ -7,15 +8,17 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 Copyright   2022 Michael Hodges
 """
 import os.path
-import openpyxl
+import time
 from cliprt.classes.client_registry import ClientRegistry
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 from cliprt.classes.content_worksheet import ContentWorksheet
 from cliprt.classes.data_element_dictionary_processor\
     import DataElementDictionaryProcessor
 from cliprt.classes.destination_worksheets_registry\
     import DestinationWorksheetsRegistry
 from cliprt.classes.identifier_registry import IdentifierRegistry
-from cliprt.classes.message_registry import MessageRegistry
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
 
 class ClientInformationWorkbook:
     """
@@ -25,32 +28,55 @@ class ClientInformationWorkbook:
     line user interface.
     """
     # Dependencies
-    cliprt = MessageRegistry()
+    cliprt = MESSAGE_REGISTRY
 
     # Internal worksheets names.
     DED_WS_NAME = 'DED'
-    INTERNAL_WS_NAMES = [DED_WS_NAME]
+    QUARANTINE_WS_NAME = 'cliprt_quarantine'
+    INTERNAL_WS_NAMES = [DED_WS_NAME, QUARANTINE_WS_NAME]
 
     # Reports worksheets name prefix.
     DEST_WS_NAME_PREFIX = 'cliprt_report_for_'
 
-    def __init__(self, wb_filename):
+    def __init__(self, wb_filename, cliprt_wb=None):
         """
         Ensure that the workbook exists.  Set everything up for
-        processing the workbook.
+        processing the workbook.  An already loaded workbook, e.g. an
+        in-memory workbook, may be provided instead, in which case the
+        workbook file name is only used for saving.
         """
-        if not os.path.exists(wb_filename):
+        if cliprt_wb is None and not os.path.exists(wb_filename):
             # Fatal error
             raise Exception(self.cliprt.msg(1000).format(wb_filename))
 
         # Class attributes.
+        self.checkpoint = None
         self.ded_processor = None
         self.ded_ws = None
         self.dest_ws_reg = DestinationWorksheetsRegistry()
         self.client_reg = ClientRegistry(self.dest_ws_reg)
         self.content_ws_names = []
+        self.ded_cache = None
+        self.duplicate_rows = None
         self.identifier_reg = IdentifierRegistry()
-        self.cliprt_wb = openpyxl.load_workbook(filename=wb_filename)
+        self.identity_listener = None
+        self.identity_match_threshold = CLIPRT_SETTINGS.identity_match_threshold
+        self.pipeline = None
+        self.progress_listener = None
+        self.quarantine = None
+        self.registry_store = None
+        self.report_sharder = None
+        self.run_state = None
+        self.trailing_empty_rows_limit = CLIPRT_SETTINGS.trailing_empty_rows_limit
+        self.workbook_writer = None
+        # The file the workbook was loaded from, if it was.
+        self.loaded_wb_filename = None
+        if cliprt_wb is None:
+            # Imported on first use to keep the startup fast.
+            import openpyxl #pylint: disable=import-outside-toplevel
+            cliprt_wb = openpyxl.load_workbook(filename=wb_filename)
+            self.loaded_wb_filename = wb_filename
+        self.cliprt_wb = cliprt_wb
         self.cliprt_wb_filename = wb_filename
 
         # The workbook may or may not have a DED worksheet when it is
@@ -60,15 +86,21 @@ class ClientInformationWorkbook:
     def create_client_reports(
             self,
             progress_reporting_is_disabled=False,
-            save_wb=True
+            save_wb=True,
+            resume=False
         ):
         """
         Utilize and process the various worksheets in the workbook in
-        order to create the destination report worksheets.
+        order to create the destination report worksheets.  If resume
+        is requested, continue from the last checkpoint, if there is
+        one.
         """
+        start_time = time.perf_counter()
+        CLIPRT_LOGGER.info(6000, self.cliprt_wb_filename)
+
         # Create the DED.  This will also create a destination worksheet
         # registry.
-        self.ded_processor.hydrate_ded()
+        self.hydrate_ded()
 
         # Create or reset the destination worksheets in preparation for
         # the next round of reports.
@@ -77,22 +109,43 @@ class ClientInformationWorkbook:
         # Create the list of client data content worksheets.
         self.create_content_ws_names_list()
 
+        # Start from the previous run, or the last checkpoint.
+        self.restore_client_reports(resume)
+
         # Process contents of each client data worksheet.
         #ContentWorksheet()
         for ws_name in self.content_ws_names:
+            if self.checkpoint is not None and\
+                    self.checkpoint.is_ws_processed(ws_name):
+                # Processed before the checkpoint.
+                continue
             ContentWorksheet(
                 self.cliprt_wb,
                 ws_name,
                 self.ded_processor,
                 self.client_reg,
                 self.identifier_reg,
-                self.dest_ws_reg
+                self.dest_ws_reg,
+                identity_listener=self.identity_listener,
+                identity_match_threshold=self.identity_match_threshold,
+                progress_listener=self.progress_listener,
+                checkpoint=self.checkpoint,
+                pipeline=self.pipeline,
+                run_state=self.run_state,
+                duplicate_rows=self.duplicate_rows,
+                trailing_empty_rows_limit=self.trailing_empty_rows_limit,
+                quarantine=self.quarantine
             ).client_report(progress_reporting_is_disabled)
+            if self.checkpoint is not None:
+                self.checkpoint.ws_processed(ws_name)
 
-        # Save the client report worksheets.
-        if save_wb:
-            self.cliprt_wb.save(self.cliprt_wb_filename)
+        self.save_client_reports(progress_reporting_is_disabled, save_wb)
 
+        CLIPRT_LOGGER.info(
+            6001,
+            self.cliprt_wb_filename,
+            time.perf_counter() - start_time
+            )
         return True
 
     def create_content_ws_names_list(self):
@@ -162,6 +215,39 @@ class ClientInformationWorkbook:
         """
         return self.ded_processor.hydration_validation()
 
+    def hydrate_ded(self):
+        """
+        Hydrate the DED.  If a DED cache is provided, the DED is only
+        compiled from the DED worksheet the first time that the DED
+        worksheet contents are seen.
+        """
+        if self.ded_cache is None or self.ded_processor.ded_is_hydrated():
+            return self.ded_processor.hydrate_ded()
+        ded_hash = self.ded_processor.ded_content_hash()
+        compiled_ded = self.ded_cache.get(ded_hash)
+        if compiled_ded is None:
+            self.ded_processor.hydrate_ded()
+            self.ded_cache.put(ded_hash, self.ded_processor.compiled_ded())
+            return True
+        return self.ded_processor.hydrate_ded_from_compiled(compiled_ded)
+
+    def import_state(self, state):
+        """
+        Restore the client reports state.  The DED must be hydrated and
+        the destination worksheets prepared first.  The state is only
+        restored if it was created with the same DED.
+        """
+        if state['ded_hash'] != self.ded_processor.ded_content_hash():
+            return False
+        if state['identifier_reg'] is not None:
+            self.identifier_reg.import_state(
+                state['identifier_reg'],
+                self.ded_processor.ded
+                )
+        self.client_reg.import_state(state['client_reg'])
+        self.dest_ws_reg.import_state(state['dest_ws_reg'])
+        return True
+
     def init_ded_processor(self):
         """
         If the DED worksheet is available initialize the DED processor.
@@ -176,6 +262,154 @@ class ClientInformationWorkbook:
             )
         return True
 
+    def enable_checkpoints(self, row_interval=None, checkpoint_filename=None):
+        """
+        Save checkpoints while creating the client reports: after each
+        content worksheet and, if row_interval is provided, every
+        row_interval rows.  The checkpoint is kept next to the workbook
+        unless checkpoint_filename is provided, which is required for
+        workbooks without a file name.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.report_checkpoint import ReportCheckpoint
+        self.checkpoint = ReportCheckpoint(self, row_interval, checkpoint_filename)
+        return self.checkpoint
+
+    def enable_pipeline(self, chunk_size=None, queue_size=None):
+        """
+        Process the content worksheet rows a chunk of chunk_size rows at
+        a time, in stages, with up to queue_size chunks read ahead.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.content_worksheet_pipeline\
+            import ContentWorksheetPipeline
+        self.pipeline = ContentWorksheetPipeline(
+            chunk_size,
+            queue_size,
+            self.loaded_wb_filename
+            )
+        return self.pipeline
+
+    def enable_memory_budget(self, memory_budget=None, spill_dir=None):
+        """
+        Keep at most memory_budget bytes of client report rows in memory.
+        The least recently updated rows spill to a temporary file in
+        spill_dir until the reports are written.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.destination_row_buffer import DestinationRowBuffer
+        return self.dest_ws_reg.enable_row_buffer(
+            DestinationRowBuffer(memory_budget, spill_dir)
+            )
+
+    def enable_report_sharding(self, shard_size=None, shard_dir=None, max_workers=None):
+        """
+        Shard the reports with more than shard_size client rows across
+        numbered worksheets or, if shard_dir is provided, across workbook
+        files in shard_dir, written by up to max_workers processes.
+        Reports too large for a worksheet are always sharded.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.report_sharder import ReportSharder
+        self.report_sharder = ReportSharder(shard_size, shard_dir, max_workers)
+        return self.report_sharder
+
+    def enable_parallel_save(self, max_workers=None):
+        """
+        Render the report worksheets in up to max_workers processes when
+        the workbook is saved.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.parallel_workbook_writer import ParallelWorkbookWriter
+        self.workbook_writer = ParallelWorkbookWriter(max_workers)
+        return self.workbook_writer
+
+    def enable_quarantine(self, error_budget=None, csv_filename=None):
+        """
+        Error-tolerant mode: set the rows that fail aside in a
+        quarantine worksheet, or CSV file, and keep going, unless more
+        than error_budget rows fail.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.row_quarantine import RowQuarantine
+        self.quarantine = RowQuarantine(error_budget, csv_filename)
+        return self.quarantine
+
+    def enable_duplicate_row_detection(self):
+        """
+        Skip the rows that repeat a row already processed, within a
+        content worksheet or across content worksheets.  A repeated row
+        is reported for the client of the first occurrence.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.duplicate_row_detector import DuplicateRowDetector
+        self.duplicate_rows = DuplicateRowDetector()
+        return self.duplicate_rows
+
+    def enable_fuzzy_name_matching(self, similarity_threshold=None):
+        """
+        Let similar names count as a match of the name identifier type,
+        not only equal names.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.fuzzy_name_matcher import FuzzyNameMatcher
+        self.identifier_reg.fuzzy_name_matcher = FuzzyNameMatcher(similarity_threshold)
+        self.identifier_reg.identifiers_loaded()
+        return self.identifier_reg.fuzzy_name_matcher
+
+    def enable_hashed_client_ids(self):
+        """
+        Derive the client ids from the identifiers of the clients rather
+        than numbering the clients in the order they are found.
+        """
+        self.client_reg.hashed_client_idnos = True
+        return True
+
+    def enable_incremental_runs(self):
+        """
+        Keep the run state so that the next run only processes what is
+        new or changed.  The first run processes everything.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.run_state import RunState
+        self.run_state = RunState(self)
+        return self.run_state
+
+    def enable_registry_store(self, store_filename):
+        """
+        Persist the identifier and client registries across runs, so
+        that clients keep their client ids.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        from cliprt.classes.registry_store import RegistryStore
+        self.registry_store = RegistryStore(self, store_filename)
+        return self.registry_store
+
+    def export_state(self, include_identifiers=True):
+        """
+        Compact state of the client reports: the identifier registry,
+        the client registry and the destination worksheets, along with
+        the hash of the DED that they were created with.  The identifier
+        registry can be left out when it is persisted elsewhere.
+        """
+        return {
+            'ded_hash': self.ded_processor.ded_content_hash(),
+            'identifier_reg': self.identifier_reg.export_state()\
+                if include_identifiers else None,
+            'client_reg': self.client_reg.export_state(),
+            'dest_ws_reg': self.dest_ws_reg.export_state(),
+            }
+
     def has_a_ded_ws(self):
         """
         Check to see if the client information workbook has a
@@ -189,3 +423,113 @@ class ClientInformationWorkbook:
         reviewing.
         """
         self.ded_processor.print_report()
+
+    def restore_client_reports(self, resume=False):
+        """
+        Start the client reports from the clients known from previous
+        runs, the last checkpoint if resume is requested, and the
+        previous run if runs are incremental.  Returns whether or not
+        the reports resume from a checkpoint.
+        """
+        # Start with the clients known from previous runs.
+        if self.registry_store is not None:
+            self.registry_store.load()
+
+        # Pick up where the last run left off.
+        if resume:
+            if self.checkpoint is None:
+                self.enable_checkpoints()
+            if not self.checkpoint.restore():
+                CLIPRT_LOGGER.warning(6032, self.checkpoint.checkpoint_filename)
+                resume = False
+        if self.run_state is not None:
+            if resume:
+                # The checkpoint has the client reports; only the row
+                # hashes of the previous run are needed.
+                self.run_state.load()
+            else:
+                # Start from the client reports of the previous run.
+                self.run_state.restore()
+        return resume
+
+    def save_client_reports(self, progress_reporting_is_disabled=False, save_wb=True):
+        """
+        Finish the client reports: shard the reports that are too large,
+        save the workbook and keep the state for the next run.  Buffered
+        client rows are streamed to the workbook file as it is saved, or
+        written to the report worksheets if the workbook is not saved.
+        """
+        # Write the buffered client rows to the report worksheets, unless
+        # they are streamed from the row buffer to the workbook file.
+        save_wb = save_wb and self.cliprt_wb_filename is not None
+        is_streamed = save_wb and self.dest_ws_reg.row_buffer is not None
+        if not is_streamed:
+            self.dest_ws_reg.flush()
+
+        # Shard the reports that are too large for a worksheet.
+        if self.report_sharder is None and\
+                self.dest_ws_reg.max_row_cnt() > CLIPRT_SETTINGS.report_shard_size:
+            self.enable_report_sharding()
+        if self.report_sharder is not None:
+            self.report_sharder.shard_reports(self.cliprt_wb, self.dest_ws_reg)
+
+        # Report the identifiers shared by the most clients, which are
+        # the first suspects when clients are merged that should not be.
+        heaviest_identifiers = self.identifier_reg.report_heaviest_identifiers()
+        if not progress_reporting_is_disabled and heaviest_identifiers:
+            print('--------')
+            print('Identifiers shared by the most clients:')
+            for key, fan_out in heaviest_identifiers:
+                print(f'  {key}: {fan_out}')
+
+        # Save the rows set aside in error-tolerant mode.
+        if self.quarantine is not None:
+            self.quarantine.save(self.cliprt_wb, self.QUARANTINE_WS_NAME)
+
+        # Save the client report worksheets.
+        if save_wb:
+            self.save_client_reports_wb(is_streamed)
+
+        # Keep the state of this run for the next incremental run.
+        if self.run_state is not None:
+            self.run_state.save()
+        if self.registry_store is not None:
+            self.registry_store.save()
+
+        # The reports are complete, so the checkpoint is not needed.
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+        return True
+
+    def save_client_reports_wb(self, is_streamed=False):
+        """
+        Save the workbook with the client reports.  If is_streamed, the
+        buffered client rows are streamed to the workbook file as it is
+        saved, and the row buffer is closed.
+        """
+        if not is_streamed:
+            if self.workbook_writer is None:
+                self.cliprt_wb.save(self.cliprt_wb_filename)
+            else:
+                self.workbook_writer.save(
+                    self.cliprt_wb,
+                    self.cliprt_wb_filename,
+                    self.dest_ws_reg.report_ws_names()
+                    )
+            return True
+        workbook_writer = self.workbook_writer
+        if workbook_writer is None:
+            # Imported on first use to keep the startup fast.
+            #pylint: disable=import-outside-toplevel
+            from cliprt.classes.parallel_workbook_writer import ParallelWorkbookWriter
+            workbook_writer = ParallelWorkbookWriter(max_workers=1)
+        try:
+            workbook_writer.save(
+                self.cliprt_wb,
+                self.cliprt_wb_filename,
+                self.dest_ws_reg.report_ws_names(),
+                self.dest_ws_reg.report_rows()
+                )
+        finally:
+            self.dest_ws_reg.close_row_buffer()
+        return True
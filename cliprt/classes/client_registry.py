@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+#pylint: disable=too-many-instance-attributes
 """
 Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
@@ -12,6 +13,9 @@ class ClientRegistry:
     provide the next available client id number when a new client
     identifier is added to the registry.
     """
+    # Hashed client ids are kept apart from the numbered client ids.
+    HASHED_CLIENT_IDNO_BASE = 1 << 62
+
     def __init__(self, dest_ws_registry, starting_client_idno=1000):
         """
         Create a new identitity registry and set the value of the initial
@@ -21,29 +25,99 @@ class ClientRegistry:
         self.dest_ws_reg = dest_ws_registry
 
         # Class attributes.
+        self.changed_identity_signatures = {}
         self.client_id_list = {}
+        self.client_idno_collision_cnt = 0
+        self.hashed_client_idnos = False
+        self.identity_signatures = {}
+        self.keeps_identity_signatures = False
+        self.known_client_idnos = set()
         self.next_client_idno = starting_client_idno
 
-    def create_identity(self):
+    def create_identity(self, identity_signature=None):
         """
         There should be one unique identity for each client.  A client
         id is a unique number that is associated with each client.
         Creation of an identity automatically adds it to the list in
-        the registry.
+        the registry.  If client ids are hashed, the client id is
+        derived from the identity signature of the new client.
         """
-        client_idno = self.get_next_client_idno()
+        if self.hashed_client_idnos and identity_signature is not None:
+            client_idno = self.get_hashed_client_idno(identity_signature)
+        else:
+            client_idno = self.get_next_client_idno()
         identity = ClientIdentity(client_idno, self.dest_ws_reg)
         self.client_id_list[client_idno] = identity
         return identity
 
+    def export_state(self):
+        """
+        Compact state of the registry for checkpoints: the next client
+        id number and the destination worksheet rows of each client.
+        """
+        return {
+            'next_client_idno': self.next_client_idno,
+            'identities': [
+                [client_idno, identity.dest_ws]
+                for client_idno, identity in self.client_id_list.items()
+                ],
+            }
+
+    def get_hashed_client_idno(self, identity_signature):
+        """
+        Derive the client id from the set of identifiers that the client
+        was first seen with.  The same client gets the same client id on
+        every run, and client ids can be created independently, e.g. by
+        several workers, and merged without renumbering.
+
+        If the client id is already taken the next free client id is
+        used.  That happens when two clients are first seen with the
+        same set of identifiers, e.g. when a row shares too few
+        identifiers with a known client to match it, or, very rarely,
+        when two sets of identifiers hash alike.  The client seen first
+        keeps the derived client id, so the client ids of such clients
+        depend on the order in which the rows are processed.
+        """
+        # Imported on first use to keep the startup fast.
+        import hashlib #pylint: disable=import-outside-toplevel
+        digest = hashlib.blake2b(
+            identity_signature.encode('utf8'),
+            digest_size=8
+            ).digest()
+        client_idno = self.HASHED_CLIENT_IDNO_BASE\
+            | int.from_bytes(digest, 'big') % self.HASHED_CLIENT_IDNO_BASE
+        while client_idno in self.client_id_list or\
+                client_idno in self.known_client_idnos:
+            # Collision.
+            self.client_idno_collision_cnt += 1
+            client_idno = self.HASHED_CLIENT_IDNO_BASE\
+                | (client_idno + 1) % self.HASHED_CLIENT_IDNO_BASE
+        return client_idno
+
     def get_identity_by_idno(self, client_idno):
         """
-        Return the client id.
+        Return the client id.  Clients known from previous runs are only
+        given destination worksheet rows once they are seen again.
         """
         if client_idno in self.client_id_list:
             return self.client_id_list[client_idno]
+        if client_idno in self.known_client_idnos:
+            identity = ClientIdentity(client_idno, self.dest_ws_reg)
+            self.client_id_list[client_idno] = identity
+            return identity
         return None
 
+    def get_identity_by_signature(self, identity_signature):
+        """
+        Return the client identity previously resolved for exactly the
+        same set of identifiers, or None.  Only used when identity
+        signatures are kept, see save_identity_signature().
+        """
+        if not self.keeps_identity_signatures or\
+                identity_signature not in self.identity_signatures:
+            return None
+        return self.get_identity_by_idno(self.identity_signatures[identity_signature])
+
     def get_next_client_idno(self):
         """
         The client identity registry keeps track of the next available
@@ -53,3 +127,31 @@ class ClientRegistry:
         client_idno = self.next_client_idno
         self.next_client_idno += 1
         return client_idno
+
+    def import_state(self, state):
+        """
+        Restore the registry from a checkpoint.  Restore the destination
+        worksheets registry afterwards, since creating the identities
+        also advances the destination worksheet rows.
+        """
+        self.client_id_list = {}
+        for client_idno, dest_ws in state['identities']:
+            identity = ClientIdentity(client_idno, self.dest_ws_reg)
+            identity.dest_ws = dict(dest_ws)
+            self.client_id_list[client_idno] = identity
+        self.next_client_idno = max(self.next_client_idno, state['next_client_idno'])
+        return True
+
+    def save_identity_signature(self, identity_signature, client_idno):
+        """
+        Keep the client resolved for a set of identifiers so that the
+        same set of identifiers always resolves to the same client, in
+        this run and in later runs.  Identity signatures are only kept
+        when the registries are persisted across runs.
+        """
+        if not self.keeps_identity_signatures or\
+                identity_signature in self.identity_signatures:
+            return False
+        self.identity_signatures[identity_signature] = client_idno
+        self.changed_identity_signatures[identity_signature] = client_idno
+        return True
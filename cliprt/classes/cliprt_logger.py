@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+#pylint: disable=too-few-public-methods
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class LogMessage:
+    """
+    A message registry message and its arguments.  The message text is
+    only formatted if, and when, a log handler needs it.
+    """
+    __slots__ = ('msg_no', 'args')
+
+    def __init__(self, msg_no, args):
+        """
+        Keep the message number and its arguments for later.
+        """
+        self.msg_no = msg_no
+        self.args = args
+
+    def __str__(self):
+        """
+        Format the message.
+        """
+        return MESSAGE_REGISTRY.msg(self.msg_no).format(*self.args)
+
+class CliprtLogger:
+    """
+    Low-overhead logging.  Log records are queued and then formatted and
+    written by a listener thread, off the hot path.  Messages are keyed
+    by message registry numbers and are only formatted when they are
+    actually written.  Per-row tracing is enabled per content worksheet
+    so that a single problem worksheet can be traced without slowing
+    down the processing of the others.  Use the module level
+    CLIPRT_LOGGER.
+    """
+    # Logger names.
+    LOGGER_NAME = 'cliprt'
+    TRACE_LOGGER_NAME = 'cliprt.trace'
+
+    # Log record layout.
+    LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+    # Log levels, those of the logging module, which is imported on
+    # first use to keep the startup fast.
+    NOTSET = 0
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+    def __init__(self):
+        """
+        Logging is not started until it is configured.  Until then only
+        warnings and errors get through, via the logging module's last
+        resort handler.
+        """
+        # Class attributes.
+        self.listener = None
+        self.logger = None
+        self.queue_handler = None
+        self.trace_logger = None
+        self.trace_ws_names = set()
+
+    def configure(
+            self,
+            level=INFO,
+            log_filename=None,
+            stream=None,
+            trace_ws_names=None
+        ):
+        """
+        Start logging at the given level to a log file, or to a stream
+        (stderr by default).  Per-row tracing is enabled for the named
+        content worksheets.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        import logging
+        import queue
+        from logging import handlers as log_handlers
+        from cliprt.classes.deferred_queue_handler import DeferredQueueHandler
+        self.stop()
+        self.init_loggers()
+        if log_filename is not None:
+            handler = logging.FileHandler(log_filename, encoding='utf8')
+        else:
+            handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(self.LOG_FORMAT))
+
+        self.trace_ws_names = set(trace_ws_names) if trace_ws_names else set()
+        self.logger.setLevel(level)
+        self.trace_logger.setLevel(self.DEBUG if self.trace_ws_names else self.WARNING)
+        log_queue = queue.SimpleQueue()
+        self.queue_handler = DeferredQueueHandler(log_queue)
+        self.logger.addHandler(self.queue_handler)
+        self.logger.propagate = False
+        self.listener = log_handlers.QueueListener(log_queue, handler)
+        self.listener.start()
+        return True
+
+    @staticmethod
+    def add_arguments(parser):
+        """
+        Add the --log-level and --log-file command line arguments of the
+        CLIPRT commands.
+        """
+        parser.add_argument(
+            '--log-level',
+            choices=['debug', 'info', 'warning', 'error'],
+            default='info'
+            )
+        parser.add_argument(
+            '--log-file',
+            help='write the log to this file rather than to stderr'
+            )
+        return parser
+
+    def debug(self, msg_no, *args):
+        """
+        Log a debug message.
+        """
+        self.log(self.DEBUG, msg_no, *args)
+
+    def error(self, msg_no, *args):
+        """
+        Log an error message.
+        """
+        self.log(self.ERROR, msg_no, *args)
+
+    def info(self, msg_no, *args):
+        """
+        Log an info message.
+        """
+        self.log(self.INFO, msg_no, *args)
+
+    def is_row_tracing(self, ws_name):
+        """
+        Determine if the rows of a content worksheet are to be traced.
+        Check once per worksheet and guard the per-row trace calls with
+        the result so that tracing costs nothing when it is disabled.
+        """
+        return ws_name in self.trace_ws_names and\
+            self.trace_logger.isEnabledFor(self.DEBUG)
+
+    def init_loggers(self):
+        """
+        Get the loggers, on first use.
+        """
+        if self.logger is None:
+            # Imported on first use to keep the startup fast.
+            import logging #pylint: disable=import-outside-toplevel
+            self.logger = logging.getLogger(self.LOGGER_NAME)
+            self.trace_logger = logging.getLogger(self.TRACE_LOGGER_NAME)
+        return self.logger
+
+    def log(self, level, msg_no, *args):
+        """
+        Log a message registry message.  The message is formatted later
+        by the listener, and only if the level is enabled.
+        """
+        if self.logger is None:
+            self.init_loggers()
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, LogMessage(msg_no, args))
+
+    def run_command(self, command, args):
+        """
+        Run a CLIPRT command with logging configured by its --log-level
+        and --log-file arguments.  The queued records are flushed when
+        the command is done.
+        """
+        self.configure(level=args.log_level.upper(), log_filename=args.log_file)
+        try:
+            command(args)
+        finally:
+            self.stop()
+        return 0
+
+    def stop(self):
+        """
+        Flush the queued records and stop logging.
+        """
+        if self.listener is None:
+            return False
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+        self.logger.removeHandler(self.queue_handler)
+        self.queue_handler = None
+        self.logger.setLevel(self.NOTSET)
+        self.logger.propagate = True
+        self.trace_logger.setLevel(self.NOTSET)
+        self.trace_ws_names = set()
+        return True
+
+    def trace(self, msg_no, *args):
+        """
+        Log a per-row trace message.  Callers check is_row_tracing()
+        first.
+        """
+        if self.trace_logger is None:
+            self.init_loggers()
+        if self.trace_logger.isEnabledFor(self.DEBUG):
+            self.trace_logger.log(self.DEBUG, LogMessage(msg_no, args))
+
+    def warning(self, msg_no, *args):
+        """
+        Log a warning message.
+        """
+        self.log(self.WARNING, msg_no, *args)
+
+# The logger shared by all of the CLIPRT classes.
+CLIPRT_LOGGER = CliprtLogger()
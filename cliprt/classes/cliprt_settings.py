@@ -5,7 +5,8 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from dateutil.parser import parse
+import datetime
+import re
 
 class CliprtSettings:
     """
@@ -13,6 +14,8 @@ class CliprtSettings:
     - DED settings standardize the data element dictionary.
     - Reporting parameters control the output to the destination
         worksheets.
+    Settings are read-only.  Use the module level CLIPRT_SETTINGS rather
+    than creating new instances.
     """
     # -----
     # Paths
@@ -20,6 +23,14 @@ class CliprtSettings:
     resources_path = 'cliprt/resources'
     test_resources_path = 'cliprt/tests/resources'
 
+    # ----------------
+    # Startup settings
+    # ----------------
+
+    # Import time budget, in seconds, for the CLIPRT command line
+    # interface.  Heavy dependencies are imported on first use.
+    import_time_budget = 0.05
+
     # ---------------------------------
     # Client content reporting settings
     # ---------------------------------
@@ -27,6 +38,52 @@ class CliprtSettings:
     # Threshold for determining that we have an identity match.
     identity_match_threshold = 2
 
+    # Identifier values that never identify a client, such as
+    # placeholders.  Entries of the form 'type::value' only apply to
+    # identifiers of that type.
+    identifier_stop_list = (
+        'n/a',
+        'na',
+        'none',
+        'none@none.com',
+        'null',
+        'unknown',
+        )
+
+    # Once an identifier is shared by more than this many clients it
+    # no longer identifies anyone, e.g. a front desk phone, and it is
+    # stopped.  None to never stop identifiers.
+    identifier_fan_out_threshold = 50
+
+    # Number of the most shared identifiers to report.
+    heaviest_identifiers_report_cnt = 10
+
+    # Fuzzy name matching: the identifier types that are names, the
+    # similarity, from 0 to 1, at which two names match, and the size
+    # of a block of similar sounding names beyond which the block is too
+    # common to be useful.
+    fuzzy_name_identifier_types = ('name',)
+    fuzzy_name_similarity_threshold = 0.75
+    fuzzy_name_block_size_limit = 1000
+
+    # Formatting applied to whole columns makes a worksheet report
+    # every row of the worksheet as used.  The rows of a content
+    # worksheet are read until this many empty rows in a row.
+    trailing_empty_rows_limit = 1000
+
+    # In error-tolerant mode, the number of rows that may fail before
+    # the run is aborted.
+    quarantine_error_budget = 100
+
+    # With a memory budget, the bytes of destination rows kept in memory
+    # before the least recently used rows spill to disk.
+    destination_memory_budget = 256 * 1024 * 1024
+
+    # Client rows per report worksheet.  Excel worksheets are limited to
+    # 1,048,576 rows, including the column headings, so larger reports
+    # are sharded across numbered worksheets, or files.
+    report_shard_size = 1048575
+
     # Minimal number of data elements in a client content worksheet
     # required for creating a destination (reporting) worksheet.
     min_required_content_ws_columns = 3
@@ -41,13 +98,16 @@ class CliprtSettings:
     DED Settings
     """
     # Required DED column headings.
-    col_headings = [
+    col_headings = (
         'Content DE Name',
         'Content DE Type',
         'Dest WS',
         'Dest DE Name',
         'Dest DE Format',
-        ]
+        )
+    # Optional DED column headings.
+    dest_de_merge_col_heading = 'Dest DE Merge'
+
     de_name_col_idx = 0
     de_type_col_idx = 1
     dest_ws_col_idx = 2
@@ -64,36 +124,91 @@ class CliprtSettings:
     name_format = 'name'
     phone_format = 'phone'
 
+    # Valid data element merge policies: how the values of a client
+    # are merged into a destination cell.
+    all_unique_merge = 'all-unique'
+    earliest_date_merge = 'earliest-date'
+    first_seen_merge = 'first-seen'
+    last_seen_merge = 'last-seen'
+    latest_date_merge = 'latest-date'
+    longest_merge = 'longest'
+    most_frequent_merge = 'most-frequent'
+
     # Valid data element types list.
-    valid_de_types = [
+    valid_de_types = (
         identifier_de_type,
         fragment_de_type,
         unit_test_de_type,
-        ]
+        )
 
     # Valid data element formats list.
-    valid_de_formats = [
+    valid_de_formats = (
         date_format,
         name_format,
         phone_format,
-        ]
+        )
 
-    """
-    Data formatting functions.
-    """
-    @staticmethod
-    def format_date(date_value):
+    # Valid data element merge policies list.
+    valid_de_merges = (
+        all_unique_merge,
+        earliest_date_merge,
+        first_seen_merge,
+        last_seen_merge,
+        latest_date_merge,
+        longest_merge,
+        most_frequent_merge,
+        )
+
+    # Merge policies that compare dates, which need the date format.
+    date_de_merges = (
+        earliest_date_merge,
+        latest_date_merge,
+        )
+
+    # Formatted dates and phone numbers, which need no formatting.
+    formatted_date_pattern = re.compile(r'\d{2}/\d{2}/\d{4}')
+    formatted_phone_pattern = re.compile(r'\d-\d{3}-\d{3}-\d{4}')
+
+    def __setattr__(self, name, value):
+        """
+        Settings are shared by all of the CLIPRT classes, so they must
+        not be changed at run time.
+        """
+        raise AttributeError(f'CLIPRT settings are read-only: {name}')
+
+    # Data formatting functions.
+    def format_date(self, date_value):
         """
-        Normalize the format of dates if possible.
+        Normalize the format of dates if possible.  Date cells are
+        formatted directly rather than parsed.
         """
+        if isinstance(date_value, datetime.date):
+            return date_value.strftime("%m/%d/%Y")
+        if not isinstance(date_value, str):
+            date_value = self.format_number(date_value)
+        elif self.formatted_date_pattern.fullmatch(date_value):
+            return date_value
+        # Imported on first use to keep the startup fast.
+        from dateutil.parser import parse #pylint: disable=import-outside-toplevel
         date_obj = parse(date_value)
         return date_obj.strftime("%m/%d/%Y")
 
     @staticmethod
-    def format_name(data_value):
+    def format_number(number_value):
+        """
+        Numbers as strings.  Whole numbers stored as floats, e.g. phone
+        numbers, lose the decimal point.
+        """
+        if isinstance(number_value, float) and number_value.is_integer():
+            return str(int(number_value))
+        return str(number_value)
+
+    def format_name(self, data_value):
         """
         Normalize the format of names if possible to First Last.
         """
+        if not isinstance(data_value, str):
+            return self.format_number(data_value)
         name_pieces = data_value.split(",")
 
         # If there are no pieces there's nothing to do.
@@ -121,6 +236,13 @@ class CliprtSettings:
         if area_code is None:
             area_code = self.default_area_code
 
+        if not isinstance(data_value, str):
+            # Phone number cells.
+            data_value = self.format_number(data_value)
+        elif self.formatted_phone_pattern.fullmatch(data_value):
+            # Already formatted.
+            return data_value
+
         # Digits only.
         pho_no = ''.join(i for i in data_value if i.isdigit())
 
@@ -159,3 +281,6 @@ class CliprtSettings:
         spaces.
         """
         return None if str_value is None else str_value.replace('_', ' ').lower()
+
+# The settings shared by all of the CLIPRT classes.
+CLIPRT_SETTINGS = CliprtSettings()
@@ -5,13 +5,13 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from cliprt.classes.cliprt_settings import CliprtSettings
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 
 class CliprtUserGuide:
     """
     User guide available from the command line.
     """
-    settings = CliprtSettings()
+    settings = CLIPRT_SETTINGS
     user_guide_resource = '/cliprt_user_guide.txt'
 
     def __init__(self, user_guide_path=None):
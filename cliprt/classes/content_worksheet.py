@@ -6,13 +6,15 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+import time
 from cliprt.classes.client_identity_resolver import ClientIdentityResolver
-from cliprt.classes.cliprt_settings import CliprtSettings
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 from cliprt.classes.data_element_fragments_assembler\
     import DataElementFragmentsAssembler\
         as FragAssembler
 from cliprt.classes.identifier import Identifier
-from cliprt.classes.message_registry import MessageRegistry
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
 
 class ContentWorksheet:
     """
@@ -26,35 +28,77 @@ class ContentWorksheet:
     # Display progress interval size.
     PROGRESS_INCREMENT = 50
 
-    def __init__(
+    # The keyword-only options count as local variables.
+    def __init__( #pylint: disable=too-many-locals
             self,
             cliprt_wb,
             cliprt_ws_name,
             ded_processor,
             client_registry,
             identifier_registry,
-            dest_ws_registry
+            dest_ws_registry,
+            *,
+            identity_listener=None,
+            identity_match_threshold=None,
+            progress_listener=None,
+            checkpoint=None,
+            pipeline=None,
+            run_state=None,
+            duplicate_rows=None,
+            trailing_empty_rows_limit=None,
+            quarantine=None
         ):
         """
-        Ready a content worksheet for processing.
+        Ready a content worksheet for processing.  The options after the
+        registries are keyword-only.  The optional identity
+        listener is called with the worksheet name, the row index and
+        the resolved identity of each row.  The optional progress
+        listener is called with the worksheet name, the number of rows
+        processed and the number of rows to process as the rows are
+        processed.  The optional checkpoint resumes the worksheet from
+        the last checkpointed row and saves a checkpoint as configured.
+        The optional pipeline processes the rows in stages rather than
+        row by row.  The optional run state limits the processing to the
+        rows that are new or changed since the previous run.  The
+        optional duplicate row detector skips the rows that repeat a row
+        already processed.  The rows are read until the trailing empty
+        rows limit of empty rows in a row.  The optional quarantine sets
+        the rows that fail aside rather than aborting.
         """
         # Dependency injections.
+        self.checkpoint = checkpoint
         self.ded_processor = ded_processor
+        self.duplicate_rows = duplicate_rows
         self.client_reg = client_registry
         self.identifier_reg = identifier_registry
         self.dest_ws_reg = dest_ws_registry
-        self.settings = CliprtSettings()
+        self.identity_listener = identity_listener
+        self.pipeline = pipeline
+        self.quarantine = quarantine
+        self.run_state = run_state
+        self.progress_listener = progress_listener
+        self.settings = CLIPRT_SETTINGS
 
         # Class attributes.
         self.content_cols = {}
         self.de_names = []
         self.ded = ded_processor.ded
-        self.cliprt = MessageRegistry()
+        self.cliprt = MESSAGE_REGISTRY
         self.frag_assembler_list = {}
+        self.frag_values = {}
         self.identifier_col_names = {}
+        self.identity_match_threshold = self.settings.identity_match_threshold\
+            if identity_match_threshold is None else identity_match_threshold
+        self.max_row = None
+        self.projected_cols = []
         self.cliprt_wb = cliprt_wb
         self.cliprt_ws = cliprt_wb[cliprt_ws_name]
         self.cliprt_ws_name = cliprt_ws_name
+        # The column headings row.  openpyxl scans every cell for the
+        # min_row, so it is only looked up once.
+        self.min_row = self.cliprt_ws.min_row
+        self.trailing_empty_rows_limit = self.settings.trailing_empty_rows_limit\
+            if trailing_empty_rows_limit is None else trailing_empty_rows_limit
 
     def build_etl_map(self):
         """
@@ -66,8 +110,8 @@ class ContentWorksheet:
         # worksheets.  Also flag the identity and fragment columns for
         # special processing.
         ws_top_row = list(self.cliprt_ws.iter_rows(
-            min_row=self.cliprt_ws.min_row,
-            max_row=self.cliprt_ws.min_row
+            min_row=self.min_row,
+            max_row=self.min_row
             ))[0]
         for ws_cell in ws_top_row:
 
@@ -117,6 +161,34 @@ class ContentWorksheet:
                 # If none of the above, it's content.
                 self.content_cols[ws_cell.column] = ws_de_name
 
+        # Now that all of the fragment columns are known, plan the
+        # fragment assembly.
+        for frag_assembler in self.frag_assembler_list.values():
+            frag_assembler.compile_plan(self.ded)
+
+        # The rows actually used.
+        self.max_row = self.data_max_row(self.cliprt_ws, self.trailing_empty_rows_limit)
+
+        # The mapped columns, by destination data element name in name
+        # order, for comparing rows across content worksheets.
+        # Fragments keep their own names, since they are assembled.
+        dest_de_names = {
+            de_name: self.ded[de_name].dest_de_name if self.ded[de_name].is_remapped\
+                else de_name
+            for de_name in list(self.identifier_col_names) + list(self.content_cols.values())
+            }
+        self.projected_cols = sorted(
+            [(dest_de_names[de_name], col_idx)
+             for de_name, col_idx in self.identifier_col_names.items()
+             if col_idx != self.ASSEMBLED_IDENTIFIER]\
+            + [(dest_de_names[de_name], col_idx)
+               for col_idx, de_name in self.content_cols.items()]\
+            + [(fragment_name, col_idx)
+               for frag_assembler in self.frag_assembler_list.values()
+               for fragment_name, col_idx
+               in frag_assembler.fragments_col_indicies.items()]
+            )
+
     def client_report(self, progress_reporting_is_disabled=False):
         """
         Create the destination report worksheets.
@@ -129,11 +201,74 @@ class ContentWorksheet:
             # Skip worksheets with insufficient data to report.
             if not progress_reporting_is_disabled:
                 print(self.cliprt.msg(5000).format(self.cliprt_ws_name))
+            else:
+                CLIPRT_LOGGER.warning(5000, self.cliprt_ws_name)
             return False
 
+        start_time = time.perf_counter()
+        CLIPRT_LOGGER.info(6010, self.cliprt_ws_name, self.max_row - self.min_row)
+        if self.run_state is not None:
+            self.run_state.start_ws(self.cliprt_ws_name, self.cliprt_ws, self.min_row)
         self.process_ws_rows(progress_reporting_is_disabled)
+        if self.run_state is not None:
+            self.run_state.ws_processed(self.cliprt_ws_name)
+        if self.duplicate_rows is not None:
+            duplicate_cnt = self.duplicate_rows.report_duplicates(self.cliprt_ws_name)
+            if not progress_reporting_is_disabled:
+                print(f'Duplicate rows skipped          : {duplicate_cnt}')
+        CLIPRT_LOGGER.info(
+            6011,
+            self.cliprt_ws_name,
+            time.perf_counter() - start_time
+            )
         return True
 
+    @staticmethod
+    def data_max_row(cliprt_ws, trailing_empty_rows_limit):
+        """
+        The last row with any values.  Formatting applied to whole
+        columns makes max_row report the last row of the worksheet, so
+        the rows are read until trailing_empty_rows_limit empty rows in
+        a row, or to max_row if there is no limit.
+        """
+        min_row = cliprt_ws.min_row
+        data_max_row = min_row
+        for row_idx, row in enumerate(
+                cliprt_ws.iter_rows(min_row=min_row, values_only=True),
+                start=min_row
+            ):
+            if any(value is not None and value != '' for value in row):
+                data_max_row = row_idx
+            elif trailing_empty_rows_limit is not None and\
+                    row_idx - data_max_row >= trailing_empty_rows_limit:
+                break
+        return data_max_row
+
+    def format_row(self, identifiers, content_values, frag_values):
+        """
+        Format the values of a row for the destination worksheets, so
+        that a value that cannot be formatted fails the row before any
+        of it is resolved or written.  Returns the formatted identifier
+        values by identifier key, and the formatted content and
+        fragment values as destination data element name and value
+        pairs.
+        """
+        format_value = self.dest_ws_reg.format_value
+        identifier_values = {
+            identifier.key: format_value(
+                identifier.de_value,
+                self.ded[identifier.de_name].dest_de_format
+                )
+            for identifier in identifiers
+            if identifier.de_value is not None
+            }
+        row_values = [
+            (dest_de_name, format_value(de_value, self.ded[dest_de_name].dest_de_format))
+            for dest_de_name, de_value in content_values + list(frag_values.items())
+            if de_value is not None
+            ]
+        return identifier_values, row_values
+
     def has_sufficent_data(self):
         """
         Determine if the worksheet as a minimal amount of content.
@@ -141,6 +276,16 @@ class ContentWorksheet:
         return len(self.content_cols) + len(self.identifier_col_names)\
                 >= self.settings.min_required_content_ws_columns
 
+    def is_new_row(self, row_idx, row):
+        """
+        Determine if the row, given its values, is new or changed since
+        the previous run.  Every row is new unless incremental runs are
+        enabled.
+        """
+        if self.run_state is None:
+            return True
+        return self.run_state.is_new_row(self.cliprt_ws_name, row_idx, row)
+
     def print_frag_assembler_list(self):
         """
         List the fragments.
@@ -158,7 +303,7 @@ class ContentWorksheet:
         """
         print('--------')
         print(f'Worksheet currently in progress: {self.cliprt_ws_name}')
-        print(f'Rows of content to be processed: {self.cliprt_ws.max_row}')
+        print(f'Rows of content to be processed: {self.max_row - self.min_row}')
         print(f'DE Names     > ws_de_names     : {self.de_names}')
         print(f'DE Fragments > fragment_cols   : {self.print_frag_assembler_list()}')
         print(f'Identifiers  > identifier_cols : {self.identifier_col_names}')
@@ -166,35 +311,39 @@ class ContentWorksheet:
         print(f"Processing in progress         : {'-'*self.PROGRESS_INCREMENT}")
         print('                               : ', end='')
 
+    def projected_row(self, row_idx):
+        """
+        The mapped values of the row, as data element name and value
+        pairs.  Empty values are left out.
+        """
+        projected_row = []
+        for de_name, col_idx in self.projected_cols:
+            de_value = self.cliprt_ws.cell(row_idx, col_idx).value
+            if de_value is not None:
+                projected_row.append((de_name, de_value))
+        return projected_row
+
     def process_row_de_fragments(self, row_idx):
         """
-        Collect the data element fragments in assemblers.
+        Assemble the data element fragments of the row, once per row.
+        The assembled values are used for the identifiers and for each
+        of the destination worksheets.
         """
+        self.frag_values = {}
         if len(self.frag_assembler_list) == 0:
             # There are no fragments to process.
             return False
 
-        for dest_de_name_fragments_assembler in self.frag_assembler_list.items():
-            fragments_assembler = dest_de_name_fragments_assembler[1]
-            # Get each data element fragment name, look up its worksheet
-            # column index and get the fragment's value from the
-            # worksheet row and save it to the assembler.
-            for fragment_name, col_idx in fragments_assembler.fragments_col_indicies.items():
-                # Get the data vslue from the appropriate worksheet
-                # column.  Replace null strings with empty strings as
-                # needed.
-                frag_value = self.cliprt_ws.cell(row_idx, col_idx).value \
-                    if not self.cliprt_ws.cell(row_idx, col_idx).value is None \
-                    else ''
-                # The DED has the fragment index.
-                frag_idx = self.ded[fragment_name].fragment_idx
-                # Provide the data value to the fragment assembler.
-                fragments_assembler.add_fragment_value(frag_idx, frag_value)
+        for dest_de_name, frag_assembler in self.frag_assembler_list.items():
+            self.frag_values[dest_de_name] = frag_assembler.assemble(
+                self.cliprt_ws.cell(row_idx, col_idx).value
+                for col_idx in frag_assembler.fragment_plan
+                )
         return True
 
-    def process_row_de_identifiers(self, client_id_resolver, row_idx):
+    def process_row_de_identifiers(self, row_idx):
         """
-        Process the identifiers for the current row.
+        The identifiers of the current row.
         """
         if len(self.identifier_col_names) == 0:
             # Fatal error: identifiers are required since this is client
@@ -202,21 +351,103 @@ class ContentWorksheet:
             # belongs too.
             raise Exception(self.cliprt.msg(5012).format(self.cliprt_wb.active.title))
 
-        # Process the identifiers.
+        identifiers = []
         for de_name, col_idx in self.identifier_col_names.items():
             if col_idx == self.ASSEMBLED_IDENTIFIER:
-                de_value = self.frag_assembler_list[de_name].assembled_value()
+                de_value = self.frag_values[de_name]
             else:
                 de_value = self.cliprt_ws.cell(row_idx, col_idx).value
-            identifier = Identifier(de_name, de_value, self.ded)
-            client_id_resolver.save_identifier(identifier)
+            identifiers.append(Identifier(de_name, de_value, self.ded))
+        return identifiers
+
+    def process_normalized_row(self, normalized_row, row_tracing=False, is_validated=False):
+        """
+        Resolve the client identity of a row, given as row index, row
+        key, identifiers, content values and fragment values, and copy
+        its values to the destination worksheets.  The row is formatted
+        before anything is resolved or written, and it is only
+        remembered as processed by the duplicate row detector once it
+        is written, so that a row that fails leaves nothing behind.
+        """
+        row_idx, row_key, identifiers, content_values, frag_values = normalized_row
+        if identifiers is None:
+            # Blank row.
+            self.row_resolved(row_idx, None)
+            return False
+        if row_key is not None and\
+                self.duplicate_rows.check_row(self.cliprt_ws_name, row_key):
+            # The row repeats a row already processed, so its values
+            # are already in the destination worksheets.
+            self.row_resolved(row_idx, self.duplicate_rows.identity(row_key))
+            return False
+        identifier_values, row_values = self.format_row(
+            identifiers,
+            content_values,
+            frag_values
+            )
 
         # Resolve the client's identity.  None returned if there are no
         # useful identifiers provided for establishing an identity.
+        client_id_resolver = ClientIdentityResolver(
+            self.client_reg,
+            self.identifier_reg
+            )
+        for identifier in identifiers:
+            client_id_resolver.save_identifier(identifier, is_validated)
         identity = client_id_resolver.resolve_client_identity(
-            self.settings.identity_match_threshold
+            self.identity_match_threshold
+            )
+        if row_tracing:
+            CLIPRT_LOGGER.trace(
+                6020,
+                self.cliprt_ws_name,
+                row_idx,
+                client_id_resolver.identifiers_matched,
+                client_id_resolver.identifiers_unmatched,
+                None if identity is None else identity.client_idno
+                )
+        if identity is not None:
+            self.write_row(
+                identity,
+                client_id_resolver.identifiers_matched\
+                    + client_id_resolver.identifiers_unmatched,
+                identifier_values,
+                row_values
+                )
+        if row_key is not None:
+            self.duplicate_rows.save_row(row_key, identity)
+        self.row_resolved(row_idx, identity)
+        return identity is not None
+
+    def process_row(self, row_idx, row_tracing=False):
+        """
+        Resolve the client identity of a row and copy its values to the
+        destination worksheets.
+        """
+        projected_row = self.projected_row(row_idx)
+        if not projected_row:
+            # Blank row.
+            return self.process_normalized_row((row_idx, None, None, None, None))
+
+        row_key = None
+        if self.duplicate_rows is not None:
+            row_key = self.duplicate_rows.row_key(projected_row)
+
+        # First process the fragmented data elements columns and
+        # assemble them, some of which may be identifiers.
+        self.process_row_de_fragments(row_idx)
+
+        # The identifiers determine if this is a new or a previously
+        # identified client.
+        identifiers = self.process_row_de_identifiers(row_idx)
+        content_values = [
+            (dest_de_name, self.cliprt_ws.cell(row_idx, col_idx).value)
+            for col_idx, dest_de_name in self.content_cols.items()
+            ]
+        return self.process_normalized_row(
+            (row_idx, row_key, identifiers, content_values, self.frag_values),
+            row_tracing
             )
-        return identity
 
     def process_ws_rows(self, progress_reporting_is_disabled=False):
         """
@@ -224,126 +455,126 @@ class ContentWorksheet:
         worksheet. Note that this worksheet would have been skipped
         if it has no content.
         """
+        if self.pipeline is not None:
+            return self.pipeline.run(self, progress_reporting_is_disabled)
 
         # The first row holds the column headings.
-        row_idx = self.cliprt_ws.min_row
+        row_idx = self.min_row
+        if self.checkpoint is not None:
+            # Continue after the last checkpointed row.
+            row_idx = self.checkpoint.resume_row_idx(self.cliprt_ws_name, row_idx)
 
         # Scale the progress bar update threshold.
-        if self.cliprt_ws.max_row > self.PROGRESS_INCREMENT:
+        if self.max_row > self.PROGRESS_INCREMENT:
             # Large content worksheets.
             progress_threshold =\
-                int(self.cliprt_ws.max_row/self.PROGRESS_INCREMENT)
+                int(self.max_row/self.PROGRESS_INCREMENT)
         else:
             # Small content worksheets.
             progress_threshold = 1
 
+        # Per-row tracing is decided once for the whole worksheet.
+        row_tracing = CLIPRT_LOGGER.is_row_tracing(self.cliprt_ws_name)
+
+        # The rows to process, less the column headings row.
+        row_cnt = self.max_row - self.min_row
+
+        # Only the new or changed rows are processed in incremental runs.
+        # Their values are read as they are processed, to hash them.
+        rows = None if self.run_state is None else self.cliprt_ws.iter_rows(
+            min_row=row_idx + 1,
+            max_row=self.max_row,
+            values_only=True
+            )
+
         # Process each row of the content worksheet.
-        while row_idx < self.cliprt_ws.max_row:
+        while row_idx < self.max_row:
             row_idx += 1
 
             if not progress_reporting_is_disabled and\
                     row_idx % progress_threshold == 0:
                 # Update the progress report indicator.
                 print('x', end='')
+            if self.progress_listener is not None and\
+                    (row_idx % progress_threshold == 0 or\
+                        row_idx == self.max_row):
+                self.progress_listener(
+                    self.cliprt_ws_name,
+                    row_idx - self.min_row,
+                    row_cnt
+                    )
+            if rows is not None and not self.is_new_row(row_idx, next(rows)):
+                # Processed in a previous run.
+                continue
 
-            # First process the fragmented data elements columns and
-            # assemble them, some of which may be identifiers.
-            self.process_row_de_fragments(row_idx)
-
-            # Process the identifiers in order to determine if this is
-            # a new or a previously identified client.
-            client_id_resolver = ClientIdentityResolver(
-                self.client_reg,
-                self.identifier_reg
-                )
-            identity = self.process_row_de_identifiers(
-                client_id_resolver,
-                row_idx
-                )
-
-            # Copy the matched identifiers values to the destination worksheet.
-            for dest_ws_ind, dest_row_idx in identity.dest_ws.items():
-                for identifier in client_id_resolver.identifiers_matched:
-                    self.update_dest_ws(identifier, dest_ws_ind, dest_row_idx)
-
-                # Copy the content columns to the destination worksheet.
-                for col_idx, dest_de_name in self.content_cols.items():
-                    dest_de_value = self.cliprt_ws.cell(row_idx, col_idx).value
-                    self.update_dest_ws_with_content(
-                        dest_de_name,
-                        dest_ws_ind,
-                        dest_de_value,
-                        dest_row_idx
-                        )
-
-                # Copy assembled content fragments to the destination
-                # worksheet.
-                for dest_de_name, frag_info in self.frag_assembler_list.items():
-
-                    # Update the destination report worksheet.
-                    dest_row_idx = identity.get_row_idx(dest_ws_ind)
-                    dest_col_idx = self.ded[dest_de_name].get_col_by_dest_ws_ind(dest_ws_ind)
-                    dest_de_value = frag_info.assembled_value()
-                    dest_de_format = self.ded[dest_de_name].dest_de_format
-                    self.dest_ws_reg.update_dest_ws_cell(
-                        dest_ws_ind,
-                        dest_row_idx,
-                        dest_col_idx,
-                        dest_de_value,
-                        dest_de_format
-                        )
+            if self.quarantine is None:
+                self.process_row(row_idx, row_tracing)
+            else:
+                try:
+                    self.process_row(row_idx, row_tracing)
+                except Exception as err: #pylint: disable=broad-except
+                    self.quarantine.quarantine_row(self, row_idx, err)
+            self.row_processed(row_idx)
         if not progress_reporting_is_disabled:
             # Output a new line to finish up the progress report.
             print()
 
         return True
 
-    def update_dest_ws(self, identifier, dest_ws_ind, dest_row_idx):
+    def row_processed(self, row_idx):
         """
-        Update the destination report worksheet.
+        Save a checkpoint as configured.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.row_processed(
+                self.cliprt_ws_name,
+                row_idx,
+                self.min_row
+                )
+
+    def row_resolved(self, row_idx, identity):
+        """
+        Let the identity listener and the run state know the client
+        identity the row was resolved to.
+        """
+        if self.identity_listener is not None:
+            self.identity_listener(self.cliprt_ws_name, row_idx, identity)
+        if self.run_state is not None:
+            self.run_state.row_resolved(self.cliprt_ws_name, row_idx, identity)
+
+    def update_dest_ws(self, dest_de_name, dest_ws_ind, dest_row_idx, dest_de_value):
+        """
+        Update the destination report worksheet with a formatted value.
         """
-        dest_de_name = identifier.de_name
         dest_col_idx = self.ded[dest_de_name].get_col_by_dest_ws_ind(dest_ws_ind)
         if dest_col_idx is False:
-            # There is no destination worksheet specified
-            # for this data eleement.
+            # Not all data elements are copied to all destination
+            # worksheets.
             return
-
-        dest_de_value = identifier.de_value
-        dest_de_format = self.ded[dest_de_name].dest_de_format
         self.dest_ws_reg.update_dest_ws_cell(
             dest_ws_ind,
             dest_row_idx,
             dest_col_idx,
             dest_de_value,
-            dest_de_format
+            merge_policy=self.ded[dest_de_name].dest_de_merge
             )
 
-    def update_dest_ws_with_content(
-            self,
-            dest_de_name,
-            dest_ws_ind,
-            dest_de_value,
-            dest_row_idx
-        ):
+    def write_row(self, identity, identifiers, identifier_values, row_values):
         """
-        Update the destination report worksheet.
+        Copy the formatted values of a row to the destination
+        worksheets of the client.
         """
-        if dest_de_value is None:
-            # Skip empty cells.
-            return
-
-        if not self.ded[dest_de_name].is_mapped_to_dest_ws(dest_ws_ind):
-            # Not all content gets copied to all destination worksheets.
-            return
-
-        # Update the destination report worksheet.
-        dest_col_idx = self.ded[dest_de_name].get_col_by_dest_ws_ind(dest_ws_ind)
-        dest_de_format = self.ded[dest_de_name].dest_de_format
-        self.dest_ws_reg.update_dest_ws_cell(
-            dest_ws_ind,
-            dest_row_idx,
-            dest_col_idx,
-            dest_de_value,
-            dest_de_format
-            )
+        for dest_ws_ind, dest_row_idx in identity.dest_ws.items():
+            # Copy the identifiers values to the destination worksheet.
+            for identifier in identifiers:
+                self.update_dest_ws(
+                    identifier.de_name,
+                    dest_ws_ind,
+                    dest_row_idx,
+                    identifier_values.get(identifier.key)
+                    )
+            # Copy the content columns and the assembled content
+            # fragments to the destination worksheet.
+            for dest_de_name, dest_de_value in row_values:
+                self.update_dest_ws(dest_de_name, dest_ws_ind, dest_row_idx, dest_de_value)
+        return True
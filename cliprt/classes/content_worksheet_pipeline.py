@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import queue
+import threading
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.identifier_column_normalizer import IdentifierColumnNormalizer
+
+class ContentWorksheetPipeline:
+    """
+    Process the rows of a content worksheet a chunk of rows at a time,
+    in stages.  A reader thread reads the chunks of rows as values into
+    a bounded queue while the chunks already read are normalized,
+    resolved and written to the destination worksheets.  At most
+    queue_size chunks wait in the queue, so the reader is held back
+    when the other stages fall behind.  When the workbook was loaded
+    from a file, the reader streams the rows from the file, opened
+    read-only, so that it shares nothing with the workbook being
+    updated.  The identifiers of a chunk are normalized and validated a
+    column at a time.  The chunks are processed in row order, so the
+    client reports are the same as those of the row by row processing.
+    """
+    # Default number of rows per chunk.
+    DEFAULT_CHUNK_SIZE = 1000
+
+    # Default number of chunks read ahead.
+    DEFAULT_QUEUE_SIZE = 4
+
+    def __init__(self, chunk_size=None, queue_size=None, wb_filename=None):
+        """
+        Configure the pipeline.  wb_filename is the file the workbook
+        was loaded from, if any.
+        """
+        # Class attributes.
+        self.chunk_size = self.DEFAULT_CHUNK_SIZE if chunk_size is None\
+            else chunk_size
+        self.column_normalizer = IdentifierColumnNormalizer()
+        self.queue_size = self.DEFAULT_QUEUE_SIZE if queue_size is None\
+            else queue_size
+        self.wb_filename = wb_filename
+
+    def normalize_chunk(self, content_ws, chunk):
+        """
+        Assemble the fragments and create the identifiers of a chunk of
+        rows of worksheet values.  The identifiers are normalized and
+        validated a column at a time.  Blank rows are only flagged, and
+        rows that fail in error-tolerant mode are None.
+        """
+        projected_rows = [
+            [
+                (de_name, row[col_idx - 1])
+                for de_name, col_idx in content_ws.projected_cols
+                if row[col_idx - 1] is not None
+                ]
+            for _, row in chunk
+            ]
+        try:
+            frag_values_list, identifier_cols = self.normalize_cols(
+                content_ws,
+                [row for (_, row), projected_row in zip(chunk, projected_rows)
+                 if projected_row]
+                )
+        except Exception: #pylint: disable=broad-except
+            if content_ws.quarantine is None or len(chunk) == 1:
+                raise
+            # Normalize a row at a time so that only the rows that fail
+            # are quarantined.
+            return [
+                self.quarantined(content_ws, row_idx, self.normalize_row, row_idx, row)
+                for row_idx, row in chunk
+                ]
+
+        normalized_chunk = []
+        duplicate_rows = content_ws.duplicate_rows
+        rows_idx = -1
+        for (row_idx, row), projected_row in zip(chunk, projected_rows):
+            if not projected_row:
+                # Blank row.
+                normalized_chunk.append((row_idx, None, None, None, None))
+                continue
+            rows_idx += 1
+
+            row_key = None if duplicate_rows is None\
+                else duplicate_rows.row_key(projected_row)
+
+            identifiers = [
+                identifier_col[rows_idx] for identifier_col in identifier_cols
+                if identifier_col[rows_idx] is not None
+                ]
+            content_values = [
+                (dest_de_name, row[col_idx - 1])
+                for col_idx, dest_de_name in content_ws.content_cols.items()
+                ]
+            normalized_chunk.append((
+                row_idx,
+                row_key,
+                identifiers,
+                content_values,
+                frag_values_list[rows_idx]
+                ))
+        return normalized_chunk
+
+    def normalize_cols(self, content_ws, rows):
+        """
+        Assemble the fragments of the rows and create the identifiers of
+        the rows a column at a time.  Returns the assembled fragments of
+        each row and the identifiers of each identifier column.
+        """
+        frag_values_list = [
+            {
+                dest_de_name: frag_assembler.assemble(
+                    row[col_idx - 1] for col_idx in frag_assembler.fragment_plan
+                    )
+                for dest_de_name, frag_assembler
+                in content_ws.frag_assembler_list.items()
+                }
+            for row in rows
+            ]
+        identifier_cols = [
+            self.column_normalizer.identifiers(
+                content_ws.ded,
+                de_name,
+                [frag_values[de_name] for frag_values in frag_values_list]\
+                    if col_idx == content_ws.ASSEMBLED_IDENTIFIER\
+                    else [row[col_idx - 1] for row in rows]
+                )
+            for de_name, col_idx in content_ws.identifier_col_names.items()
+            ]
+        return frag_values_list, identifier_cols
+
+    def normalize_row(self, content_ws, row_idx, row):
+        """
+        Normalize a single row of worksheet values.  Only the useful
+        identifiers of the row are kept.
+        """
+        return self.normalize_chunk(content_ws, [(row_idx, row)])[0]
+
+    def process_chunk(
+            self,
+            content_ws,
+            chunk,
+            progress_threshold,
+            progress_reporting_is_disabled
+        ):
+        """
+        Normalize, resolve and write the rows of a chunk.  Returns
+        whether a checkpoint is due.
+        """
+        checkpoint = content_ws.checkpoint
+        row_tracing = CLIPRT_LOGGER.is_row_tracing(content_ws.cliprt_ws_name)
+        checkpoint_is_due = False
+        # Only the new or changed rows are processed in incremental runs.
+        chunk = [row for row in chunk if content_ws.is_new_row(*row)]
+        for (row_idx, _), normalized_row in zip(chunk, self.normalize_chunk(content_ws, chunk)):
+            if normalized_row is not None:
+                self.quarantined(
+                    content_ws,
+                    row_idx,
+                    self.process_row,
+                    row_tracing,
+                    normalized_row
+                    )
+            self.report_progress(
+                content_ws,
+                row_idx,
+                progress_threshold,
+                progress_reporting_is_disabled
+                )
+            if checkpoint is not None and\
+                    checkpoint.is_due(row_idx, content_ws.min_row):
+                checkpoint_is_due = True
+        return checkpoint_is_due
+
+    @staticmethod
+    def process_row(content_ws, row_tracing, normalized_row):
+        """
+        Resolve the client identity of a normalized row and write it to
+        the destination worksheets.  Its identifiers are already
+        validated.
+        """
+        return content_ws.process_normalized_row(normalized_row, row_tracing, is_validated=True)
+
+    def queue_chunks(self, content_ws, first_row_idx, chunks, stop_reading):
+        """
+        Read the chunks into the queue, followed by None, or by the
+        error that stopped the reading.  Runs in the reader thread.
+        """
+        try:
+            for chunk in self.read_chunks(content_ws, first_row_idx):
+                if stop_reading.is_set():
+                    return False
+                chunks.put(chunk)
+        except Exception as err: #pylint: disable=broad-except
+            # Raised again by the pipeline.
+            chunks.put(err)
+            return False
+        chunks.put(None)
+        return True
+
+    def read_chunks(self, content_ws, first_row_idx):
+        """
+        Read the rows, from first_row_idx on, as chunks of row index and
+        row values pairs.
+        """
+        read_only_wb = None
+        cliprt_ws = content_ws.cliprt_ws
+        if self.wb_filename is not None:
+            # Imported on first use to keep the startup fast.
+            import openpyxl #pylint: disable=import-outside-toplevel
+            read_only_wb = openpyxl.load_workbook(self.wb_filename, read_only=True)
+            cliprt_ws = read_only_wb[content_ws.cliprt_ws_name]
+        try:
+            rows = enumerate(
+                cliprt_ws.iter_rows(
+                    min_row=first_row_idx,
+                    max_row=content_ws.max_row,
+                    max_col=content_ws.cliprt_ws.max_column,
+                    values_only=True
+                    ),
+                start=first_row_idx
+                )
+            while True:
+                chunk = [row for _, row in zip(range(self.chunk_size), rows)]
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            if read_only_wb is not None:
+                read_only_wb.close()
+
+    @staticmethod
+    def quarantined(content_ws, row_idx, stage_row, *args):
+        """
+        Run a stage on a row.  In error-tolerant mode a row that fails is
+        quarantined, and None is returned.
+        """
+        if content_ws.quarantine is None:
+            return stage_row(content_ws, *args)
+        try:
+            return stage_row(content_ws, *args)
+        except Exception as err: #pylint: disable=broad-except
+            content_ws.quarantine.quarantine_row(content_ws, row_idx, err)
+            return None
+
+    def run(self, content_ws, progress_reporting_is_disabled=False):
+        """
+        Process the rows of the content worksheet.  Checkpoints are
+        saved at the end of a chunk, once every row of the chunk is
+        written, so that the registries and the destination worksheets
+        agree.
+        """
+        first_row_idx = content_ws.min_row
+        checkpoint = content_ws.checkpoint
+        if checkpoint is not None:
+            # Continue after the last checkpointed row.
+            first_row_idx = checkpoint.resume_row_idx(
+                content_ws.cliprt_ws_name,
+                first_row_idx
+                )
+        progress_threshold = max(
+            int(content_ws.max_row / content_ws.PROGRESS_INCREMENT),
+            1
+            )
+
+        chunks = queue.Queue(self.queue_size)
+        stop_reading = threading.Event()
+        reader = threading.Thread(
+            target=self.queue_chunks,
+            args=(content_ws, first_row_idx + 1, chunks, stop_reading),
+            name='cliprt_chunk_reader',
+            daemon=True
+            )
+        reader.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if self.process_chunk(
+                        content_ws,
+                        chunk,
+                        progress_threshold,
+                        progress_reporting_is_disabled
+                    ):
+                    checkpoint.save(content_ws.cliprt_ws_name, chunk[-1][0])
+        finally:
+            # Unblock the reader if the pipeline stopped early.
+            stop_reading.set()
+            while reader.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        if not progress_reporting_is_disabled:
+            # Output a new line to finish up the progress report.
+            print()
+        return True
+
+    @staticmethod
+    def report_progress(
+            content_ws,
+            row_idx,
+            progress_threshold,
+            progress_reporting_is_disabled
+        ):
+        """
+        Update the progress report indicator and the progress listener
+        every progress_threshold rows.
+        """
+        if not progress_reporting_is_disabled and\
+                row_idx % progress_threshold == 0:
+            print('x', end='')
+        if content_ws.progress_listener is not None and\
+                (row_idx % progress_threshold == 0 or row_idx == content_ws.max_row):
+            content_ws.progress_listener(
+                content_ws.cliprt_ws_name,
+                row_idx - content_ws.min_row,
+                content_ws.max_row - content_ws.min_row
+                )
+        return True
@@ -20,6 +20,7 @@ class DataElement:
 
         # Class attributes.
         self.dest_de_format = None
+        self.dest_de_merge = None
         self.dest_de_name = None
         self.dest_ws_info = {}
         self.fragment_idx = None
@@ -60,6 +61,12 @@ class DataElement:
                 self.dest_de_format
                 )
             i += 1
+        if self.dest_de_merge is not None:
+            str_val[i] = self.util_format_dict_output(
+                'dest_de_merge',
+                self.dest_de_merge
+                )
+            i += 1
         for dest_ws_ind, dest_info in self.dest_ws_info.items():
             str_val[i] = self.util_format_dict_output(
                 dest_ws_ind,
@@ -135,6 +142,13 @@ class DataElement:
         """
         self.dest_de_format = de_format
 
+    def set_dest_de_merge(self, de_merge):
+        """
+        The destination data element merge policy determines how the
+        values of a client are merged into the spreadsheet cell.
+        """
+        self.dest_de_merge = de_merge
+
     def set_to_fragment(self, fragment_idx):
         """
         Note that a data element is either content or a fragment.  It
@@ -1,13 +1,14 @@
 #!/usr/bin/env python
 #pylint: disable=too-many-instance-attributes
+#pylint: disable=too-many-public-methods
 """
 Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from cliprt.classes.cliprt_settings import CliprtSettings
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 from cliprt.classes.data_element import DataElement
-from cliprt.classes.message_registry import MessageRegistry
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
 
 class DataElementDictionaryProcessor:
     """
@@ -22,14 +23,43 @@ class DataElementDictionaryProcessor:
         self.dest_ws_reg = dest_ws_registry
 
         # Class attributes.
-        self.settings = CliprtSettings()
+        self.settings = CLIPRT_SETTINGS
         self.de_fragments_list = {}
         self.ded = {}
         self.ded_hydrated = False
-        self.cliprt = MessageRegistry()
+        self.cliprt = MESSAGE_REGISTRY
         self.cliprt_wb = cliprt_wb
         self.cliprt_ws = cliprt_ws
 
+    def compiled_ded(self):
+        """
+        The hydrated DED in a form that can be reused for another
+        workbook with the same DED worksheet: the data elements, the
+        fragments and the destination worksheet column layouts.
+        """
+        if not self.ded_is_hydrated():
+            self.hydrate_ded()
+        dest_ws_layouts = {}
+        for ws_ind, dest_ws in self.dest_ws_reg.dest_ws_by_ind_list.items():
+            dest_ws_layouts[ws_ind] = dict(dest_ws.dest_de_list)
+        return {
+            'ded': dict(self.ded),
+            'de_fragments_list': dict(self.de_fragments_list),
+            'dest_ws_layouts': dest_ws_layouts,
+            }
+
+    def ded_content_hash(self):
+        """
+        Hash the contents of the DED worksheet.  Workbooks with the same
+        DED worksheet contents have the same compiled DED.
+        """
+        # Imported on first use to keep the startup fast.
+        import hashlib #pylint: disable=import-outside-toplevel
+        ded_hash = hashlib.sha256()
+        for row in self.cliprt_ws.iter_rows(values_only=True):
+            ded_hash.update(repr(row).encode('utf8'))
+        return ded_hash.hexdigest()
+
     def ded_is_hydrated(self):
         """
         Indicsate whether or not the DED is hydrated.
@@ -86,6 +116,7 @@ class DataElementDictionaryProcessor:
         self.hydrate_ded_by_de(col_headings)
         self.hydrate_ded_by_dest_de(col_headings)
         self.hydrate_ded_by_dest_de_format(col_headings)
+        self.hydrate_ded_by_dest_de_merge(col_headings)
         self.hydrate_ded_by_de_type(col_headings)
         self.hydration_validation()
 
@@ -93,6 +124,23 @@ class DataElementDictionaryProcessor:
         self.ded_hydrated = True
         return True
 
+    def hydrate_ded_from_compiled(self, compiled_ded):
+        """
+        Hydrate the DED from a compiled DED rather than from the DED
+        worksheet.  The data elements are not changed once hydrated, so
+        they are shared rather than copied.  The destination worksheets
+        are created with the same column layouts.
+        """
+        self.ded = dict(compiled_ded['ded'])
+        self.de_fragments_list = dict(compiled_ded['de_fragments_list'])
+        for ws_ind, dest_de_list in compiled_ded['dest_ws_layouts'].items():
+            self.dest_ws_reg.add_ws(self.cliprt_wb, ws_ind)
+            for de_name, col_idx in dest_de_list.items():
+                self.dest_ws_reg.get_next_col_idx(ws_ind)
+                self.dest_ws_reg.add_de_name(ws_ind, de_name, col_idx)
+        self.ded_hydrated = True
+        return True
+
     def hydrate_ded_by_de(self, col_headings):
         """
         Data Element - specifies the data element name.
@@ -209,6 +257,50 @@ class DataElementDictionaryProcessor:
             if not dest_de_format is None:
                 self.process_dest_de_format(de_name, dest_de_format)
 
+    def hydrate_ded_by_dest_de_merge(self, col_headings):
+        """
+        DE Merge - optional column:
+            1. all-unique, earliest-date, first-seen, last-seen,
+                latest-date, longest, most-frequent: how the values of
+                a client are merged into a single report destination
+                value.  All unique values are kept by default.
+        """
+        if self.settings.dest_de_merge_col_heading not in col_headings:
+            return False
+
+        # Get the DED worksheet column of destination data element
+        # merge policies.
+        col_idx = col_headings[self.settings.dest_de_merge_col_heading]
+        ws_columns = self.cliprt_ws.iter_cols(
+            min_col=col_idx,
+            max_col=col_idx,
+            min_row=self.cliprt_ws.min_row+1)
+        de_column = list(ws_columns)[0]
+
+        # From each row get the destination data element merge policy
+        # and save to the DED.
+        for de_merge_cell in de_column:
+            if de_merge_cell.value is None:
+                continue
+
+            de_name_col_idx = col_headings[
+                self.settings.col_headings[self.settings.de_name_col_idx]
+                ]
+            de_cell = self.cliprt_ws.cell(
+                row=de_merge_cell.row,
+                column=de_name_col_idx)
+            if de_cell.value is None:
+                raise Exception(
+                    self.cliprt.msg(3150).format(self.cliprt_ws.title, de_cell.coordinate)
+                    )
+            de_name = self.settings.str_normalize(de_cell.value)
+
+            # Accept "first seen" and "first_seen" for "first-seen".
+            dest_de_merge = self.settings.str_normalize(de_merge_cell.value)\
+                .strip().replace(' ', '-')
+            self.process_dest_de_merge(de_name, dest_de_merge)
+        return True
+
     def hydrate_ded_by_de_type(self, col_headings):
         """
         DE Type - includes the following, which are mutually exclusive:
@@ -260,60 +352,81 @@ class DataElementDictionaryProcessor:
             if data_element.is_identifier:
                 identifier_cnt += 1
 
-            if not data_element.dest_de_name is None and\
-                    ',' in data_element.dest_de_name:
-                raise Exception(self.cliprt.msg(3170).format(
-                    de_name,
-                    data_element.dest_de_name
-                    ))
-
-            if data_element.has_dest_ws() and\
-                    not data_element.dest_de_name is None:
-                raise Exception(self.cliprt.msg(3204).format(de_name))
+            self.validate_data_element(de_name, data_element)
 
-            if not data_element.dest_de_name is None and\
-                    not data_element.dest_de_name in self.ded:
-                raise Exception(self.cliprt.msg(3207).format(
-                    data_element.dest_de_name
-                    ))
-
-            if data_element.is_fragment and\
-                    not data_element.dest_de_name is None and\
-                    self.ded[data_element.dest_de_name].is_remapped:
-                raise Exception(self.cliprt.msg(3212).format(
-                    data_element.dest_de_name,
-                    de_name
-                    ))
-
-            if data_element.is_fragment and\
-                    data_element.dest_de_name is None:
-                raise Exception(self.cliprt.msg(3214).format(de_name))
-
-            if data_element.is_fragment and\
-                    data_element.dest_de_name is None:
-                raise Exception(self.cliprt.msg(3216).format(de_name))
-
-            if data_element.is_identifier and\
-                    not data_element.dest_de_name is None:
-                raise Exception(self.cliprt.msg(3226).format(
-                    data_element.dest_de_name,
-                    de_name
-                    ))
+        if identifier_cnt == 0:
+            raise Exception(self.cliprt.msg(3229))
 
-            if not data_element.has_dest_ws() and\
-                    data_element.dest_de_name is None:
-                raise Exception(self.cliprt.msg(3232).format(de_name))
+        return True
 
-            # Dest_de must reference a DE with a defined dest_ws
-            if not data_element.dest_de_name is None and\
-                    not self.ded[data_element.dest_de_name].has_dest_ws():
-                raise Exception(self.cliprt.msg(3238).format(
-                    data_element.dest_de_name,
-                    de_name
-                    ))
+    def validate_data_element(self, de_name, data_element):
+        """
+        Validate the configuration of a DED element.
+        """
+        if not data_element.dest_de_name is None and\
+                ',' in data_element.dest_de_name:
+            raise Exception(self.cliprt.msg(3170).format(
+                de_name,
+                data_element.dest_de_name
+                ))
+
+        if data_element.has_dest_ws() and\
+                not data_element.dest_de_name is None:
+            raise Exception(self.cliprt.msg(3204).format(de_name))
+
+        if not data_element.dest_de_name is None and\
+                not data_element.dest_de_name in self.ded:
+            raise Exception(self.cliprt.msg(3207).format(
+                data_element.dest_de_name
+                ))
+
+        if data_element.is_fragment and\
+                not data_element.dest_de_name is None and\
+                self.ded[data_element.dest_de_name].is_remapped:
+            raise Exception(self.cliprt.msg(3212).format(
+                data_element.dest_de_name,
+                de_name
+                ))
+
+        if data_element.is_fragment and\
+                data_element.dest_de_name is None:
+            raise Exception(self.cliprt.msg(3214).format(de_name))
+
+        if data_element.is_fragment and\
+                data_element.dest_de_name is None:
+            raise Exception(self.cliprt.msg(3216).format(de_name))
+
+        if data_element.is_identifier and\
+                not data_element.dest_de_name is None:
+            raise Exception(self.cliprt.msg(3226).format(
+                data_element.dest_de_name,
+                de_name
+                ))
+
+        if not data_element.has_dest_ws() and\
+                data_element.dest_de_name is None:
+            raise Exception(self.cliprt.msg(3232).format(de_name))
+
+        if not data_element.dest_de_merge is None and\
+                not data_element.has_dest_ws():
+            raise Exception(self.cliprt.msg(3239).format(de_name))
+
+        # The dates of a date merge policy must be formatted as dates.
+        if data_element.dest_de_merge in self.settings.date_de_merges and\
+                data_element.dest_de_format != self.settings.date_format:
+            raise Exception(self.cliprt.msg(3240).format(
+                data_element.dest_de_merge,
+                de_name,
+                self.settings.date_format
+                ))
 
-        if identifier_cnt == 0:
-            raise Exception(self.cliprt.msg(3229))
+        # Dest_de must reference a DE with a defined dest_ws
+        if not data_element.dest_de_name is None and\
+                not self.ded[data_element.dest_de_name].has_dest_ws():
+            raise Exception(self.cliprt.msg(3238).format(
+                data_element.dest_de_name,
+                de_name
+                ))
 
         return True
 
@@ -383,6 +496,25 @@ class DataElementDictionaryProcessor:
         self.ded[de_name].set_dest_de_format(dest_de_format)
         return True
 
+    def process_dest_de_merge(self, de_name, dest_de_merge):
+        """
+        Process the destination data element merge policy and update
+        the data element instance accordingly.  The merge policy is
+        validated against the rest of the data element once the DED is
+        hydrated.
+        """
+        # Validate the destination data element merge policy.
+        if not dest_de_merge in self.settings.valid_de_merges:
+            # Fatal error, invalid merge policy
+            raise Exception(self.cliprt.msg(3219).format(
+                dest_de_merge,
+                de_name,
+                self.settings.valid_de_merges))
+
+        # Save the merge policy to the DED.
+        self.ded[de_name].set_dest_de_merge(dest_de_merge)
+        return True
+
     def process_de_type(self, de_name, de_type):
         """
         Process the destination data element type destination and update
@@ -11,6 +11,10 @@ class DataElementFragmentsAssembler:
     is available.  For example, the "name" data element might need to be
     assembled from the "first name" and "last name" data elements.  The
     order of the fragments is needed for a correct assembly.
+
+    Once all of the fragment columns are known, the fragment plan lists
+    the columns in fragment order, so that each row is assembled in a
+    single pass.
     """
 
     def __init__(self, de_name):
@@ -19,6 +23,7 @@ class DataElementFragmentsAssembler:
         """
         # Class attributes.
         self.assembled_de_name = de_name
+        self.fragment_plan = []
         self.fragments_col_indicies = {}
         self.fragments_values = {}
 
@@ -46,11 +51,34 @@ class DataElementFragmentsAssembler:
         """
         self.fragments_values[fragment_idx] = fragment_value
 
+    @staticmethod
+    def assemble(fragment_values):
+        """
+        Assemble the value of the data element from the fragment values,
+        in fragment order.  Empty fragments are blank.
+        """
+        return ' '.join(
+            '' if fragment_value is None else str(fragment_value)
+            for fragment_value in fragment_values
+            ).strip()
+
     def assembled_value(self):
         """
         Assemble the value of the data element.
         """
-        ret_value = ''
-        for i in sorted(self.fragments_values):
-            ret_value += f' {self.fragments_values[i]}'
-        return ret_value.strip()
+        return self.assemble(
+            self.fragments_values[i] for i in sorted(self.fragments_values)
+            )
+
+    def compile_plan(self, ded):
+        """
+        List the fragment columns in fragment order.  If two fragments
+        have the same fragment index the last one is used.
+        """
+        fragment_cols = {}
+        for fragment_name, col_idx in self.fragments_col_indicies.items():
+            fragment_cols[ded[fragment_name].fragment_idx] = col_idx
+        self.fragment_plan = [
+            fragment_cols[fragment_idx] for fragment_idx in sorted(fragment_cols)
+            ]
+        return self.fragment_plan
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import math
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.in_memory_workbook import InMemoryWorkbook
+
+class DataFrameWorkbook(InMemoryWorkbook):
+    """
+    An in-memory workbook of pandas DataFrames, so that sources that are
+    already DataFrames do not need to be written to a workbook file
+    first.  openpyxl is not used.
+    """
+    def __init__(self, sources, ded):
+        """
+        The sources map the content worksheet names to DataFrames.  The
+        DED is a DataFrame with the DED column headings, or a dict of
+        the DED column headings to the column values.  Only the source
+        columns that are in the DED are kept.
+        """
+        super().__init__()
+        if not isinstance(ded, dict):
+            ded = self.data_frame_values(ded).to_dict('list')
+        ded_rows = [
+            [None if self.is_missing(value) else value for value in row]
+            for row in zip(*ded.values())
+            ]
+        self.create_sheet(
+            ClientInformationWorkbook.DED_WS_NAME,
+            rows=[list(ded)] + ded_rows
+            )
+
+        # Project the sources onto the DED.
+        de_names = {
+            CLIPRT_SETTINGS.str_normalize(de_name)
+            for de_name in ded[CLIPRT_SETTINGS.col_headings[CLIPRT_SETTINGS.de_name_col_idx]]
+            if isinstance(de_name, str)
+            }
+        for ws_name, data_frame in sources.items():
+            data_frame = data_frame[[
+                col_name for col_name in data_frame.columns
+                if CLIPRT_SETTINGS.str_normalize(str(col_name)) in de_names
+                ]]
+            self.create_sheet(
+                ws_name,
+                rows=[list(data_frame.columns)]\
+                    + list(self.data_frame_values(data_frame).itertuples(index=False, name=None))
+                )
+
+    @staticmethod
+    def data_frame_values(data_frame):
+        """
+        The DataFrame with Python values, and None for missing values,
+        as read from a workbook.
+        """
+        data_frame = data_frame.astype(object)
+        return data_frame.where(data_frame.notna(), None)
+
+    @staticmethod
+    def is_missing(value):
+        """
+        Whether or not a DED value is missing: None, or a NaN from a
+        numeric column.
+        """
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    def report_data_frames(self, dest_ws_reg):
+        """
+        The client reports as pandas DataFrames, by destination
+        worksheet name.  The columns keep the values as they are in the
+        report worksheets, with None for the empty cells.
+        """
+        # Imported on first use to keep the startup fast.
+        import pandas #pylint: disable=import-outside-toplevel,import-error
+        report_data_frames = {}
+        for dest_ws in dest_ws_reg.dest_ws_by_ind_list.values():
+            # Sharded reports are put back together; shard files are
+            # not read.
+            ws_names = dest_ws.shard_ws_names or [dest_ws.cliprt_ws_name]
+            if ws_names[0] not in self:
+                continue
+            rows = list(self[ws_names[0]].values)
+            for ws_name in ws_names[1:]:
+                rows.extend(list(self[ws_name].values)[1:])
+            report_data_frames[dest_ws.cliprt_ws_name] =\
+                pandas.DataFrame(rows[1:], columns=rows[0], dtype=object)
+        return report_data_frames
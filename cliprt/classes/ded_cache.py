@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import threading
+from collections import OrderedDict
+
+class DedCache:
+    """
+    Least recently used cache of compiled DEDs, keyed by the content
+    hash of the DED worksheet.  Workbooks that are submitted again, or
+    that share a DED worksheet, skip the DED hydration.  The cache may
+    be shared by threads, so access is serialized.
+    """
+    def __init__(self, max_size=32):
+        """
+        Create an empty cache that holds up to max_size compiled DEDs.
+        """
+        # Class attributes.
+        self.compiled_deds = OrderedDict()
+        self.hits = 0
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Number of cached compiled DEDs.
+        """
+        return len(self.compiled_deds)
+
+    def get(self, ded_hash):
+        """
+        Return the compiled DED, or None if it is not cached.
+        """
+        with self.lock:
+            if ded_hash not in self.compiled_deds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.compiled_deds.move_to_end(ded_hash)
+            return self.compiled_deds[ded_hash]
+
+    def put(self, ded_hash, compiled_ded):
+        """
+        Cache a compiled DED.  The least recently used compiled DED is
+        evicted when the cache is full.
+        """
+        with self.lock:
+            self.compiled_deds[ded_hash] = compiled_ded
+            self.compiled_deds.move_to_end(ded_hash)
+            while len(self.compiled_deds) > self.max_size:
+                self.compiled_deds.popitem(last=False)
+        return True
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import logging
+
+class DeferredQueueHandler(logging.Handler):
+    """
+    Queue the log records as they are.  The standard queue handler
+    formats each record before queueing it, which would put the
+    formatting back on the hot path.
+    """
+    def __init__(self, log_queue):
+        """
+        Queue the records for the queue listener.
+        """
+        super().__init__()
+
+        # Class attributes.
+        self.log_queue = log_queue
+
+    def emit(self, record):
+        """
+        Queue the record.
+        """
+        self.log_queue.put_nowait(self.prepare(record))
+
+    @staticmethod
+    def prepare(record):
+        """
+        The records never leave the process, so there is no need to
+        format them before they are queued.
+        """
+        return record
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import heapq
+import json
+import os
+import sqlite3
+import tempfile
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class DestinationRowBuffer:
+    """
+    Destination worksheet rows kept in memory up to a memory budget,
+    rather than in the worksheets.  Once the budget is exceeded the
+    least recently updated rows spill to a temporary SQLite table, and
+    are read back when they are updated again.  The rows of each
+    destination worksheet are read in row order by a streaming merge of
+    the rows in memory with the spilled rows.  The memory needed by the
+    client rows, and by the merge counts of their cells, is bounded by
+    the budget while the client identities are resolved and while the
+    rows are streamed to the workbook file as it is saved.
+    """
+    # Estimated memory, in bytes, of a row and of a cell on top of the
+    # length of the cell value.
+    ROW_OVERHEAD = 120
+    CELL_OVERHEAD = 60
+
+    def __init__(self, memory_budget=None, spill_dir=None):
+        """
+        Keep up to memory_budget bytes of rows in memory.  The spilled
+        rows are kept in spill_dir, or the system temporary directory.
+        """
+        # Class attributes.
+        self.memory_budget = CLIPRT_SETTINGS.destination_memory_budget\
+            if memory_budget is None else memory_budget
+        self.memory_used = 0
+        self.rows = {}
+        self.spill_cnt = 0
+        self.spill_db = None
+        self.spill_dir = spill_dir
+        self.spill_filename = None
+
+    def close(self):
+        """
+        Discard the rows and remove the spill file.
+        """
+        self.memory_used = 0
+        self.rows = {}
+        if self.spill_db is not None:
+            self.spill_db.close()
+            self.spill_db = None
+            os.remove(self.spill_filename)
+        return True
+
+    def discard(self, ws_ind):
+        """
+        Discard the rows of a destination worksheet.
+        """
+        for key in [key for key in self.rows if key[0] == ws_ind]:
+            self.memory_used -= self.row_size(self.rows.pop(key))
+        if self.spill_db is not None:
+            self.spill_db.execute('DELETE FROM dest_rows WHERE ws_ind = ?', (ws_ind,))
+        return True
+
+    def get_row(self, ws_ind, row_idx):
+        """
+        The values of a row, which is now the most recently used row.
+        Spilled rows are read back into memory.
+        """
+        key = (ws_ind, row_idx)
+        row = self.rows.pop(key, None)
+        if row is None:
+            row = []
+            self.memory_used += self.ROW_OVERHEAD
+            if self.spill_db is not None:
+                spilled_row = self.spill_db.execute(
+                    'SELECT row_values FROM dest_rows WHERE ws_ind = ? AND row_idx = ?',
+                    key
+                    ).fetchone()
+                if spilled_row is not None:
+                    self.spill_db.execute(
+                        'DELETE FROM dest_rows WHERE ws_ind = ? AND row_idx = ?',
+                        key
+                        )
+                    row = json.loads(spilled_row[0])
+                    self.memory_used += self.row_size(row) - self.ROW_OVERHEAD
+        self.rows[key] = row
+        return row
+
+    def get_value(self, ws_ind, row_idx, col_idx):
+        """
+        The value of a cell.
+        """
+        row = self.get_row(ws_ind, row_idx)
+        return row[col_idx - 1] if col_idx <= len(row) else None
+
+    def iter_rows(self, ws_ind, min_row_idx=0):
+        """
+        The row indices and values of the rows of a destination
+        worksheet, from min_row_idx on, in row order.
+        """
+        memory_rows = sorted(
+            (key[1], row) for key, row in self.rows.items()
+            if key[0] == ws_ind and key[1] >= min_row_idx
+            )
+        if self.spill_db is None:
+            return iter(memory_rows)
+        spilled_rows = (
+            (row_idx, json.loads(row_values))
+            for row_idx, row_values in self.spill_db.execute(
+                'SELECT row_idx, row_values FROM dest_rows '
+                'WHERE ws_ind = ? AND row_idx >= ? ORDER BY row_idx',
+                (ws_ind, min_row_idx)
+                )
+            )
+        return heapq.merge(memory_rows, spilled_rows, key=lambda row: row[0])
+
+    def row_size(self, row):
+        """
+        The estimated memory of a row.
+        """
+        return self.ROW_OVERHEAD + sum(self.value_size(value) for value in row)
+
+    def set_value(self, ws_ind, row_idx, col_idx, value):
+        """
+        Set the value of a cell.  Rows are spilled once the memory
+        budget is exceeded.
+        """
+        row = self.get_row(ws_ind, row_idx)
+        if len(row) < col_idx:
+            self.memory_used += self.CELL_OVERHEAD * (col_idx - len(row))
+            row.extend([None] * (col_idx - len(row)))
+        size_change = self.value_size(value) - self.value_size(row[col_idx - 1])
+        row[col_idx - 1] = value
+        self.memory_used += size_change
+        if self.memory_used > self.memory_budget:
+            self.spill()
+        return True
+
+    def spill(self):
+        """
+        Move the least recently used rows to the spill file until half
+        of the memory budget is used, so that spills are not repeated
+        for every update.
+        """
+        if self.spill_db is None:
+            spill_fd, self.spill_filename = tempfile.mkstemp(
+                prefix='cliprt_spill_',
+                suffix='.sqlite',
+                dir=self.spill_dir
+                )
+            os.close(spill_fd)
+            self.spill_db = sqlite3.connect(self.spill_filename)
+            self.spill_db.execute('PRAGMA journal_mode = OFF')
+            self.spill_db.execute('PRAGMA synchronous = OFF')
+            self.spill_db.execute(
+                'CREATE TABLE dest_rows ('
+                'ws_ind TEXT, row_idx INTEGER, row_values TEXT, '
+                'PRIMARY KEY (ws_ind, row_idx))'
+                )
+        spilled_rows = []
+        for (ws_ind, row_idx), row in self.rows.items():
+            if self.memory_used <= self.memory_budget // 2 or\
+                    len(spilled_rows) == len(self.rows) - 1:
+                # Keep the most recently used row.
+                break
+            spilled_rows.append((ws_ind, row_idx, json.dumps(row, default=str)))
+            self.memory_used -= self.row_size(row)
+        for ws_ind, row_idx, _ in spilled_rows:
+            del self.rows[(ws_ind, row_idx)]
+        self.spill_db.executemany('INSERT INTO dest_rows VALUES (?, ?, ?)', spilled_rows)
+        self.spill_cnt += len(spilled_rows)
+        CLIPRT_LOGGER.debug(6100, len(spilled_rows), self.spill_filename)
+        return len(spilled_rows)
+
+    def value_size(self, value):
+        """
+        The estimated memory of a cell value: a string, or the counts of
+        the values of a cell, by value.
+        """
+        if isinstance(value, str):
+            return self.CELL_OVERHEAD + len(value)
+        if isinstance(value, dict):
+            return self.CELL_OVERHEAD + sum(
+                self.CELL_OVERHEAD + len(value_key) for value_key in value
+                )
+        return self.CELL_OVERHEAD
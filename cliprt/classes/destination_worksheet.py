@@ -1,11 +1,13 @@
 #!/usr/bin/env python
-#pylint: disable=too-many-instance-attributes
+#pylint: disable=too-many-instance-attributes,too-many-public-methods
 """
 Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from cliprt.classes.cliprt_settings import CliprtSettings
+import datetime
+import itertools
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 
 class DestinationWorksheet:
     """
@@ -15,6 +17,18 @@ class DestinationWorksheet:
     """
     dest_ws_name_prefix = 'comm_report_for_'
 
+    # The row buffer keeps the merge counts of the cells of a client
+    # row as a row of their own, under the worksheet indicator with this
+    # suffix.
+    merge_counts_suffix = ':merge_counts'
+
+    # The cell data formatters, by data format.
+    formatters = {
+        CLIPRT_SETTINGS.date_format: CLIPRT_SETTINGS.format_date,
+        CLIPRT_SETTINGS.name_format: CLIPRT_SETTINGS.format_name,
+        CLIPRT_SETTINGS.phone_format: CLIPRT_SETTINGS.format_phone,
+        }
+
     def __init__(self, cliprt_wb, ws_ind):
         """
         Start a new destination worksheet, or reset an existing one
@@ -22,14 +36,20 @@ class DestinationWorksheet:
         request.
         """
         # Class attributes.
-        self.ded_settings = CliprtSettings()
+        self.cliprt_wb = cliprt_wb
+        self.ded_settings = CLIPRT_SETTINGS
         self.dest_de_list = {}
         self.dest_ind = ws_ind
         self.first_row_idx = 1
+        self.merge_counts = {}
+        self.merge_counts_ind = ws_ind + self.merge_counts_suffix
         self.next_col_idx = 1
         self.next_row_idx = 2
+        self.row_buffer = None
         self.cliprt_ws = None
         self.cliprt_ws_name = self.dest_ws_name_prefix + ws_ind
+        self.shard_size = None
+        self.shard_ws_names = []
 
         if not self.cliprt_ws_name in cliprt_wb.sheetnames:
             self.cliprt_ws = cliprt_wb.create_sheet(title=self.cliprt_ws_name)
@@ -45,6 +65,59 @@ class DestinationWorksheet:
         self.dest_de_list[de_name] = col_idx
         self.cliprt_ws.cell(self.first_row_idx, col_idx, value=de_name)
 
+    def export_state(self):
+        """
+        Compact state of the report for checkpoints: the next row, the
+        values of the client rows and the merge counts of their cells.
+        """
+        if self.row_buffer is None:
+            merge_counts = list(self.merge_counts.items())
+        else:
+            merge_counts = [
+                ((row_idx, col_idx), cell_merge_counts)
+                for row_idx, row in self.row_buffer.iter_rows(self.merge_counts_ind)
+                for col_idx, cell_merge_counts in enumerate(row, start=1)
+                if cell_merge_counts is not None
+                ]
+        return {
+            'next_row_idx': self.next_row_idx,
+            'rows': list(self.iter_rows()),
+            'merge_counts': [
+                [row_idx, col_idx, cell_merge_counts]
+                for (row_idx, col_idx), cell_merge_counts in merge_counts
+                ],
+            }
+
+    def flush(self):
+        """
+        Write the buffered rows to the worksheet, in row order.  The
+        worksheet holds the rows from then on.
+        """
+        if self.row_buffer is None:
+            return False
+        for row_idx, row in self.row_buffer.iter_rows(self.dest_ind):
+            for col_idx, cell_value in enumerate(row, start=1):
+                if cell_value is not None:
+                    self.cliprt_ws.cell(row_idx, col_idx, value=cell_value)
+        for row_idx, row in self.row_buffer.iter_rows(self.merge_counts_ind):
+            for col_idx, cell_merge_counts in enumerate(row, start=1):
+                if cell_merge_counts is not None:
+                    self.merge_counts[(row_idx, col_idx)] = cell_merge_counts
+        self.row_buffer.discard(self.dest_ind)
+        self.row_buffer.discard(self.merge_counts_ind)
+        self.row_buffer = None
+        return True
+
+    def get_merge_counts(self, row_idx, col_idx):
+        """
+        The merge counts of a cell, by value, or None.  Cells of buffered
+        rows keep their merge counts in the row buffer, within its memory
+        budget.
+        """
+        if self.row_buffer is None:
+            return self.merge_counts.get((row_idx, col_idx))
+        return self.row_buffer.get_value(self.merge_counts_ind, row_idx, col_idx)
+
     def get_next_col_idx(self):
         """
         Continue adding each client's information to a new row in the
@@ -63,48 +136,225 @@ class DestinationWorksheet:
         self.next_row_idx += 1
         return next_row_idx
 
+    def import_state(self, state):
+        """
+        Restore the report from a checkpoint.
+        """
+        row_idx = self.first_row_idx + 1
+        for row in state['rows']:
+            for col_idx, cell_value in enumerate(row, start=1):
+                if cell_value is not None:
+                    self.write_cell(row_idx, col_idx, cell_value)
+            row_idx += 1
+        self.next_row_idx = state['next_row_idx']
+        for row_idx, col_idx, merge_counts in state.get('merge_counts', []):
+            self.set_merge_counts(row_idx, col_idx, merge_counts)
+        return True
+
+    def iter_rows(self, min_row_idx=None, max_row_idx=None):
+        """
+        The values of the client rows from min_row_idx to max_row_idx,
+        all of them by default, in row order, with a value or None for
+        each column.  Buffered rows are read from the row buffer rather
+        than copied to the worksheet.
+        """
+        min_row_idx = self.first_row_idx + 1 if min_row_idx is None else min_row_idx
+        max_row_idx = self.next_row_idx - 1 if max_row_idx is None else max_row_idx
+        col_cnt = max(self.next_col_idx - 1, 1)
+        if self.row_buffer is None:
+            for row in self.cliprt_ws.iter_rows(
+                    min_row=min_row_idx,
+                    max_row=max_row_idx,
+                    max_col=col_cnt,
+                    values_only=True
+                ):
+                yield list(row)
+            return
+        next_row_idx = min_row_idx
+        for row_idx, row in self.row_buffer.iter_rows(self.dest_ind, min_row_idx):
+            if row_idx > max_row_idx:
+                break
+            for _ in range(row_idx - next_row_idx):
+                yield [None] * col_cnt
+            yield row + [None] * (col_cnt - len(row))
+            next_row_idx = row_idx + 1
+        for _ in range(max_row_idx + 1 - next_row_idx):
+            yield [None] * col_cnt
+
+    def remove_shard_worksheets(self, dest_ws_names):
+        """
+        Remove the shard worksheets of the report that have been left
+        behind from a previous report creation request.
+        """
+        shard_ws_name_prefix = self.cliprt_ws_name + '_'
+        for ws_name in self.cliprt_wb.sheetnames:
+            if ws_name.startswith(shard_ws_name_prefix)\
+                    and ws_name[len(shard_ws_name_prefix):].isdigit()\
+                    and ws_name not in dest_ws_names:
+                self.cliprt_wb.remove(self.cliprt_wb[ws_name])
+
     def reset(self):
         """
         Delete all rows to make room for a new report.
         """
         row_cnt = self.cliprt_ws.max_row - self.cliprt_ws.min_row + 1
         self.cliprt_ws.delete_rows(self.cliprt_ws.min_row, amount=row_cnt)
+        self.merge_counts = {}
+        if self.row_buffer is not None:
+            self.row_buffer.discard(self.dest_ind)
+            self.row_buffer.discard(self.merge_counts_ind)
+
+    def report_rows(self, shard_no=None):
+        """
+        The number of rows and the rows, column headings first, of the
+        report or of one of its shards, for streaming the buffered rows
+        to the workbook file.
+        """
+        min_row_idx = self.first_row_idx + 1
+        max_row_idx = self.next_row_idx - 1
+        if shard_no is not None:
+            min_row_idx += (shard_no - 1) * self.shard_size
+            max_row_idx = min(min_row_idx + self.shard_size - 1, max_row_idx)
+        headings = next(self.cliprt_ws.iter_rows(
+            min_row=self.first_row_idx,
+            max_row=self.first_row_idx,
+            max_col=max(self.next_col_idx - 1, 1),
+            values_only=True
+            ))
+        return max_row_idx - min_row_idx + 2,\
+            itertools.chain([headings], self.iter_rows(min_row_idx, max_row_idx))
+
+    def row_cnt(self):
+        """
+        The number of client rows in the report.
+        """
+        return self.next_row_idx - self.first_row_idx - 1
+
+    def set_merge_counts(self, row_idx, col_idx, merge_counts):
+        """
+        Set the merge counts of a cell.
+        """
+        if self.row_buffer is None:
+            self.merge_counts[(row_idx, col_idx)] = merge_counts
+        else:
+            self.row_buffer.set_value(self.merge_counts_ind, row_idx, col_idx, merge_counts)
+
+    def shard_ws_name(self, shard_no):
+        """
+        The name of a shard of the report.
+        """
+        return f'{self.cliprt_ws_name}_{shard_no}'
+
+    def date_key(self, date_value):
+        """
+        The date of a date value, for comparing dates.
+        """
+        return datetime.datetime.strptime(
+            self.ded_settings.format_date(date_value),
+            '%m/%d/%Y'
+            )
+
+    @classmethod
+    def format_value(cls, cell_data, data_format=None):
+        """
+        Format new cell data if a data format has been provided, or
+        otherwise as a string.  Date cells without a data format are
+        formatted as dates, and number cells as numbers, so that whole
+        numbers stored as floats lose the decimal point.
+        """
+        if data_format in cls.formatters:
+            return cls.formatters[data_format](cell_data)
+        if isinstance(cell_data, datetime.date):
+            return CLIPRT_SETTINGS.format_date(cell_data)
+        if isinstance(cell_data, (int, float)) and not isinstance(cell_data, bool):
+            return CLIPRT_SETTINGS.format_number(cell_data)
+        return str(cell_data)
+
+    def merge_most_frequent(self, row_idx, col_idx, cell_value, formatted_data):
+        """
+        Merge a new value into a destination cell value, keeping the
+        value seen most often.  The values are counted ignoring case,
+        and the first value to reach the highest count is kept.  Until
+        the counts are kept, the cell value is the first value, counted
+        once.
+        """
+        # A copy, so that the row buffer accounts for the new counts.
+        merge_counts = dict(
+            self.get_merge_counts(row_idx, col_idx) or {cell_value.lower(): 1}
+            )
+        value_key = formatted_data.lower()
+        merge_counts[value_key] = merge_counts.get(value_key, 0) + 1
+        self.set_merge_counts(row_idx, col_idx, merge_counts)
+        if merge_counts[value_key] > merge_counts.get(cell_value.lower(), 0):
+            return formatted_data
+        return cell_value
 
-    def update_cell(self, row_idx, col_idx, cell_data, data_format=None):
+    def merge_value(self, row_idx, col_idx, cell_value, formatted_data, merge_policy):
+        """
+        Merge a new value into a destination cell value according to the
+        merge policy.  Only the cell value, and for the most frequent
+        value the counts of the values seen, are kept for each cell.
+        """
+        if merge_policy == self.ded_settings.first_seen_merge:
+            return cell_value
+        if merge_policy == self.ded_settings.last_seen_merge:
+            return formatted_data
+        if merge_policy == self.ded_settings.longest_merge:
+            return formatted_data if len(formatted_data) > len(cell_value) else cell_value
+        if merge_policy == self.ded_settings.earliest_date_merge:
+            return formatted_data\
+                if self.date_key(formatted_data) < self.date_key(cell_value) else cell_value
+        if merge_policy == self.ded_settings.latest_date_merge:
+            return formatted_data\
+                if self.date_key(formatted_data) > self.date_key(cell_value) else cell_value
+        return self.merge_most_frequent(row_idx, col_idx, cell_value, formatted_data)
+
+    def update_cell(self, row_idx, col_idx, cell_data, data_format=None, merge_policy=None):
         """
         Determine if the destination cell already has a value in it add
-        the new value to the using a comma delimitor.
+        the new value to the using a comma delimitor, unless a merge
+        policy other than all-unique is provided.
         """
         if cell_data is None:
             # If there's no new data there's nothing to do.
             return True
 
-        # Format the new cell data if a data format has been provided.
-        if data_format == self.ded_settings.date_format:
-            formatted_data = self.ded_settings.format_date(cell_data)
-        elif data_format == self.ded_settings.name_format:
-            formatted_data = self.ded_settings.format_name(cell_data)
-        elif data_format == self.ded_settings.phone_format:
-            formatted_data = self.ded_settings.format_phone(cell_data)
-        else:
-            formatted_data = str(cell_data)
+        formatted_data = self.format_value(cell_data, data_format)
 
-        cell_value = self.cliprt_ws.cell(row_idx, col_idx).value
+        if self.row_buffer is None:
+            cell_value = self.cliprt_ws.cell(row_idx, col_idx).value
+        else:
+            cell_value = self.row_buffer.get_value(self.dest_ind, row_idx, col_idx)
         if cell_value is None:
             # Simply write the new cell data to an empty destination cell.
-            self.cliprt_ws.cell(row_idx, col_idx, value=formatted_data)
+            self.write_cell(row_idx, col_idx, formatted_data)
+        elif merge_policy not in (None, self.ded_settings.all_unique_merge):
+            merged_value = self.merge_value(
+                row_idx,
+                col_idx,
+                cell_value,
+                formatted_data,
+                merge_policy
+                )
+            if merged_value != cell_value:
+                self.write_cell(row_idx, col_idx, merged_value)
         elif formatted_data.lower() in cell_value.lower():
             # Don't save the same data twice.
             pass
         else:
             # Update the cell value.
-            self.cliprt_ws.cell(
-                row_idx,
-                col_idx,
-                value=f'{cell_value}, {formatted_data}'
-                )
+            self.write_cell(row_idx, col_idx, f'{cell_value}, {formatted_data}')
         return True
 
+    def write_cell(self, row_idx, col_idx, cell_value):
+        """
+        Write a cell of a client row, to the row buffer if there is one.
+        """
+        if self.row_buffer is None:
+            self.cliprt_ws.cell(row_idx, col_idx, value=cell_value)
+        else:
+            self.row_buffer.set_value(self.dest_ind, row_idx, col_idx, cell_value)
+
     def update_column_headings(self):
         """
         Update the columns heads based on the information provided by
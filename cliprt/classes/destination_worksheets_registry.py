@@ -5,6 +5,7 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
 from cliprt.classes.destination_worksheet import DestinationWorksheet
 
 class DestinationWorksheetsRegistry:
@@ -21,6 +22,7 @@ class DestinationWorksheetsRegistry:
         self.dest_ws_by_ind_list = {}
         self.dest_ws_list = {}
         self.dest_ws_names = []
+        self.row_buffer = None
 
     def add_de_name(self, ws_ind, de_name, col_idx):
         """
@@ -38,6 +40,7 @@ class DestinationWorksheetsRegistry:
             return
 
         self.dest_ws_by_ind_list[ws_ind] = DestinationWorksheet(cliprt_wb, ws_ind)
+        self.dest_ws_by_ind_list[ws_ind].row_buffer = self.row_buffer
         self.dest_ws_list[ws_ind] = self.dest_ws_by_ind_list[ws_ind].cliprt_ws_name
 
         # Update the list of destination worksheet names.
@@ -45,6 +48,58 @@ class DestinationWorksheetsRegistry:
         # data content worksheets.
         self.dest_ws_names.append(self.dest_ws_by_ind_list[ws_ind].cliprt_ws_name)
 
+    def close_row_buffer(self):
+        """
+        Discard the buffered client rows, once they are written, and
+        remove the spill file.
+        """
+        if self.row_buffer is None:
+            return False
+        for dest_ws in self.dest_ws_by_ind_list.values():
+            dest_ws.row_buffer = None
+        if self.row_buffer.spill_cnt:
+            CLIPRT_LOGGER.info(6101, self.row_buffer.spill_cnt, self.row_buffer.memory_budget)
+        self.row_buffer.close()
+        return True
+
+    def enable_row_buffer(self, row_buffer):
+        """
+        Keep the client rows of the destination worksheets in a memory
+        bounded row buffer until they are written to the worksheets, or
+        streamed to the workbook file.
+        """
+        self.row_buffer = row_buffer
+        for dest_ws in self.dest_ws_by_ind_list.values():
+            dest_ws.row_buffer = row_buffer
+        return row_buffer
+
+    def export_state(self):
+        """
+        Compact state of the destination worksheets for checkpoints.
+        """
+        return {
+            ws_ind: dest_ws.export_state()
+            for ws_ind, dest_ws in self.dest_ws_by_ind_list.items()
+            }
+
+    def flush(self):
+        """
+        Write the buffered client rows to the destination worksheets.
+        """
+        if self.row_buffer is None:
+            return False
+        for dest_ws in self.dest_ws_by_ind_list.values():
+            dest_ws.flush()
+        return self.close_row_buffer()
+
+    @staticmethod
+    def format_value(cell_data, data_format=None):
+        """
+        Format cell data as the destination worksheets do, so that the
+        values of a row can be formatted before any of them is written.
+        """
+        return DestinationWorksheet.format_value(cell_data, data_format)
+
     def get_next_col_idx(self, ws_ind):
         """
         Return the next available column index for the requested
@@ -52,6 +107,23 @@ class DestinationWorksheetsRegistry:
         """
         return self.dest_ws_by_ind_list[ws_ind].get_next_col_idx()
 
+    def import_state(self, state):
+        """
+        Restore the destination worksheets from a checkpoint.
+        """
+        for ws_ind, dest_ws_state in state.items():
+            self.dest_ws_by_ind_list[ws_ind].import_state(dest_ws_state)
+        return True
+
+    def max_row_cnt(self):
+        """
+        The number of client rows of the largest report.
+        """
+        return max(
+            (dest_ws.row_cnt() for dest_ws in self.dest_ws_by_ind_list.values()),
+            default=0
+            )
+
     def prep_worksheets(self):
         """
         Create or reset the destination worksheet in preparation for the
@@ -59,15 +131,46 @@ class DestinationWorksheetsRegistry:
         """
         for ws_ind_dest_ws in self.dest_ws_by_ind_list.items():
             dest_ws = ws_ind_dest_ws[1]
+            dest_ws.remove_shard_worksheets(self.dest_ws_names)
             dest_ws.update_column_headings()
+            # The rows of the previous round were flushed to the
+            # worksheet.
+            dest_ws.row_buffer = self.row_buffer
         #for ws_ind, dest_ws in self.dest_ws_by_ind_list.items():
         #    dest_ws.update_column_headings()
 
+    def report_rows(self):
+        """
+        The number of rows and the rows of each report worksheet, by
+        worksheet name, for streaming the buffered client rows to the
+        workbook file.
+        """
+        report_rows = {}
+        for dest_ws in self.dest_ws_by_ind_list.values():
+            if not dest_ws.shard_ws_names:
+                report_rows[dest_ws.cliprt_ws_name] = dest_ws.report_rows()
+            for shard_no, ws_name in enumerate(dest_ws.shard_ws_names, start=1):
+                report_rows[ws_name] = dest_ws.report_rows(shard_no)
+        return report_rows
+
+    def report_ws_names(self):
+        """
+        The names of the report worksheets, including the shards of
+        sharded reports.
+        """
+        return [
+            ws_name
+            for dest_ws in self.dest_ws_by_ind_list.values()
+            for ws_name in dest_ws.shard_ws_names or [dest_ws.cliprt_ws_name]
+            ]
+
     def update_dest_ws_cell(self,
                             dest_ws_ind,
                             row_idx, col_idx,
                             cell_data,
-                            data_format=None):
+                            *,
+                            data_format=None,
+                            merge_policy=None):
         """
         Update the specified cell in the specified destination worksheet.
         """
@@ -75,5 +178,6 @@ class DestinationWorksheetsRegistry:
             row_idx,
             col_idx,
             cell_data,
-            data_format
+            data_format,
+            merge_policy
             )
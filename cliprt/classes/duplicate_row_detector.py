@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import hashlib
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+
+class DuplicateRowDetector:
+    """
+    Recognize rows that repeat a row already processed, in the same
+    content worksheet or in another one.  Only the columns of the ETL
+    mappings are compared, by destination data element name, so a row
+    copied from one source to another is recognized even if the
+    columns are in a different order, are named differently but map to
+    the same destination data element, or the other source has columns
+    that are not reported.  Fragments are compared by fragment name.
+    A repeated row reuses the client identity of the first one and is
+    not processed again, since the values it would merge into the
+    destination worksheets are already there.
+    """
+    def __init__(self):
+        """
+        Start with no rows seen.
+        """
+        # Class attributes.
+        self.duplicate_cnts = {}
+        self.identities = {}
+        self.row_keys = set()
+
+    def check_row(self, ws_name, row_key):
+        """
+        Determine if the row was seen before and count it if so.  Rows
+        are only remembered once they are processed, see save_row().
+        """
+        if row_key in self.row_keys:
+            self.duplicate_cnts[ws_name] = self.duplicate_cnts.get(ws_name, 0) + 1
+            return True
+        return False
+
+    def export_state(self):
+        """
+        Compact state of the rows seen for checkpoints: the duplicate
+        counts and the client id of each row seen, None for rows without
+        a client.
+        """
+        return {
+            'duplicate_cnts': self.duplicate_cnts,
+            'row_clients': {
+                row_key.hex(): None if self.identities.get(row_key) is None\
+                    else self.identities[row_key].client_idno
+                for row_key in self.row_keys
+                },
+            }
+
+    def identity(self, row_key):
+        """
+        The client identity the first occurrence of the row was
+        resolved to, None if the row has no useful identifiers.
+        """
+        return self.identities.get(row_key)
+
+    def import_state(self, state, client_registry):
+        """
+        Restore the rows seen from a checkpoint.  The client registry
+        must be restored first.
+        """
+        self.duplicate_cnts = dict(state['duplicate_cnts'])
+        self.identities = {}
+        self.row_keys = set()
+        for row_key, client_idno in state['row_clients'].items():
+            row_key = bytes.fromhex(row_key)
+            self.row_keys.add(row_key)
+            if client_idno is not None:
+                self.identities[row_key] = client_registry.get_identity_by_idno(client_idno)
+        return True
+
+    def report_duplicates(self, ws_name):
+        """
+        Log the number of duplicate rows in the content worksheet.
+        """
+        duplicate_cnt = self.duplicate_cnts.get(ws_name, 0)
+        CLIPRT_LOGGER.info(6060, ws_name, duplicate_cnt)
+        return duplicate_cnt
+
+    @staticmethod
+    def row_key(projected_row):
+        """
+        Hash the mapped values of a row.  The projected row is a list
+        of destination data element name and value pairs, empty values
+        left out.  Several columns can map to the same destination data
+        element, so the pairs are sorted to not depend on the column
+        order.
+        """
+        return hashlib.blake2b(
+            repr(sorted(projected_row, key=repr)).encode('utf8'),
+            digest_size=16
+            ).digest()
+
+    def save_row(self, row_key, identity):
+        """
+        Remember the processed row and the client identity it was
+        resolved to.
+        """
+        self.row_keys.add(row_key)
+        self.identities[row_key] = identity
+        return True
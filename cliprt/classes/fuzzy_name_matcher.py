@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import difflib
+import re
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class FuzzyNameMatcher:
+    """
+    Match name identifiers that are similar rather than equal, e.g.
+    "Jon Smith" and "Jonathan Smith".  Comparing every name with every
+    other name does not scale, so the names are kept in blocks: names
+    whose last name sounds the same and whose first names start with the
+    same letter, in either name order.  Names are only compared within
+    their blocks.
+    """
+    # Soundex digits of the consonants.
+    SOUNDEX_CODES = {
+        **dict.fromkeys('bfpv', '1'),
+        **dict.fromkeys('cgjkqsxz', '2'),
+        **dict.fromkeys('dt', '3'),
+        'l': '4',
+        **dict.fromkeys('mn', '5'),
+        'r': '6',
+        }
+
+    def __init__(self, similarity_threshold=None):
+        """
+        Names are similar if their similarity, from 0 to 1, is at least
+        the similarity threshold.
+        """
+        # Class attributes.
+        self.block_size_limit = CLIPRT_SETTINGS.fuzzy_name_block_size_limit
+        self.blocks = {}
+        self.comparison_cnt = 0
+        self.identifier_types = CLIPRT_SETTINGS.fuzzy_name_identifier_types
+        self.similarity_threshold =\
+            CLIPRT_SETTINGS.fuzzy_name_similarity_threshold\
+                if similarity_threshold is None else similarity_threshold
+        self.skipped_block_keys = set()
+
+    def add_identifier(self, identifier):
+        """
+        Add a name identifier to its blocks.
+        """
+        if identifier.type not in self.identifier_types:
+            return False
+        for block_key in self.block_keys(identifier.de_value):
+            self.blocks.setdefault(block_key, {})[identifier.key] =\
+                self.sorted_tokens(identifier.de_value)
+        return True
+
+    def block_keys(self, de_value):
+        """
+        The blocks of a name: the sound of the last name and the initial
+        of the first name, for both name orders.
+        """
+        tokens = self.tokens(de_value)
+        if not tokens:
+            return set()
+        return {
+            f'{self.phonetic_code(tokens[-1])}:{tokens[0][0]}',
+            f'{self.phonetic_code(tokens[0])}:{tokens[-1][0]}',
+            }
+
+    @classmethod
+    def phonetic_code(cls, token):
+        """
+        The Soundex code of a name token.
+        """
+        code = token[0]
+        prev_digit = cls.SOUNDEX_CODES.get(token[0])
+        for char in token[1:]:
+            digit = cls.SOUNDEX_CODES.get(char)
+            if digit is not None and digit != prev_digit:
+                code += digit
+            if char not in 'hw':
+                prev_digit = digit
+        return (code + '000')[:4]
+
+    def similar_keys(self, identifier):
+        """
+        The keys of the known names that are similar to the name
+        identifier.  Blocks that have grown too large to be useful are
+        skipped, and logged the first time they are.
+        """
+        if identifier.type not in self.identifier_types:
+            return []
+        sorted_tokens = self.sorted_tokens(identifier.de_value)
+        candidates = {}
+        for block_key in self.block_keys(identifier.de_value):
+            block = self.blocks.get(block_key, {})
+            if len(block) <= self.block_size_limit:
+                candidates.update(block)
+            elif block_key not in self.skipped_block_keys:
+                self.skipped_block_keys.add(block_key)
+                CLIPRT_LOGGER.warning(6082, block_key, len(block), self.block_size_limit)
+        similar_keys = []
+        for key, candidate_tokens in candidates.items():
+            if key == identifier.key:
+                continue
+            self.comparison_cnt += 1
+            if self.similarity(sorted_tokens, candidate_tokens)\
+                    >= self.similarity_threshold:
+                similar_keys.append(key)
+        return similar_keys
+
+    @staticmethod
+    def similarity(sorted_tokens_a, sorted_tokens_b):
+        """
+        The similarity of two names, from 0 to 1.
+        """
+        return difflib.SequenceMatcher(None, sorted_tokens_a, sorted_tokens_b).ratio()
+
+    def sorted_tokens(self, de_value):
+        """
+        The name tokens in sorted order, so that "Smith, Jon" and
+        "Jon Smith" compare as equal.
+        """
+        return ' '.join(sorted(self.tokens(de_value)))
+
+    @staticmethod
+    def tokens(de_value):
+        """
+        The words of a name.
+        """
+        return re.findall(r'[a-z]+', de_value.lower())
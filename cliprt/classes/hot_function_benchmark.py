@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+#pylint: disable=import-error
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import json
+import platform
+import time
+import openpyxl
+from cliprt.classes.client_identity_resolver import ClientIdentityResolver
+from cliprt.classes.client_registry import ClientRegistry
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.data_element_dictionary_processor\
+    import DataElementDictionaryProcessor
+from cliprt.classes.data_element_fragments_assembler\
+    import DataElementFragmentsAssembler as FragAssembler
+from cliprt.classes.destination_worksheet import DestinationWorksheet
+from cliprt.classes.destination_worksheets_registry\
+    import DestinationWorksheetsRegistry
+from cliprt.classes.identifier import Identifier
+from cliprt.classes.identifier_registry import IdentifierRegistry
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+# The benchmark fixtures are kept as attributes so that the set up is
+# not part of the timings.
+class HotFunctionBenchmark: #pylint: disable=too-many-instance-attributes
+    """
+    Micro-benchmarks for the functions that dominate the per-row cost
+    of creating the client reports.  Results are compared against a
+    baseline so that performance regressions are caught.
+    """
+    # Default allowance before a benchmark is considered a regression.
+    DEFAULT_TOLERANCE = 0.25
+
+    # Number of identities known to the registries during the
+    # benchmarks, so that lookups are not against empty registries.
+    REGISTRY_CLIENT_CNT = 5000
+
+    def __init__(self, repeat=5, min_secs=0.2):
+        """
+        Prepare the benchmark fixtures.  Each benchmark is timed
+        'repeat' times for at least 'min_secs' and the best time is
+        kept.
+        """
+        # Dependencies.
+        self.settings = CLIPRT_SETTINGS
+
+        # Class attributes.
+        self.repeat = repeat
+        self.min_secs = min_secs
+        self.results = {}
+
+        # Fixtures.
+        cliprt_wb = openpyxl.Workbook()
+        self.dest_ws_reg = DestinationWorksheetsRegistry()
+        ded_ws = cliprt_wb.create_sheet('DED')
+        for row in SyntheticWorkbookGenerator().ded_rows():
+            ded_ws.append(row)
+        ded_processor = DataElementDictionaryProcessor(
+            cliprt_wb,
+            ded_ws,
+            self.dest_ws_reg
+            )
+        ded_processor.hydrate_ded()
+        self.ded = ded_processor.ded
+        self.client_reg = ClientRegistry(self.dest_ws_reg)
+        self.identifier_reg = IdentifierRegistry()
+        for client_no in range(self.REGISTRY_CLIENT_CNT):
+            self.resolve_row(self.make_row(client_no), self.client_reg, self.identifier_reg)
+
+    def benchmarks(self):
+        """
+        The benchmarks, by name, as the function to time and the
+        function that makes the arguments of the calls to time.  The
+        arguments are made before the calls are timed, fresh for each
+        timing, so that every call sees the same kind of state: e.g.
+        every update_cell call writes to an empty cell.
+        """
+        frag_assembler = FragAssembler('name')
+        frag_assembler.add_fragment_value(1, 'Jane')
+        frag_assembler.add_fragment_value(2, 'Doe')
+        client_idno_sets = [{1000, 1001, 1002}, {1000, 1005}, {1000}]
+        return {
+            'identifier_init': (
+                lambda: Identifier('phone', '(808) 555-1234', self.ded),
+                None
+                ),
+            # A known identifier, by a new resolver.
+            'save_identifier': (
+                lambda id_resolver, identifier: id_resolver.save_identifier(identifier),
+                self.save_identifier_args
+                ),
+            # A known client, against registries that no earlier call
+            # has changed.
+            'resolve_client_identity': (self.resolve_row, self.resolve_row_args),
+            'client_idno_matcher': (
+                lambda: ClientIdentityResolver.client_idno_matcher(client_idno_sets),
+                None
+                ),
+            'assembled_value': (frag_assembler.assembled_value, None),
+            'format_phone': (lambda: self.settings.format_phone('(808) 555-1234'), None),
+            'format_date': (lambda: self.settings.format_date('12/31/2021'), None),
+            # An empty cell.
+            'update_cell': (self.update_cell, self.update_cell_args),
+            # A cell that already has another value.
+            'update_cell_merge': (
+                self.update_cell,
+                lambda call_cnt: self.update_cell_args(call_cnt, 'Doe, John')
+                ),
+            }
+
+    @staticmethod
+    def compare(baseline, results, tolerance=DEFAULT_TOLERANCE):
+        """
+        Compare the results to the baseline.  Return the list of
+        benchmarks that are slower than the baseline by more than the
+        tolerance.
+        """
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                # New benchmarks have nothing to regress from.
+                continue
+            baseline_ns = baseline[name]['ns_per_call']
+            if result['ns_per_call'] > baseline_ns * (1 + tolerance):
+                regressions.append({
+                    'name': name,
+                    'baseline_ns': baseline_ns,
+                    'ns_per_call': result['ns_per_call'],
+                    'change': round(result['ns_per_call'] / baseline_ns - 1, 3),
+                    })
+        return regressions
+
+    @staticmethod
+    def load_baseline(baseline_filename):
+        """
+        Read the benchmark results from a baseline file.
+        """
+        with open(baseline_filename, 'r', encoding='utf8') as baseline_file:
+            return json.load(baseline_file)['results']
+
+    @staticmethod
+    def make_row(client_no):
+        """
+        Identifier values for a synthetic client.
+        """
+        return [
+            ('client id', str(100000000 + client_no)),
+            ('name', f'Jane Doe{client_no}'),
+            ('phone', f'808-{200 + client_no % 700}-{1000 + client_no % 8000}'),
+            ('email', f'jane.doe{client_no}@gmail.not'),
+            ]
+
+    def resolve_row(self, row, client_reg, identifier_reg):
+        """
+        Resolve the identity of a row of identifier values.
+        """
+        id_resolver = ClientIdentityResolver(client_reg, identifier_reg)
+        for de_name, de_value in row:
+            id_resolver.save_identifier(Identifier(de_name, de_value, self.ded))
+        return id_resolver.resolve_client_identity(
+            self.settings.identity_match_threshold
+            )
+
+    def resolve_row_args(self, call_cnt):
+        """
+        The rows of distinct known clients, with copies of the
+        registries, so that no call resolves against registries changed
+        by an earlier call.  There are no more calls than known clients.
+        """
+        client_reg = ClientRegistry(self.dest_ws_reg)
+        client_reg.import_state(self.client_reg.export_state())
+        identifier_reg = IdentifierRegistry()
+        identifier_reg.import_state(self.identifier_reg.export_state(), self.ded)
+        return [
+            (self.make_row(client_no), client_reg, identifier_reg)
+            for client_no in range(call_cnt)
+            ]
+
+    def run(self, names=None):
+        """
+        Time each of the benchmarks.  The time per call is kept in
+        nanoseconds.
+        """
+        self.results = {}
+        for name, (func, make_args) in self.benchmarks().items():
+            if names and name not in names:
+                continue
+            call_cnt = 1
+            while self.time_calls(func, make_args, call_cnt) < self.min_secs / self.repeat\
+                    and (make_args is None or call_cnt * 2 <= self.REGISTRY_CLIENT_CNT):
+                call_cnt *= 2
+            best_secs = min(
+                self.time_calls(func, make_args, call_cnt)
+                for _ in range(self.repeat)
+                )
+            self.results[name] = {
+                'ns_per_call': round(best_secs / call_cnt * 1e9, 1),
+                'calls': call_cnt,
+                }
+        return self.results
+
+    def save_baseline(self, baseline_filename):
+        """
+        Record the benchmark results as the new baseline.
+        """
+        baseline = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': self.results,
+            }
+        with open(baseline_filename, 'w', encoding='utf8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2)
+        return baseline_filename
+
+    def save_identifier_args(self, call_cnt):
+        """
+        The phone identifiers of distinct known clients, each with a new
+        resolver.
+        """
+        return [
+            (
+                ClientIdentityResolver(self.client_reg, self.identifier_reg),
+                Identifier('phone', dict(self.make_row(client_no))['phone'], self.ded)
+                )
+            for client_no in range(call_cnt)
+            ]
+
+    @staticmethod
+    def time_calls(func, make_args, call_cnt):
+        """
+        The time taken by call_cnt calls to func.  The arguments of the
+        calls are made first, and are not part of the time.
+        """
+        args_list = [()] * call_cnt if make_args is None else make_args(call_cnt)
+        start_time = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        return time.perf_counter() - start_time
+
+    def update_cell(self, dest_ws, row_idx):
+        """
+        Update a name cell of a report.
+        """
+        return dest_ws.update_cell(row_idx, 1, 'Jane Doe', self.settings.name_format)
+
+    @staticmethod
+    def update_cell_args(call_cnt, cell_value=None):
+        """
+        A cell per call, in a new report, holding cell_value.
+        """
+        dest_ws = DestinationWorksheet(openpyxl.Workbook(), 'bench')
+        args_list = []
+        for row_idx in range(2, call_cnt + 2):
+            if cell_value is not None:
+                dest_ws.update_cell(row_idx, 1, cell_value)
+            args_list.append((dest_ws, row_idx))
+        return args_list
@@ -5,6 +5,7 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 Copyright   2022 Michael Hodges
 """
 import re
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
 
 class Identifier:
     """
@@ -49,9 +50,25 @@ class Identifier:
     def make_searchable(str_value):
         """
         Ensure that values are lowercase strings and easily searchable.
+        Numbers, e.g. phone numbers or client ids, are converted without
+        a decimal point if they are whole numbers.
         """
         return str_value.strip().lower()\
-            if isinstance(str_value, str) else str(str_value)
+            if isinstance(str_value, str) else CLIPRT_SETTINGS.format_number(str_value)
+
+    @classmethod
+    def restore(cls, de_name, identifier_type, de_value):
+        """
+        Recreate a saved identifier.  The saved values are already
+        normalized, so the DED is not needed.
+        """
+        identifier = cls.__new__(cls)
+        identifier.client_ids = set()
+        identifier.de_name = de_name
+        identifier.de_value = de_value
+        identifier.type = identifier_type
+        identifier.key = identifier.get_identifier_key()
+        return identifier
 
     def santize_phone_value(self):
         """
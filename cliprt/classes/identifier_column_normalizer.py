@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import re
+from cliprt.classes.client_identity_resolver import ClientIdentityResolver
+from cliprt.classes.identifier import Identifier
+
+class IdentifierColumnNormalizer:
+    """
+    Normalize and validate the identifier values of a chunk of rows a
+    column at a time rather than a value at a time.  The values of a
+    column are joined into a single buffer, so that phone number digit
+    extraction and email validation are each a single precompiled regex
+    pass over the buffer.  The usefulness checks are those of the
+    ClientIdentityResolver, so the results are the same as those of
+    Identifier and of the resolver.
+    """
+    # Joins the values of a column.  Identifier values that contain the
+    # separator are normalized a value at a time.
+    SEPARATOR = '\x00'
+
+    # Everything but the digits of each value in the buffer.
+    NON_DIGITS_PATTERN = re.compile(r'[^\d\x00]+')
+
+    # Valid emails spanning a whole value in the buffer.
+    EMAIL_PATTERN = re.compile(
+        r'(?:(?<=\x00)|\A)' + ClientIdentityResolver.EMAIL_REGEX + r'(?=\x00|\Z)'
+        )
+
+    def identifiers(self, ded, de_name, values):
+        """
+        The identifiers of a column of values, with None for the values
+        that are not useful identifiers.
+        """
+        de_name = Identifier.make_searchable(de_name)
+        identifier_type = ded[de_name].get_identifier_type()
+        de_values, valid = self.normalize_column(identifier_type, values)
+        return [
+            Identifier.restore(de_name, identifier_type, de_value) if is_valid else None
+            for de_value, is_valid in zip(de_values, valid)
+            ]
+
+    def join(self, de_values):
+        """
+        Join the values into a buffer, or return None if a value holds
+        the separator.
+        """
+        buffer = self.SEPARATOR.join(de_values)
+        if buffer.count(self.SEPARATOR) != max(len(de_values) - 1, 0):
+            return None
+        return buffer
+
+    def normalize_column(self, identifier_type, values):
+        """
+        The normalized identifier values of a column of values and the
+        validity mask of the values.
+        """
+        de_values = self.searchable_values(values)
+        if not de_values:
+            return [], []
+        if identifier_type == 'phone':
+            de_values = self.phone_digits(de_values)
+            valid = [
+                ClientIdentityResolver.is_useful_phone_identifier(de_value)
+                for de_value in de_values
+                ]
+        elif identifier_type == 'email':
+            valid = self.valid_emails(de_values)
+        else:
+            valid = [True] * len(de_values)
+        return de_values, valid
+
+    def phone_digits(self, de_values):
+        """
+        The digits of each phone number.
+        """
+        buffer = self.join(de_values)
+        if buffer is None:
+            return [''.join(re.findall(r'\d+', de_value)) for de_value in de_values]
+        return self.NON_DIGITS_PATTERN.sub('', buffer).split(self.SEPARATOR)
+
+    @staticmethod
+    def searchable_values(values):
+        """
+        The values as by Identifier.make_searchable.  Stripping and
+        lowercasing are already single string method calls, so they are
+        not worth a buffer.
+        """
+        return [
+            value.strip().lower() if isinstance(value, str)\
+                else Identifier.make_searchable(value)
+            for value in values
+            ]
+
+    def valid_emails(self, de_values):
+        """
+        The validity mask of the emails.
+        """
+        buffer = self.join(de_values)
+        if buffer is None:
+            return [
+                bool(ClientIdentityResolver.is_useful_email_identifier(de_value))
+                for de_value in de_values
+                ]
+        value_idxs = {}
+        offset = 0
+        for idx, de_value in enumerate(de_values):
+            value_idxs[offset] = idx
+            offset += len(de_value) + 1
+        valid = [False] * len(de_values)
+        for email_match in self.EMAIL_PATTERN.finditer(buffer):
+            idx = value_idxs.get(email_match.start())
+            if idx is not None and\
+                    not ClientIdentityResolver.is_placeholder_email(de_values[idx]):
+                valid[idx] = True
+        return valid
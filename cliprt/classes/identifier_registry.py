@@ -4,19 +4,35 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.identifier import Identifier
+
 class IdentifierRegistry:
     """
     Client identities are composed of a unique combination of multiple
     client identifiers. A specific identifier may be shared by one or
     client identities. For example, a married couple sharing a single
     email address.
+
+    Identifiers that are shared by too many clients, and the values of
+    the stop-list, are stopped: they are no longer used to match clients,
+    so the identity matching never has to compare huge sets of clients.
     """
     def __init__(self):
         """
         Create a new client identity registry.
         """
         # Class attributes.
+        self.changed_keys = set()
+        self.fuzzy_name_matcher = None
+        self.fan_out_threshold = CLIPRT_SETTINGS.identifier_fan_out_threshold
         self.identifier_list = {}
+        self.stop_keys = set()
+        self.stop_values = set()
+
+        # Initializations.
+        self.add_stop_list(CLIPRT_SETTINGS.identifier_stop_list)
 
     def add_identifier(self, identifier):
         """
@@ -25,6 +41,115 @@ class IdentifierRegistry:
         """
         if not identifier.key in self.identifier_list.items():
             self.identifier_list[identifier.key] = identifier
+            self.changed_keys.add(identifier.key)
+            if self.fuzzy_name_matcher is not None:
+                self.fuzzy_name_matcher.add_identifier(identifier)
+
+    def add_stop_list(self, stop_list):
+        """
+        Stop the identifier values, or identifier keys, of the list.
+        """
+        for stop_value in stop_list:
+            stop_value = Identifier.make_searchable(stop_value)
+            if not stop_value:
+                continue
+            if '::' in stop_value:
+                self.stop_keys.add(stop_value)
+            else:
+                self.stop_values.add(stop_value)
+
+    def export_state(self):
+        """
+        Compact state of the registry for checkpoints: the data element
+        name, the value and the client id numbers of each identifier.
+        """
+        return [
+            [identifier.de_name, identifier.de_value, sorted(identifier.client_ids)]
+            for identifier in self.identifier_list.values()
+            ]
+
+    def heaviest_identifiers(self, identifier_cnt=None):
+        """
+        The identifiers shared by the most clients, with the number of
+        clients, most shared first.
+        """
+        if identifier_cnt is None:
+            identifier_cnt = CLIPRT_SETTINGS.heaviest_identifiers_report_cnt
+        return sorted(
+            (
+                (identifier.key, len(identifier.client_ids))
+                for identifier in self.identifier_list.values()
+                ),
+            key=lambda key_fan_out: (-key_fan_out[1], key_fan_out[0])
+            )[:identifier_cnt]
+
+    def import_state(self, state, ded):
+        """
+        Restore the registry from a checkpoint.  The saved values are
+        already normalized, so normalizing them again changes nothing.
+        The restored identifiers are flagged as changed since they may
+        not have been saved anywhere else yet.
+        """
+        self.identifier_list = {}
+        for de_name, de_value, client_idnos in state:
+            identifier = Identifier(de_name, de_value, ded)
+            identifier.client_ids.update(client_idnos)
+            self.identifier_list[identifier.key] = identifier
+        self.changed_keys = set(self.identifier_list)
+        self.identifiers_loaded()
+        return True
+
+    def identifiers_loaded(self):
+        """
+        Stop the hot identifiers and index the names once identifiers
+        are loaded other than by add_identifier().
+        """
+        self.stop_hot_identifiers()
+        if self.fuzzy_name_matcher is not None:
+            for identifier in self.identifier_list.values():
+                self.fuzzy_name_matcher.add_identifier(identifier)
+        return True
+
+    def is_matchable(self, identifier):
+        """
+        Determine if the identifier can match a client: it belongs to a
+        client, it is not stopped and it is not shared by more clients
+        than the fan-out threshold.
+        """
+        if not identifier.client_ids or self.is_stopped(identifier):
+            return False
+        return self.fan_out_threshold is None or\
+            len(identifier.client_ids) <= self.fan_out_threshold
+
+    def is_stopped(self, identifier):
+        """
+        Determine if the identifier is no longer used to match clients.
+        """
+        return identifier.key in self.stop_keys or\
+            identifier.de_value in self.stop_values
+
+    def load_stop_list(self, stop_list_filename):
+        """
+        Stop the identifier values, or identifier keys, listed in the
+        file, one per line.
+        """
+        with open(stop_list_filename, encoding='utf8') as stop_list_file:
+            self.add_stop_list(stop_list_file.read().splitlines())
+        return True
+
+    def report_heaviest_identifiers(self):
+        """
+        Log the identifiers shared by the most clients.
+        """
+        heaviest_identifiers = self.heaviest_identifiers()
+        for key, fan_out in heaviest_identifiers:
+            CLIPRT_LOGGER.info(
+                6081,
+                key,
+                fan_out,
+                ' (stopped)' if key in self.stop_keys else ''
+                )
+        return heaviest_identifiers
 
     def save_identifier_client_idno(self, identifier_key, client_idno):
         """
@@ -32,3 +157,29 @@ class IdentifierRegistry:
         """
         identifier = self.identifier_list[identifier_key]
         identifier.save_client_idno(client_idno)
+        self.changed_keys.add(identifier_key)
+        if self.fan_out_threshold is not None and\
+                len(identifier.client_ids) > self.fan_out_threshold:
+            self.stop_identifier(identifier)
+
+    def stop_hot_identifiers(self):
+        """
+        Stop the identifiers already shared by too many clients, e.g.
+        once the registry is restored.
+        """
+        if self.fan_out_threshold is None:
+            return False
+        for identifier in self.identifier_list.values():
+            if len(identifier.client_ids) > self.fan_out_threshold:
+                self.stop_identifier(identifier)
+        return True
+
+    def stop_identifier(self, identifier):
+        """
+        Stop an identifier that is shared by too many clients.
+        """
+        if identifier.key in self.stop_keys:
+            return False
+        self.stop_keys.add(identifier.key)
+        CLIPRT_LOGGER.warning(6080, identifier.key, len(identifier.client_ids))
+        return True
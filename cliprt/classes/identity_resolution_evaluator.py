@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.scaling_benchmark import ScalingBenchmark
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+class IdentityResolutionEvaluator:
+    """
+    Evaluate identity resolution for both quality and throughput.
+    Labelled synthetic client data, with known ground truth identities,
+    is resolved and the pairwise precision, recall and F1 are reported
+    next to the rows per second and the peak memory.
+    """
+    # The synthetic data of the evaluations.  There is no client id
+    # column, since the client ids would give the ground truth away, and
+    # households, typos and missing values make the identifiers
+    # ambiguous.
+    DATA_DEFAULTS = {
+        'content_ws_cnt': 3,
+        'duplication_rate': 0.5,
+        'identifier_noise': 0.25,
+        'ded_shape': 'minimal',
+        'seed': 1,
+        'client_id_col': False,
+        'household_rate': 0.2,
+        'typo_rate': 0.05,
+        'missing_rate': 0.1,
+        }
+
+    def __init__(self, client_cnt=1000, *, isolate=False, **data_options):
+        """
+        Configure the evaluation data.  The data options are the keyword
+        options of the synthetic workbook generator, and default to the
+        DATA_DEFAULTS.  Evaluations can be run in their own process so
+        that the peak memory is not inherited.
+        """
+        # Class attributes.
+        self.generator = SyntheticWorkbookGenerator(
+            client_cnt,
+            **dict(self.DATA_DEFAULTS, **data_options)
+            )
+        self.isolate = isolate
+        self.results = []
+
+    @staticmethod
+    def pair_cnt(cluster_size):
+        """
+        Number of distinct pairs in a cluster.
+        """
+        return cluster_size * (cluster_size - 1) // 2
+
+    @staticmethod
+    def pairwise_scores(true_labels, resolved_labels):
+        """
+        Pairwise precision, recall and F1 of the resolved labels with
+        respect to the true labels.  Both are lists with one label per
+        row.  A pair of rows is a true positive when both labellings
+        put the two rows in the same cluster.
+        """
+        true_sizes = {}
+        resolved_sizes = {}
+        shared_sizes = {}
+        for true_label, resolved_label in zip(true_labels, resolved_labels):
+            true_sizes[true_label] = true_sizes.get(true_label, 0) + 1
+            resolved_sizes[resolved_label] = resolved_sizes.get(resolved_label, 0) + 1
+            shared_key = (true_label, resolved_label)
+            shared_sizes[shared_key] = shared_sizes.get(shared_key, 0) + 1
+
+        pair_cnt = IdentityResolutionEvaluator.pair_cnt
+        true_pairs = sum(pair_cnt(size) for size in true_sizes.values())
+        resolved_pairs = sum(pair_cnt(size) for size in resolved_sizes.values())
+        shared_pairs = sum(pair_cnt(size) for size in shared_sizes.values())
+
+        precision = shared_pairs / resolved_pairs if resolved_pairs else 1.0
+        recall = shared_pairs / true_pairs if true_pairs else 1.0
+        f1_score = 2 * precision * recall / (precision + recall)\
+            if precision + recall else 0.0
+        return {
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(f1_score, 4),
+            'true_pairs': true_pairs,
+            'resolved_pairs': resolved_pairs,
+            }
+
+    def evaluate(self, thresholds=None):
+        """
+        Resolve the synthetic client data once per identity match
+        threshold and score each resolution.
+        """
+        if thresholds is None:
+            thresholds = [CLIPRT_SETTINGS.identity_match_threshold]
+        self.results = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wb_filename = os.path.join(tmp_dir, 'evaluation.xlsx')
+            self.generator.save_workbook(wb_filename)
+            for threshold in thresholds:
+                if self.isolate:
+                    ctx = multiprocessing.get_context('spawn')
+                    with ctx.Pool(1) as pool:
+                        result = pool.apply(
+                            self.resolve,
+                            (wb_filename, threshold, self.generator.row_labels)
+                            )
+                else:
+                    result = self.resolve(
+                        wb_filename,
+                        threshold,
+                        self.generator.row_labels
+                        )
+                self.results.append(result)
+        return self.results
+
+    @staticmethod
+    def format_result(result):
+        """
+        Format an evaluation result for the console.
+        """
+        return\
+            f"threshold {result['identity_match_threshold']}: "\
+            f"precision {result['precision']:.4f}, "\
+            f"recall {result['recall']:.4f}, "\
+            f"F1 {result['f1']:.4f}, "\
+            f"{result['rows_per_sec']:.1f} rows/s, "\
+            f"{result['peak_memory_mb']} MB peak"
+
+    @staticmethod
+    def resolve(wb_filename, threshold, row_labels):
+        """
+        Resolve the identities of the labelled content rows and score
+        the resolution.
+        """
+        resolved_idnos = {}
+        def identity_listener(ws_name, row_idx, identity):
+            resolved_idnos[(ws_name, row_idx)] =\
+                None if identity is None else identity.client_idno
+
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.identity_listener = identity_listener
+        client_info.identity_match_threshold = threshold
+        start_time = time.perf_counter()
+        client_info.create_client_reports(True, save_wb=False)
+        resolve_secs = time.perf_counter() - start_time
+
+        true_labels, resolved_labels =\
+            IdentityResolutionEvaluator.row_labels(row_labels, resolved_idnos)
+        result = {
+            'identity_match_threshold': threshold,
+            'row_cnt': len(true_labels),
+            'true_client_cnt': len(set(true_labels)),
+            'resolved_client_cnt': len(client_info.client_reg.client_id_list),
+            'resolve_secs': round(resolve_secs, 4),
+            'rows_per_sec': round(len(true_labels) / max(resolve_secs, 1e-9), 1),
+            'peak_memory_mb': ScalingBenchmark.peak_memory_mb(),
+            }
+        result.update(
+            IdentityResolutionEvaluator.pairwise_scores(true_labels, resolved_labels)
+            )
+        return result
+
+    @staticmethod
+    def row_labels(row_labels, resolved_idnos):
+        """
+        The true and the resolved labels of the content rows, in the
+        same order.  The content rows follow the column headings row.
+        Rows without any useful identifiers are left unresolved, each in
+        a cluster of its own.
+        """
+        true_labels = []
+        resolved_labels = []
+        for ws_name, client_nos in row_labels.items():
+            for row_no, client_no in enumerate(client_nos):
+                row_key = (ws_name, row_no + 2)
+                true_labels.append(client_no)
+                resolved_idno = resolved_idnos.get(row_key)
+                resolved_labels.append(
+                    row_key if resolved_idno is None else resolved_idno
+                    )
+        return true_labels, resolved_labels
+
+    def save_results(self, results_filename):
+        """
+        Record the evaluation results.
+        """
+        with open(results_filename, 'w', encoding='utf8') as results_file:
+            json.dump(self.results, results_file, indent=2)
+        return results_filename
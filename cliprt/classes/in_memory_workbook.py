@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+
+class InMemoryCell:
+    """
+    A worksheet cell.  Cells are views of the worksheet values: the
+    values are set through the worksheet.
+    """
+    __slots__ = ('row', 'column', 'value')
+
+    def __init__(self, row, column, value):
+        """
+        A cell and its value.
+        """
+        # Class attributes.
+        self.row = row
+        self.column = column
+        self.value = value
+
+    @property
+    def col_idx(self):
+        """
+        The column index of the cell.
+        """
+        return self.column
+
+    @property
+    def coordinate(self):
+        """
+        The spreadsheet coordinate of the cell, e.g. "B3".
+        """
+        col_letters = ''
+        col_idx = self.column
+        while col_idx > 0:
+            col_idx, remainder = divmod(col_idx - 1, 26)
+            col_letters = chr(ord('A') + remainder) + col_letters
+        return f'{col_letters}{self.row}'
+
+class InMemoryWorksheet:
+    """
+    The part of the openpyxl worksheet interface that CLIPRT uses, kept
+    in lists of row values.
+    """
+    def __init__(self, title, rows=None):
+        """
+        A worksheet with the rows of values provided.
+        """
+        # Class attributes.
+        self.rows = [list(row) for row in rows] if rows else []
+        self.title = title
+
+    def __getitem__(self, row_idx):
+        """
+        The cells of a row.
+        """
+        return tuple(self.iter_rows(min_row=row_idx, max_row=row_idx))[0]
+
+    def append(self, values):
+        """
+        Add a row after the last row.
+        """
+        self.rows.append(list(values))
+
+    def cell(self, row, column, value=None):
+        """
+        A cell of the worksheet.  If a value is provided, the cell is set
+        to the value first.
+        """
+        if value is not None:
+            while len(self.rows) < row:
+                self.rows.append([])
+            row_values = self.rows[row - 1]
+            if len(row_values) < column:
+                row_values.extend([None] * (column - len(row_values)))
+            row_values[column - 1] = value
+        return InMemoryCell(row, column, self.value(row, column))
+
+    def delete_rows(self, idx, amount=1):
+        """
+        Delete rows, moving the rows below up.
+        """
+        del self.rows[idx - 1:idx - 1 + amount]
+
+    def iter_cols(self, min_col=None, max_col=None, min_row=None, max_row=None):
+        """
+        The cells of a range of columns, a column at a time.
+        """
+        min_row = min_row or self.min_row
+        max_row = max_row or self.max_row
+        for col_idx in range(min_col or 1, (max_col or self.max_column) + 1):
+            yield tuple(
+                InMemoryCell(row_idx, col_idx, self.value(row_idx, col_idx))
+                for row_idx in range(min_row, max_row + 1)
+                )
+
+    def iter_rows(
+            self,
+            min_row=None,
+            max_row=None,
+            min_col=None,
+            max_col=None,
+            values_only=False
+        ):
+        """
+        The cells, or values, of a range of rows, a row at a time.
+        """
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        for row_idx in range(min_row or self.min_row, (max_row or self.max_row) + 1):
+            row_values = self.rows[row_idx - 1] if row_idx <= len(self.rows) else []
+            values = row_values[min_col - 1:max_col]
+            if len(values) < max_col - min_col + 1:
+                values = values + [None] * (max_col - min_col + 1 - len(values))
+            if values_only:
+                yield tuple(values)
+            else:
+                yield tuple(
+                    InMemoryCell(row_idx, col_idx, value)
+                    for col_idx, value in enumerate(values, start=min_col)
+                    )
+
+    @property
+    def max_column(self):
+        """
+        The last column with values.
+        """
+        return max((len(row_values) for row_values in self.rows), default=0) or 1
+
+    @property
+    def max_row(self):
+        """
+        The last row with values.
+        """
+        return len(self.rows) or 1
+
+    @property
+    def min_row(self):
+        """
+        The first row.
+        """
+        return 1
+
+    def value(self, row, column):
+        """
+        The value of a cell.
+        """
+        if row > len(self.rows):
+            return None
+        row_values = self.rows[row - 1]
+        return row_values[column - 1] if column <= len(row_values) else None
+
+    @property
+    def values(self):
+        """
+        The values of all the rows.
+        """
+        return self.iter_rows(values_only=True)
+
+class InMemoryWorkbook:
+    """
+    The part of the openpyxl workbook interface that CLIPRT uses, so that
+    the client reports can be created from data that is not in an xlsx
+    file, and without openpyxl.
+    """
+    def __init__(self):
+        """
+        An empty workbook.
+        """
+        # Class attributes.
+        self.worksheets = []
+
+    def __contains__(self, ws_name):
+        """
+        Whether or not the workbook has the worksheet.
+        """
+        return ws_name in self.sheetnames
+
+    def __getitem__(self, ws_name):
+        """
+        A worksheet by name.
+        """
+        for cliprt_ws in self.worksheets:
+            if cliprt_ws.title == ws_name:
+                return cliprt_ws
+        raise KeyError(f'Worksheet {ws_name} does not exist.')
+
+    @property
+    def active(self):
+        """
+        The first worksheet.
+        """
+        return self.worksheets[0] if self.worksheets else None
+
+    def create_sheet(self, title, index=None, rows=None):
+        """
+        Add a worksheet, optionally with rows of values.
+        """
+        cliprt_ws = InMemoryWorksheet(title, rows)
+        if index is None:
+            self.worksheets.append(cliprt_ws)
+        else:
+            self.worksheets.insert(index, cliprt_ws)
+        return cliprt_ws
+
+    def remove(self, cliprt_ws):
+        """
+        Remove a worksheet.
+        """
+        self.worksheets.remove(cliprt_ws)
+
+    @property
+    def sheetnames(self):
+        """
+        The worksheet names, in order.
+        """
+        return [cliprt_ws.title for cliprt_ws in self.worksheets]
@@ -4,103 +4,235 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+from types import MappingProxyType
+
 class MessageRegistry:
     """
     The message registry contains all of the message content needed for
-    error handling throughout the project.
+    error handling throughout the project.  The message catalog is built
+    once and is shared, read-only, by every registry.  Use the module
+    level MESSAGE_REGISTRY rather than creating new registries.
     """
+    # The shared, read-only message catalog, empty until the first
+    # registry is created.
+    message_catalog = MappingProxyType({})
 
     def __init__(self):
         """
         Initialize the list of available messages.
         """
-        # Class attributes.
-        self.message = {}
+        if not MessageRegistry.message_catalog:
+            message = {}
+            self.assign_message_content(message)
+            MessageRegistry.message_catalog = MappingProxyType(message)
 
-        self.assign_message_content()
+        # Class attributes.
+        self.message = MessageRegistry.message_catalog
 
-    def assign_message_content(self):
+    # One statement per message.
+    @staticmethod
+    def assign_message_content(message): #pylint: disable=too-many-statements
         """
         Assign message content.  Message begin with one of the following:
             o 'Error: ...'
             o 'Warning: ...'
+            o 'Info: ...'
+            o 'Debug: ...'
         """
         utc =\
             '\nUnable to continue until you correct the worksheet. '\
             'See example the worksheet in /resources.'
 
         # cliprt
-        self.message[1000] =\
+        message[1000] =\
             'Error: required workbook {} not found.'
-        self.message[1001] =\
+        message[1001] =\
             'Warning: Dest WS designation not found...please wait while it is being created.'
-        self.message[1002] =\
+        message[1002] =\
             'Error: first create and configure the DED worksheet'
-        self.message[1003] =\
+        message[1003] =\
             'Error: First use an Excel compatible editor to configure the DED workshet.'
-        self.message[1004] =\
+        message[1004] =\
             'Error: you first need to intialize and configure the DED worksheet.'
-        self.message[1005] =\
+        message[1005] =\
             'Error: the DED is not available or not ready.'
 
         # Data element dictionary
-        self.message[3150] =\
+        message[3150] =\
             'Error: no Content DE Name specified for worksheet "{}", cell "{}". '\
             'Review the row and remove it if not needed.' + utc
-        self.message[3170] =\
+        message[3170] =\
             'Error: invalid Dest DE Name" for "{}". Dest DE Name must not be a list: "{}"; '\
             'only one allowed.' + utc
-        self.message[3200] =\
+        message[3200] =\
             'Error: required column heading "{}" not found in worksheet "{}".' + utc
-        self.message[3204] =\
+        message[3204] =\
             'Error: specify either a "Dest WS" or a "Dest DE Name" for "{}", but not both.'\
             + utc
-        self.message[3207] =\
+        message[3207] =\
             'Error: see column "Dest DE Name" for invalid entry "{}". '\
             'It must reference a entry in the colum "Data Element".' + utc
-        self.message[3210] =\
+        message[3210] =\
             'Error: invalid input for "{}". '\
             'Value seen is "{}", {}="n" where "n" is an integer is expected.' + utc
-        self.message[3212] =\
+        message[3212] =\
             'Error: invalid Dest DE Name "{}" specified for "{}". '\
             'A fragment must reference Dest DE Name with a Dest WS designation.' + utc
-        self.message[3214] =\
+        message[3214] =\
             'Error: missing Dest DE Name specified for "{}". '\
             'A fragment must reference a destination data element for assembly.' + utc
-        self.message[3215] =\
+        message[3215] =\
             'Error: invalid Content DE Type for "{}". Content DE Type must not be a list: '\
             '"{}"; only one allowed.' + utc
-        self.message[3217] =\
+        message[3217] =\
             'Error: invalid Dest DE Format "{}" specified for "{}".\nValid values: "{}".'\
             + utc
-        self.message[3218] =\
+        message[3218] =\
             'Error: invalid Content DE Type "{}" specified for "{}".\nValid values: "{}".'\
             + utc
-        self.message[3226] =\
+        message[3219] =\
+            'Error: invalid Dest DE Merge "{}" specified for "{}".\nValid values: "{}".'\
+            + utc
+        message[3226] =\
             'Error: invalid Dest DE Name "{}" specified for "{}". '\
             'An identifier cannot be remapped to another Dest DE Name.' + utc
-        self.message[3229] =\
+        message[3229] =\
             'Error: the Dest WS designation is incomplete. '\
             'There are as yet no identifiers provided.'
-        self.message[3232] =\
+        message[3232] =\
             'Error: specify either a "Dest WS" or a "Dest DE Name" for "{}".' + utc
-        self.message[3238] =\
+        message[3238] =\
             'Error: invalid Dest DE Name "{}" specified for "{}". '\
             'A Dest DE Name must have a destination worksheet specified.' + utc
+        message[3239] =\
+            'Error: a Dest DE Merge is specified for "{}", which has no destination '\
+            'worksheet. Specify it for its Dest DE Name instead.' + utc
+        message[3240] =\
+            'Error: the Dest DE Merge "{}" specified for "{}" compares dates, '\
+            'so its Dest DE Format must be "{}".' + utc
 
         # Client information workbook
-        self.message[4000] =\
+        message[4000] =\
             'Error: the Dest WS designation, "{}", '\
             'must designate the destination report indicators. '\
             'Configuration is incomplete.'
 
+        message[4010] =\
+            'Error: the checkpoint {} does not match the DED of the workbook. '\
+            'Remove it, or run without resuming.'
+        message[4011] =\
+            'Error: the workbook has no file name, so a checkpoint file name '\
+            'is required.'
+        message[4012] =\
+            'Error: the workbook has no file name, so incremental runs '\
+            'are not available.'
+        message[4020] =\
+            'Error: the partial state {} was not created with the DED of workbook {}.'
+        message[4030] =\
+            'Error: {} rows failed, more than the error budget of {}. '\
+            'The run is aborted.'
+
         # Content work sheet
-        self.message[5000] =\
+        message[5000] =\
             'Warning: insufficient content to report for worksheet {}.'
-        self.message[5012] =\
+        message[5012] =\
             'Error: none of the columns in "{}" match any identifier data elements. '\
             'Check your DED.' + utc
 
+        # Logging
+        message[6000] =\
+            'Info: creating the client reports for workbook "{}".'
+        message[6001] =\
+            'Info: created the client reports for workbook "{}" in {:.2f} seconds.'
+        message[6010] =\
+            'Info: processing content worksheet "{}", {} rows.'
+        message[6011] =\
+            'Info: processed content worksheet "{}" in {:.2f} seconds.'
+        message[6020] =\
+            'Debug: worksheet "{}" row {}: matched {}, unmatched {}, client id {}.'
+        message[6030] =\
+            'Info: resuming from checkpoint {}: {} worksheets done, worksheet "{}" row {}.'
+        message[6031] =\
+            'Debug: saved checkpoint {}: worksheet "{}" row {}.'
+        message[6032] =\
+            'Warning: checkpoint {} not found, starting from the beginning.'
+        message[6040] =\
+            'Info: worksheet "{}" is unchanged since the previous run.'
+        message[6041] =\
+            'Info: worksheet "{}" has {} new or changed rows.'
+        message[6042] =\
+            'Warning: worksheet "{}" has {} rows that were changed or removed since the '\
+            'previous run. Their old values stay in the reports until the next full run.'
+        message[6043] =\
+            'Warning: the DED has changed since run state {} was saved. '\
+            'Processing all of the rows.'
+        message[6050] =\
+            'Info: loaded registry store {}: {} identifiers, {} clients.'
+        message[6051] =\
+            'Info: saved registry store {}: {} new or changed identifiers, {} new clients.'
+        message[6060] =\
+            'Info: worksheet "{}" has {} duplicate rows, skipped.'
+        message[6070] =\
+            'Info: wrote partition {}: {} rows.'
+        message[6071] =\
+            'Info: resolved partition {}: {} clients, partial state saved to {}.'
+        message[6072] =\
+            'Info: merged {} partial states into workbook "{}": {} clients, '\
+            '{} joins across partitions.'
+        message[6080] =\
+            'Warning: identifier "{}" is shared by {} clients. '\
+            'It is no longer used to match clients.'
+        message[6081] =\
+            'Info: identifier "{}" is shared by {} clients{}.'
+        message[6082] =\
+            'Warning: fuzzy name block "{}" holds {} names, more than the limit of {}. '\
+            'Its names are no longer compared.'
+        message[6090] =\
+            'Warning: worksheet "{}" row {} quarantined, column "{}": {}.'
+        message[6091] =\
+            'Info: {} rows quarantined to {}.'
+        message[6100] =\
+            'Debug: spilled {} destination rows to {}.'
+        message[6101] =\
+            'Info: {} destination rows were spilled to disk to stay within '\
+            'the memory budget of {} bytes.'
+        message[6110] =\
+            'Info: report "{}" has {} client rows, sharded into {}.'
+        message[6120] =\
+            'Info: rendered {} report worksheets in {} worker processes.'
+        message[6121] =\
+            'Info: streamed the buffered rows of {} report worksheets to the workbook.'
+
+        # Report service
+        message[7000] =\
+            'Info: report service listening on http://{}:{}.'
+        message[7001] =\
+            'Info: report job {} queued.'
+        message[7002] =\
+            'Info: report job {} finished in {:.2f} seconds.'
+        message[7003] =\
+            'Error: report job {} failed: {}'
+        message[7004] =\
+            'Info: removed {} finished report jobs and their files.'
+        message[7010] =\
+            'Error: report job {} not found.'
+        message[7011] =\
+            'Error: the report for job {} is not ready, the job is {}.'
+        message[7012] =\
+            'Error: uploads are limited to {} bytes.'
+        message[7013] =\
+            'Error: upload a workbook, or a zip archive of CSV files.'
+        message[7014] =\
+            'Error: the CSV archive must include a DED.csv file.'
+        message[7015] =\
+            'Error: invalid HTTP request.'
+        message[7016] =\
+            'Error: the upload size, Content-Length, is required.'
+        message[7017] =\
+            'Error: "{}" not found.'
+        message[7018] =\
+            'Error: method {} not allowed.'
+
     def msg(self, msg_no):
         """
         Return message test with its tag.
@@ -112,5 +244,10 @@ class MessageRegistry:
         Create the message tag. Format is:
             (Ennnn) for error messages
             (Wnnnn) for warning messages
+            (Innnn) for info messages
+            (Dnnnn) for debug messages
         """
         return f'({self.message[msg_no][0]}{msg_no})'
+
+# The message registry shared by all of the CLIPRT classes.
+MESSAGE_REGISTRY = MessageRegistry()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import collections
+import contextlib
+import datetime
+import itertools
+import math
+import os
+import zipfile
+from xml.sax.saxutils import escape
+from openpyxl.writer.excel import ExcelWriter
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+
+class ParallelWorkbookWriter:
+    """
+    Save a workbook with its report worksheets rendered in parallel.
+    The reports are independent once they are complete, so the rows of
+    the report worksheets are rendered to worksheet XML, a chunk of rows
+    at a time, by worker processes while the rest of the workbook is
+    saved.  The rendered chunks are streamed into the workbook file in
+    row order, and only a few chunks per worker are in flight at a time.
+    The rows of a report worksheet may come from elsewhere than the
+    worksheet, e.g. the destination row buffer, so that they are
+    streamed into the workbook file without being held in memory; with
+    a single worker they are rendered in process.
+    """
+    MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    # Rows rendered by a worker at a time.
+    CHUNK_ROW_CNT = 2000
+    # Chunks in flight per worker.
+    CHUNKS_PER_WORKER = 2
+
+    def __init__(self, max_workers=None, chunk_row_cnt=None):
+        """
+        Render the report worksheets with up to max_workers processes,
+        chunk_row_cnt rows at a time.
+        """
+        # Class attributes.
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.chunk_row_cnt = self.CHUNK_ROW_CNT if chunk_row_cnt is None else chunk_row_cnt
+        self.chunks = None
+        self.pool = None
+        self.rendering = collections.deque()
+        self.report_rows = {}
+
+    @staticmethod
+    def col_letters(col_idx):
+        """
+        The column letters of a column index, e.g. "AB" for 28.
+        """
+        col_letters = ''
+        while col_idx > 0:
+            col_idx, remainder = divmod(col_idx - 1, 26)
+            col_letters = chr(ord('A') + remainder) + col_letters
+        return col_letters
+
+    @staticmethod
+    def render_rows_xml(first_row_idx, rows):
+        """
+        The worksheet XML of the rows of a report, starting at row
+        first_row_idx.  Strings are inline strings, so the worksheet
+        does not depend on the shared strings of the workbook.  NaN and
+        infinity have no XML number, so they are written as strings.
+        """
+        xml_parts = []
+        col_letters = []
+        for row_idx, row in enumerate(rows, start=first_row_idx):
+            while len(col_letters) < len(row):
+                col_letters.append(ParallelWorkbookWriter.col_letters(len(col_letters) + 1))
+            cells = []
+            for col_letter, cell_value in zip(col_letters, row):
+                if cell_value is None:
+                    continue
+                if isinstance(cell_value, bool):
+                    cells.append(
+                        f'<c r="{col_letter}{row_idx}" t="b"><v>{int(cell_value)}</v></c>'
+                        )
+                elif isinstance(cell_value, int)\
+                        or (isinstance(cell_value, float) and math.isfinite(cell_value)):
+                    cells.append(f'<c r="{col_letter}{row_idx}"><v>{cell_value!r}</v></c>')
+                else:
+                    cell_text = str(cell_value)
+                    space = ' xml:space="preserve"' if cell_text != cell_text.strip() else ''
+                    cells.append(
+                        f'<c r="{col_letter}{row_idx}" t="inlineStr">'
+                        f'<is><t{space}>{escape(cell_text)}</t></is></c>'
+                        )
+            if cells:
+                xml_parts.append(f'<row r="{row_idx}">{"".join(cells)}</row>')
+        return ''.join(xml_parts).encode('utf-8')
+
+    def iter_chunks(self, cliprt_wb, report_ws_names):
+        """
+        The chunks of rows of the report worksheets, as (worksheet name,
+        first row index, rows), in the order the worksheets are saved.
+        """
+        for ws_name in report_ws_names:
+            if ws_name in self.report_rows:
+                rows = iter(self.report_rows[ws_name][1])
+            else:
+                rows = cliprt_wb[ws_name].iter_rows(values_only=True)
+            first_row_idx = 1
+            chunk = list(itertools.islice(rows, self.chunk_row_cnt))
+            while chunk:
+                yield ws_name, first_row_idx, chunk
+                first_row_idx += len(chunk)
+                chunk = list(itertools.islice(rows, self.chunk_row_cnt))
+
+    def render_next_chunks(self, chunk_cnt):
+        """
+        Send chunks to the workers until chunk_cnt chunks are in flight.
+        """
+        while len(self.rendering) < chunk_cnt:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            ws_name, first_row_idx, rows = chunk
+            if self.pool is None:
+                # Rendered in process.
+                self.rendering.append((ws_name, self.render_rows_xml(first_row_idx, rows)))
+            else:
+                self.rendering.append(
+                    (ws_name, self.pool.apply_async(self.render_rows_xml, (first_row_idx, rows)))
+                    )
+        return True
+
+    def rendered_chunks(self, ws_name):
+        """
+        The rendered chunks of a report worksheet, in row order.  Each
+        chunk taken is replaced in flight by the next chunk to render.
+        """
+        chunk_cnt = len(self.rendering)
+        while self.rendering and self.rendering[0][0] == ws_name:
+            rows_xml = self.rendering.popleft()[1]
+            if self.pool is not None:
+                rows_xml = rows_xml.get()
+            self.render_next_chunks(chunk_cnt)
+            yield rows_xml
+
+    def write_report_ws(self, wb_zip, report_ws):
+        """
+        Stream the XML of a report worksheet into the workbook file as
+        its chunks are rendered.
+        """
+        with wb_zip.open(report_ws.path[1:], 'w', force_zip64=True) as ws_file:
+            ws_file.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                + f'<worksheet xmlns="{self.MAIN_NS}"><sheetData>'.encode('utf-8')
+                )
+            for rows_xml in self.rendered_chunks(report_ws.title):
+                ws_file.write(rows_xml)
+            ws_file.write(b'</sheetData></worksheet>')
+        return True
+
+    def save(self, cliprt_wb, wb_filename, report_ws_names, report_rows=None):
+        """
+        Save the workbook, with the report worksheets rendered in
+        parallel.  report_rows provides the number of rows and the rows
+        of the report worksheets whose rows are not in the worksheets,
+        by worksheet name.
+        """
+        self.report_rows = {} if report_rows is None else report_rows
+        report_ws_names = [
+            report_ws.title for report_ws in cliprt_wb.worksheets
+            if report_ws.title in report_ws_names
+            ]
+        chunk_cnt = sum(
+            -(-self.report_rows[ws_name][0] // self.chunk_row_cnt)
+            if ws_name in self.report_rows
+            else -(-cliprt_wb[ws_name].max_row // self.chunk_row_cnt)
+            for ws_name in report_ws_names
+            )
+        worker_cnt = min(self.max_workers, chunk_cnt)
+        if worker_cnt <= 1 and not self.report_rows:
+            cliprt_wb.save(wb_filename)
+            return False
+
+        if worker_cnt > 1:
+            # Imported on first use to keep the startup fast.
+            import multiprocessing #pylint: disable=import-outside-toplevel
+            pool_context = multiprocessing.get_context('spawn').Pool(worker_cnt)
+        else:
+            pool_context = contextlib.nullcontext()
+        tmp_filename = wb_filename + '.tmp'
+        with pool_context as pool:
+            self.pool = pool
+            self.chunks = self.iter_chunks(cliprt_wb, report_ws_names)
+            self.rendering.clear()
+            # The first chunks are rendered while the worksheets ahead
+            # of the reports are saved.  In process, a chunk is rendered
+            # only once it is written.
+            self.render_next_chunks(worker_cnt * self.CHUNKS_PER_WORKER if pool else 1)
+            try:
+                cliprt_wb.properties.modified =\
+                    datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+                with zipfile.ZipFile(tmp_filename, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)\
+                        as wb_zip:
+                    ReportExcelWriter(cliprt_wb, wb_zip, self, report_ws_names).save()
+            finally:
+                self.chunks = None
+                self.pool = None
+                self.rendering.clear()
+                self.report_rows = {}
+        os.replace(tmp_filename, wb_filename)
+        if worker_cnt > 1:
+            CLIPRT_LOGGER.info(6120, len(report_ws_names), worker_cnt)
+        else:
+            CLIPRT_LOGGER.info(6121, len(report_ws_names))
+        return True
+
+class ReportExcelWriter(ExcelWriter):
+    """
+    The openpyxl workbook writer, with the report worksheets streamed
+    from the parallel workbook writer instead of written by openpyxl.
+    """
+    def __init__(self, cliprt_wb, wb_zip, workbook_writer, report_ws_names):
+        """
+        Write cliprt_wb to wb_zip, with the worksheets in
+        report_ws_names written by workbook_writer.
+        """
+        super().__init__(cliprt_wb, wb_zip)
+        # Class attributes.
+        self.wb_zip = wb_zip
+        self.workbook_writer = workbook_writer
+        self.report_ws_names = set(report_ws_names)
+
+    def write_worksheet(self, ws):
+        """
+        Write a worksheet, streaming the report worksheets.
+        """
+        if ws.title not in self.report_ws_names:
+            return super().write_worksheet(ws)
+        self.workbook_writer.write_report_ws(self.wb_zip, ws)
+        self.manifest.append(ws)
+        return True
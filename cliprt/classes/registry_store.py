@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import sqlite3
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.identifier import Identifier
+
+class RegistryStore:
+    """
+    SQLite store for the identifier registry and the client registry,
+    shared across runs and across workbooks.  The registries are loaded
+    before the client reports are created, so new rows are resolved
+    against the known client population and keep the client ids they
+    were given before.  Only what has changed is written back.
+    """
+    # Store layout version.
+    VERSION = 1
+
+    # Store layout.
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS meta ('
+        'name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS clients ('
+        'client_idno INTEGER PRIMARY KEY)',
+        'CREATE TABLE IF NOT EXISTS identifiers ('
+        'key TEXT PRIMARY KEY, de_name TEXT NOT NULL, '
+        'type TEXT NOT NULL, de_value TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS identifier_clients ('
+        'key TEXT NOT NULL, client_idno INTEGER NOT NULL, '
+        'PRIMARY KEY (key, client_idno)) WITHOUT ROWID',
+        'CREATE TABLE IF NOT EXISTS identity_signatures ('
+        'signature TEXT PRIMARY KEY, client_idno INTEGER NOT NULL)',
+        )
+
+    def __init__(self, client_info, store_filename):
+        """
+        Persist the registries of the client information workbook to the
+        store file.  The store is created if it does not exist.
+        """
+        # Dependency injections.
+        self.client_info = client_info
+
+        # Class attributes.
+        self.store_filename = store_filename
+
+    def connect(self):
+        """
+        Open the store, creating the tables as needed.
+        """
+        connection = sqlite3.connect(self.store_filename)
+        with connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            connection.execute(
+                'INSERT OR IGNORE INTO meta VALUES (?, ?)',
+                ('version', self.VERSION)
+                )
+        return connection
+
+    def load(self):
+        """
+        Load the known identifiers, clients and identity signatures into
+        the registries.
+        """
+        identifier_reg = self.client_info.identifier_reg
+        client_reg = self.client_info.client_reg
+        connection = self.connect()
+        try:
+            identifier_list = identifier_reg.identifier_list
+            for key, de_name, identifier_type, de_value in connection.execute(
+                    'SELECT key, de_name, type, de_value FROM identifiers'
+                ):
+                if key not in identifier_list:
+                    identifier_list[key] =\
+                        Identifier.restore(de_name, identifier_type, de_value)
+            for key, client_idno in connection.execute(
+                    'SELECT key, client_idno FROM identifier_clients'
+                ):
+                identifier_list[key].client_ids.add(client_idno)
+
+            client_reg.known_client_idnos.update(
+                client_idno for (client_idno,) in connection.execute(
+                    'SELECT client_idno FROM clients'
+                    )
+                )
+            client_reg.keeps_identity_signatures = True
+            client_reg.identity_signatures = dict(
+                connection.execute(
+                    'SELECT signature, client_idno FROM identity_signatures'
+                    )
+                )
+            for (next_client_idno,) in connection.execute(
+                    "SELECT value FROM meta WHERE name = 'next_client_idno'"
+                ):
+                client_reg.next_client_idno =\
+                    max(client_reg.next_client_idno, next_client_idno)
+        finally:
+            connection.close()
+        identifier_reg.identifiers_loaded()
+        CLIPRT_LOGGER.info(
+            6050,
+            self.store_filename,
+            len(identifier_reg.identifier_list),
+            len(client_reg.known_client_idnos)
+            )
+        return True
+
+    def save(self):
+        """
+        Write the new and changed identifiers, clients and identity
+        signatures to the store.
+        """
+        identifier_reg = self.client_info.identifier_reg
+        client_reg = self.client_info.client_reg
+        identifiers = [
+            identifier_reg.identifier_list[key] for key in identifier_reg.changed_keys
+            ]
+        new_client_idnos = client_reg.client_id_list.keys()\
+            - client_reg.known_client_idnos
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT OR IGNORE INTO identifiers VALUES (?, ?, ?, ?)',
+                    (
+                        (identifier.key, identifier.de_name, identifier.type,
+                         identifier.de_value)
+                        for identifier in identifiers
+                        )
+                    )
+                connection.executemany(
+                    'INSERT OR IGNORE INTO identifier_clients VALUES (?, ?)',
+                    (
+                        (identifier.key, client_idno)
+                        for identifier in identifiers
+                        for client_idno in identifier.client_ids
+                        )
+                    )
+                connection.executemany(
+                    'INSERT OR IGNORE INTO clients VALUES (?)',
+                    ((client_idno,) for client_idno in new_client_idnos)
+                    )
+                connection.executemany(
+                    'INSERT OR IGNORE INTO identity_signatures VALUES (?, ?)',
+                    client_reg.changed_identity_signatures.items()
+                    )
+                connection.execute(
+                    'INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                    ('next_client_idno', client_reg.next_client_idno)
+                    )
+        finally:
+            connection.close()
+        CLIPRT_LOGGER.info(
+            6051,
+            self.store_filename,
+            len(identifiers),
+            len(new_client_idnos)
+            )
+        identifier_reg.changed_keys = set()
+        client_reg.known_client_idnos.update(new_client_idnos)
+        client_reg.changed_identity_signatures = {}
+        return True
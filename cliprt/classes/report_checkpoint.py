@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import gzip
+import json
+import os
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class ReportCheckpoint:
+    """
+    Checkpoints of the client report creation, so that a long run that
+    fails can be resumed rather than started over.  A checkpoint is
+    saved after each content worksheet, and optionally every so many
+    rows, and holds the identifier registry, the client registry, the
+    destination worksheets, the state of the duplicate row detector, the
+    quarantine and the run state, if enabled, and the position reached.
+    The checkpoint is kept next to the workbook, unless a checkpoint file
+    name is provided, and removed once the reports are created.
+    """
+    # Checkpoint file name suffix.
+    CHECKPOINT_SUFFIX = '.checkpoint.json.gz'
+
+    # Checkpoint layout version.
+    VERSION = 4
+
+    def __init__(self, client_info, row_interval=None, checkpoint_filename=None):
+        """
+        Checkpoint the client information workbook.  If row_interval is
+        provided a checkpoint is also saved every row_interval rows of
+        each content worksheet.  A checkpoint file name is required for
+        workbooks without a file name, e.g. workbooks of DataFrames.
+        """
+        # Dependency injections.
+        self.client_info = client_info
+
+        # Class attributes.
+        self.cliprt = MESSAGE_REGISTRY
+        if checkpoint_filename is None:
+            if client_info.cliprt_wb_filename is None:
+                # Fatal error
+                raise Exception(self.cliprt.msg(4011))
+            checkpoint_filename = client_info.cliprt_wb_filename + self.CHECKPOINT_SUFFIX
+        self.checkpoint_filename = checkpoint_filename
+        self.row_interval = row_interval
+        self.row_idx = None
+        self.ws_name = None
+        self.ws_names_done = []
+
+    def exists(self):
+        """
+        Determine if there is a checkpoint to resume from.
+        """
+        return os.path.exists(self.checkpoint_filename)
+
+    def is_due(self, row_idx, min_row=1):
+        """
+        Determine if a checkpoint is due after the row.
+        """
+        return bool(self.row_interval) and\
+            (row_idx - min_row) % self.row_interval == 0
+
+    def is_ws_processed(self, ws_name):
+        """
+        Determine if the content worksheet was processed before the
+        checkpoint.
+        """
+        return ws_name in self.ws_names_done
+
+    def remove(self):
+        """
+        Remove the checkpoint once it is no longer needed.
+        """
+        if not self.exists():
+            return False
+        os.remove(self.checkpoint_filename)
+        return True
+
+    def restore(self):
+        """
+        Restore the registries and the position from the checkpoint.
+        The DED must be hydrated and the destination worksheets prepared
+        first.
+        """
+        if not self.exists():
+            return False
+        with gzip.open(self.checkpoint_filename, 'rt', encoding='utf8')\
+                as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state['version'] != self.VERSION or\
+                not self.client_info.import_state(state['reports']):
+            # Fatal error
+            raise Exception(self.cliprt.msg(4010).format(self.checkpoint_filename))
+        self.restore_processing_state(state)
+        self.ws_names_done = state['ws_names_done']
+        self.ws_name = state['ws_name']
+        self.row_idx = state['row_idx']
+        CLIPRT_LOGGER.info(
+            6030,
+            self.checkpoint_filename,
+            len(self.ws_names_done),
+            self.ws_name,
+            self.row_idx
+            )
+        return True
+
+    def processing_state(self):
+        """
+        The state of the duplicate row detector, the quarantine and the
+        run state, None for those that are not enabled.
+        """
+        client_info = self.client_info
+        return {
+            'duplicate_rows': None if client_info.duplicate_rows is None\
+                else client_info.duplicate_rows.export_state(),
+            'quarantine': None if client_info.quarantine is None\
+                else client_info.quarantine.export_state(),
+            'run_state': None if client_info.run_state is None\
+                else client_info.run_state.export_state(),
+            }
+
+    def restore_processing_state(self, state):
+        """
+        Restore the state of the duplicate row detector, the quarantine
+        and the run state.  The client registry must be restored first.
+        """
+        client_info = self.client_info
+        if client_info.duplicate_rows is not None and\
+                state['duplicate_rows'] is not None:
+            client_info.duplicate_rows.import_state(
+                state['duplicate_rows'],
+                client_info.client_reg
+                )
+        if client_info.quarantine is not None and state['quarantine'] is not None:
+            client_info.quarantine.import_state(state['quarantine'])
+        if client_info.run_state is not None and state['run_state'] is not None:
+            client_info.run_state.import_state(state['run_state'])
+        return True
+
+    def resume_row_idx(self, ws_name, row_idx):
+        """
+        The last row processed before the checkpoint, if the checkpoint
+        was saved part way through the content worksheet.  Otherwise
+        the given row index.
+        """
+        if ws_name == self.ws_name and self.row_idx is not None:
+            return self.row_idx
+        return row_idx
+
+    def row_processed(self, ws_name, row_idx, min_row=1):
+        """
+        Save a checkpoint every row_interval rows.
+        """
+        if self.is_due(row_idx, min_row):
+            self.save(ws_name, row_idx)
+            return True
+        return False
+
+    def save(self, ws_name=None, row_idx=None):
+        """
+        Save a checkpoint.  The checkpoint is written to a temporary
+        file first so that a failure while saving does not lose the
+        previous checkpoint.
+        """
+        self.ws_name = ws_name
+        self.row_idx = row_idx
+        state = {
+            'version': self.VERSION,
+            'ws_names_done': self.ws_names_done,
+            'ws_name': ws_name,
+            'row_idx': row_idx,
+            'reports': self.client_info.export_state(),
+            }
+        state.update(self.processing_state())
+        tmp_filename = self.checkpoint_filename + '.tmp'
+        with gzip.open(tmp_filename, 'wt', encoding='utf8', compresslevel=1)\
+                as checkpoint_file:
+            json.dump(state, checkpoint_file, separators=(',', ':'), default=str)
+        os.replace(tmp_filename, self.checkpoint_filename)
+        CLIPRT_LOGGER.debug(6031, self.checkpoint_filename, ws_name, row_idx)
+        return True
+
+    def ws_processed(self, ws_name):
+        """
+        Save a checkpoint after each content worksheet.
+        """
+        if ws_name not in self.ws_names_done:
+            self.ws_names_done.append(ws_name)
+        return self.save()
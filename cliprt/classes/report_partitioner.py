@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import gzip
+import hashlib
+import itertools
+import json
+import os
+from cliprt.classes.client_identity import ClientIdentity
+from cliprt.classes.client_identity_resolver import ClientIdentityResolver
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.content_worksheet import ContentWorksheet
+from cliprt.classes.content_worksheet_pipeline import ContentWorksheetPipeline
+from cliprt.classes.identifier import Identifier
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class ReportPartitioner:
+    """
+    Split the client report creation across workers, or machines, for
+    workbooks that are too large for one.  The work is done in three
+    steps that only share local files, so any job scheduler can run
+    them:
+
+    - partition: the content rows are split into partition workbooks by
+      a blocking key, the preferred identifier of each row, so that the
+      rows of a client mostly land in the same partition.
+    - resolve_partition: the client identities of each partition are
+      resolved independently, with hashed client ids, and the partial
+      state is saved.
+    - merge: the clients found in more than one partition are joined,
+      using a union-find over the identifiers they share, and the
+      client reports are written to the workbook.
+
+    Clients in different partitions are joined when they share
+    identifiers of at least as many identifier types as the identity
+    match threshold, the same rule that matches a row to a client.
+    """
+    # Partition workbook file names.
+    PARTITION_FILENAME = 'partition_{}.xlsx'
+
+    # Partial state file name suffix.
+    PARTIAL_STATE_SUFFIX = '.partial.json.gz'
+
+    # Partial state layout version.
+    VERSION = 1
+
+    # The identifier types preferred as blocking keys, most preferred
+    # first.  Other identifier types come after these.
+    BLOCKING_TYPES = ['email', 'phone']
+
+    def __init__(self, partition_cnt=4, memory_budget=None, save_workers=None):
+        """
+        Partition into partition_cnt partitions.  The merge keeps at
+        most memory_budget bytes of client report rows in memory, if
+        provided, and renders the reports in save_workers processes, if
+        provided.
+        """
+        # Class attributes.
+        self.cliprt = MESSAGE_REGISTRY
+        self.memory_budget = memory_budget
+        self.normalizer = ContentWorksheetPipeline()
+        self.partition_cnt = partition_cnt
+        self.save_workers = save_workers
+
+    def blocking_key(self, identifiers):
+        """
+        The preferred useful identifier of a row, or None.
+        """
+        blocking_keys = []
+        for identifier in identifiers:
+            if identifier.type == 'phone' and\
+                    not ClientIdentityResolver.is_useful_phone_identifier(
+                        identifier.de_value
+                        ):
+                continue
+            if identifier.type == 'email' and\
+                    not ClientIdentityResolver.is_useful_email_identifier(
+                        identifier.de_value
+                        ):
+                continue
+            type_rank = self.BLOCKING_TYPES.index(identifier.type)\
+                if identifier.type in self.BLOCKING_TYPES else len(self.BLOCKING_TYPES)
+            blocking_keys.append((type_rank, identifier.key))
+        if not blocking_keys:
+            return None
+        return min(blocking_keys)[1]
+
+    def create_partition_wbs(self, client_info):
+        """
+        The partition workbooks, each with a copy of the DED.
+        """
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        partition_wbs = []
+        for _ in range(self.partition_cnt):
+            partition_wb = openpyxl.Workbook(write_only=True)
+            ded_ws = partition_wb.create_sheet(client_info.DED_WS_NAME)
+            for row in client_info.ded_ws.iter_rows(values_only=True):
+                ded_ws.append(row)
+            partition_wbs.append(partition_wb)
+        return partition_wbs
+
+    @staticmethod
+    def find_client_idno(parents, client_idno):
+        """
+        Union-find: the client id that represents the set of joined
+        clients.
+        """
+        while parents[client_idno] != client_idno:
+            parents[client_idno] = parents[parents[client_idno]]
+            client_idno = parents[client_idno]
+        return client_idno
+
+    def join_clients(self, parents, client_idno_a, client_idno_b):
+        """
+        Union-find: join two sets of clients.  The lowest client id
+        represents the joined set.
+        """
+        client_idno_a = self.find_client_idno(parents, client_idno_a)
+        client_idno_b = self.find_client_idno(parents, client_idno_b)
+        if client_idno_a == client_idno_b:
+            return False
+        parents[max(client_idno_a, client_idno_b)] = min(client_idno_a, client_idno_b)
+        return True
+
+    def join_partitioned_clients(self, client_partitions, identifiers, identifier_reg,
+                                 match_threshold):
+        """
+        Join the clients of different partitions that share identifiers
+        of at least match_threshold identifier types.  Each client gets a
+        match key for every choice of an identifier of match_threshold of
+        its identifier types, so the clients that share a match key are
+        joined directly, without comparing the clients of an identifier
+        two by two.  Stopped identifiers, and identifiers shared by more
+        clients than the fan-out threshold, do not join clients.
+        Returns the union-find parents of the clients and the number of
+        joins.
+        """
+        client_identifiers = {}
+        for identifier in identifiers.values():
+            if not identifier_reg.is_matchable(identifier):
+                continue
+            for client_idno in identifier.client_ids:
+                client_identifiers.setdefault(client_idno, {}).setdefault(
+                    identifier.type,
+                    set()
+                    ).add(identifier.key)
+        match_key_clients = {}
+        for client_idno, type_keys in client_identifiers.items():
+            for identifier_types in\
+                    itertools.combinations(sorted(type_keys), max(match_threshold, 1)):
+                for match_key in itertools.product(*(
+                        sorted(type_keys[identifier_type])
+                        for identifier_type in identifier_types
+                        )):
+                    match_key_clients.setdefault(match_key, []).append(client_idno)
+        parents = {client_idno: client_idno for client_idno in client_partitions}
+        joined_cnt = 0
+        for client_idnos in match_key_clients.values():
+            if len({client_partitions[client_idno] for client_idno in client_idnos}) < 2:
+                # The partition has already resolved these clients.
+                continue
+            for client_idno in client_idnos[1:]:
+                if self.join_clients(parents, client_idnos[0], client_idno):
+                    joined_cnt += 1
+        return parents, joined_cnt
+
+    def load_partial_states(self, client_info, state_filenames):
+        """
+        The partition and the destination rows of each client, and the
+        identifiers with their clients, across the partial states.
+        """
+        client_partitions = {}
+        client_rows = {}
+        identifiers = {}
+        for partition_idx, state_filename in enumerate(state_filenames):
+            reports = self.read_partial_state(client_info, state_filename)
+            # The client rows follow the column headings row.
+            for client_idno, dest_ws in reports['client_reg']['identities']:
+                client_partitions.setdefault(client_idno, partition_idx)
+                client_rows.setdefault(client_idno, []).append({
+                    ws_ind: reports['dest_ws_reg'][ws_ind]['rows'][row_idx - 2]
+                    for ws_ind, row_idx in dest_ws.items()
+                    })
+            for de_name, de_value, client_idnos in reports['identifier_reg']:
+                identifier = Identifier(de_name, de_value, client_info.ded_processor.ded)
+                identifiers.setdefault(identifier.key, identifier).client_ids.update(
+                    client_idnos
+                    )
+        return client_partitions, client_rows, identifiers
+
+    def merge(self, wb_filename, state_filenames, save_wb=True):
+        """
+        Join the clients of the partial states and create the client
+        reports in the workbook.  The partial states must have been
+        created with the DED of the workbook.  The reports are saved as
+        the reports of a single run are, buffered, sharded and rendered
+        in parallel as requested.
+        """
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.hydrate_ded()
+        if self.memory_budget is not None:
+            client_info.enable_memory_budget(self.memory_budget)
+        if self.save_workers is not None:
+            client_info.enable_parallel_save(self.save_workers)
+        client_info.dest_ws_reg.prep_worksheets()
+        client_partitions, client_rows, identifiers =\
+            self.load_partial_states(client_info, state_filenames)
+        parents, joined_cnt = self.join_partitioned_clients(
+            client_partitions,
+            identifiers,
+            client_info.identifier_reg,
+            client_info.identity_match_threshold
+            )
+        self.merge_client_rows(client_info, parents, client_rows)
+
+        client_info.save_client_reports(progress_reporting_is_disabled=True, save_wb=save_wb)
+        CLIPRT_LOGGER.info(
+            6072,
+            len(state_filenames),
+            wb_filename,
+            len(client_info.client_reg.client_id_list),
+            joined_cnt
+            )
+        return client_info
+
+    def merge_client_rows(self, client_info, parents, client_rows):
+        """
+        Merge the destination rows of the partitions into the
+        destination rows of the joined clients.
+        """
+        for client_idno, rows in client_rows.items():
+            joined_client_idno = self.find_client_idno(parents, client_idno)
+            identity = client_info.client_reg.get_identity_by_idno(joined_client_idno)
+            if identity is None:
+                identity = ClientIdentity(joined_client_idno, client_info.dest_ws_reg)
+                client_info.client_reg.client_id_list[joined_client_idno] = identity
+            for row_list in rows:
+                for ws_ind, row in row_list.items():
+                    self.merge_row(client_info, identity, ws_ind, row)
+        return True
+
+    @staticmethod
+    def merge_row(client_info, identity, ws_ind, row):
+        """
+        Merge a destination row of a partition into the destination row
+        of the client.  Cells holding several values are merged as a
+        whole, since the values themselves may hold commas.  Cells of
+        data elements with another merge policy hold a single value.
+        """
+        dest_ws = client_info.dest_ws_reg.dest_ws_by_ind_list[ws_ind]
+        dest_row_idx = identity.get_row_idx(ws_ind)
+        merge_policies = {
+            col_idx: client_info.ded_processor.ded[de_name].dest_de_merge
+            for de_name, col_idx in dest_ws.dest_de_list.items()
+            if de_name in client_info.ded_processor.ded
+            }
+        for col_idx, cell_value in enumerate(row, start=1):
+            if cell_value is None:
+                continue
+            dest_ws.update_cell(
+                dest_row_idx,
+                col_idx,
+                cell_value,
+                merge_policy=merge_policies.get(col_idx)
+                )
+        return True
+
+    def partition(self, wb_filename, partitions_dir):
+        """
+        Split the content rows of the workbook into partition workbooks,
+        each with a copy of the DED.  Returns the partition workbook
+        file names.
+        """
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.hydrate_ded()
+        client_info.create_content_ws_names_list()
+        partition_wbs = self.create_partition_wbs(client_info)
+        row_cnts = [0] * self.partition_cnt
+        for ws_name in client_info.content_ws_names:
+            self.partition_ws(client_info, ws_name, partition_wbs, row_cnts)
+        return self.save_partition_wbs(partition_wbs, partitions_dir, row_cnts)
+
+    def partition_idx(self, content_ws, row_idx, row):
+        """
+        The partition of a content row, by its blocking key.  Rows
+        without a useful identifier go to the first partition.
+        """
+        if not content_ws.identifier_col_names:
+            return 0
+        _, _, identifiers, _, _ = self.normalizer.normalize_row(content_ws, row_idx, row)
+        if identifiers is None:
+            # Blank row.
+            return 0
+        blocking_key = self.blocking_key(identifiers)
+        if blocking_key is None:
+            return 0
+        digest = hashlib.blake2b(blocking_key.encode('utf8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % self.partition_cnt
+
+    def partition_ws(self, client_info, ws_name, partition_wbs, row_cnts):
+        """
+        Split the rows of a content worksheet into the partition
+        workbooks, counting the rows of each partition in row_cnts.
+        """
+        content_ws = ContentWorksheet(
+            client_info.cliprt_wb,
+            ws_name,
+            client_info.ded_processor,
+            client_info.client_reg,
+            client_info.identifier_reg,
+            client_info.dest_ws_reg
+            )
+        content_ws.build_etl_map()
+        rows = content_ws.cliprt_ws.iter_rows(
+            min_row=content_ws.min_row,
+            max_row=content_ws.max_row,
+            values_only=True
+            )
+        header_row = next(rows, None)
+        if header_row is None:
+            return False
+        partition_wss = []
+        for partition_wb in partition_wbs:
+            partition_ws = partition_wb.create_sheet(ws_name)
+            partition_ws.append(header_row)
+            partition_wss.append(partition_ws)
+        for row_idx, row in enumerate(rows, start=content_ws.min_row + 1):
+            partition_idx = self.partition_idx(content_ws, row_idx, row)
+            partition_wss[partition_idx].append(row)
+            row_cnts[partition_idx] += 1
+        return True
+
+    def read_partial_state(self, client_info, state_filename):
+        """
+        The reports state of a partial state file, which must have been
+        created with the DED of the workbook.
+        """
+        with gzip.open(state_filename, 'rt', encoding='utf8') as state_file:
+            state = json.load(state_file)
+        if state['version'] != self.VERSION or\
+                state['reports']['ded_hash'] != client_info.ded_processor.ded_content_hash():
+            # Fatal error
+            raise Exception(self.cliprt.msg(4020).format(
+                state_filename,
+                client_info.cliprt_wb_filename
+                ))
+        return state['reports']
+
+    def resolve_partition(self, partition_filename, state_filename=None):
+        """
+        Resolve the client identities of a partition workbook and save
+        the partial state for the merge.  Client ids are hashed so that
+        the partitions do not hand out the same client ids.  Returns the
+        partial state file name.
+        """
+        if state_filename is None:
+            state_filename = partition_filename + self.PARTIAL_STATE_SUFFIX
+        client_info = ClientInformationWorkbook(partition_filename)
+        client_info.enable_hashed_client_ids()
+        client_info.create_client_reports(True, save_wb=False)
+        state = {
+            'version': self.VERSION,
+            'reports': client_info.export_state(),
+            }
+        tmp_filename = state_filename + '.tmp'
+        with gzip.open(tmp_filename, 'wt', encoding='utf8', compresslevel=1)\
+                as state_file:
+            json.dump(state, state_file, separators=(',', ':'), default=str)
+        os.replace(tmp_filename, state_filename)
+        CLIPRT_LOGGER.info(
+            6071,
+            partition_filename,
+            len(client_info.client_reg.client_id_list),
+            state_filename
+            )
+        return state_filename
+
+    def save_partition_wbs(self, partition_wbs, partitions_dir, row_cnts):
+        """
+        Save the partition workbooks to partitions_dir.  Returns the
+        partition workbook file names.
+        """
+        os.makedirs(partitions_dir, exist_ok=True)
+        partition_filenames = []
+        for partition_idx, partition_wb in enumerate(partition_wbs):
+            partition_filename = os.path.join(
+                partitions_dir,
+                self.PARTITION_FILENAME.format(partition_idx + 1)
+                )
+            partition_wb.save(partition_filename)
+            partition_filenames.append(partition_filename)
+            CLIPRT_LOGGER.info(6070, partition_filename, row_cnts[partition_idx])
+        return partition_filenames
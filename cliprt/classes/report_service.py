@@ -0,0 +1,633 @@
+#!/usr/bin/env python
+#pylint: disable=too-many-instance-attributes
+#pylint: disable=too-many-arguments
+#pylint: disable=too-few-public-methods
+#pylint: disable=too-many-public-methods
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.ded_cache import DedCache
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class ReportJob:
+    """
+    A client information workbook submitted to the report service, its
+    status and its progress.  Jobs are updated from the events sent by
+    the report workers and read by the service, so the updates are
+    serialized.
+    """
+    # Job statuses.
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, job_id, upload_filename, wb_filename):
+        """
+        Queue a new job.  Uploaded CSV sources are converted to the
+        workbook when the job is run.
+        """
+        # Class attributes.
+        self.error = None
+        self.events = []
+        self.finished_secs = None
+        self.finished_time = None
+        self.job_id = job_id
+        self.lock = threading.Lock()
+        self.progress = {}
+        self.status = self.QUEUED
+        self.submitted_time = time.perf_counter()
+        self.upload_filename = upload_filename
+        self.wb_filename = wb_filename
+        self.add_event({'status': self.QUEUED})
+
+    def add_event(self, event):
+        """
+        Record a status or progress event for the progress stream.
+        """
+        with self.lock:
+            event['job_id'] = self.job_id
+            self.events.append(event)
+
+    def is_finished(self):
+        """
+        Determine if the job is done, or has failed.
+        """
+        return self.status in (self.DONE, self.FAILED)
+
+    def set_status(self, status, error=None):
+        """
+        Update the job status.
+        """
+        with self.lock:
+            self.status = status
+            self.error = error
+            if self.is_finished():
+                self.finished_time = time.perf_counter()
+                self.finished_secs = self.finished_time - self.submitted_time
+        event = {'status': status}
+        if error is not None:
+            event['error'] = error
+        self.add_event(event)
+
+    def status_report(self):
+        """
+        The job status, for the service clients.
+        """
+        with self.lock:
+            return {
+                'job_id': self.job_id,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'error': self.error,
+                }
+
+    def update_progress(self, ws_name, rows_done, rows_total):
+        """
+        Content worksheet progress listener.
+        """
+        with self.lock:
+            self.progress[ws_name] = {
+                'rows_done': rows_done,
+                'rows_total': rows_total,
+                }
+        self.add_event({
+            'status': self.RUNNING,
+            'ws_name': ws_name,
+            'rows_done': rows_done,
+            'rows_total': rows_total,
+            })
+
+class ReportService:
+    """
+    Long-running report service.  Client information workbooks, or zip
+    archives of CSV sources, are uploaded over HTTP and queued to a pool
+    of report worker processes.  The workers stay warm, so the startup
+    costs are only paid once, and each worker caches the compiled DEDs
+    so that repeated submissions of a DED skip the DED hydration.  The
+    workers send the job events back to the service over a queue.
+
+        POST /jobs                  upload; returns the job id
+        GET  /jobs/<id>             job status
+        GET  /jobs/<id>/progress    stream of newline delimited JSON
+                                    events until the job is finished
+        GET  /jobs/<id>/report      the finished workbook
+
+    Finished jobs, and their files, are removed once they are older
+    than the job time to live, or when more than max_jobs jobs are
+    kept.
+    """
+    # Largest accepted upload.
+    MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+    # How often the progress stream checks for new events.
+    PROGRESS_POLL_SECS = 0.1
+
+    # Content types.
+    JSON_TYPE = 'application/json'
+    NDJSON_TYPE = 'application/x-ndjson'
+    XLSX_TYPE =\
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    # HTTP status reason phrases.
+    REASONS = {
+        200: 'OK',
+        202: 'Accepted',
+        400: 'Bad Request',
+        404: 'Not Found',
+        405: 'Method Not Allowed',
+        409: 'Conflict',
+        411: 'Length Required',
+        413: 'Payload Too Large',
+        415: 'Unsupported Media Type',
+        }
+
+    # The compiled DED cache and the job events queue of a report worker
+    # process, set when the worker starts.
+    worker_ded_cache = None
+    worker_events = None
+
+    def __init__(
+            self,
+            host='127.0.0.1',
+            port=8080,
+            worker_cnt=2,
+            ded_cache_size=32,
+            jobs_dir=None,
+            *,
+            max_jobs=1000,
+            job_ttl_secs=24 * 60 * 60
+        ):
+        """
+        Configure the service.  Uploads and reports are kept in the jobs
+        directory, a temporary directory by default.
+        """
+        # Dependencies.
+        self.cliprt = MESSAGE_REGISTRY
+
+        # Class attributes.
+        self.ded_cache_hits = 0
+        self.ded_cache_misses = 0
+        self.ded_cache_size = ded_cache_size
+        self.event_reader = None
+        self.executor = None
+        self.host = host
+        self.job_events = None
+        self.job_ttl_secs = job_ttl_secs
+        self.jobs = {}
+        self.jobs_dir = jobs_dir
+        self.jobs_dir_is_temporary = jobs_dir is None
+        self.max_jobs = max_jobs
+        self.port = port
+        self.server = None
+        self.worker_cnt = worker_cnt
+
+    def apply_job_event(self, job, event):
+        """
+        Apply an event sent by a report worker to its job.
+        """
+        if 'rows_done' in event:
+            job.update_progress(event['ws_name'], event['rows_done'], event['rows_total'])
+        elif event['status'] == ReportJob.FAILED:
+            job.set_status(ReportJob.FAILED, event['error'])
+            CLIPRT_LOGGER.error(7003, job.job_id, event['error'])
+        elif event['status'] == ReportJob.DONE:
+            if event['ded_cached']:
+                self.ded_cache_hits += 1
+            else:
+                self.ded_cache_misses += 1
+            job.set_status(ReportJob.DONE)
+            CLIPRT_LOGGER.info(7002, job.job_id, job.finished_secs)
+        else:
+            job.set_status(event['status'])
+        return True
+
+    @staticmethod
+    def csv_archive_to_workbook(archive, wb_filename):
+        """
+        Convert a zip archive of CSV sources, as created by the
+        synthetic workbook generator, into a client information
+        workbook.  Each CSV file becomes a worksheet named after the
+        file.  The DED.csv file is required.
+        """
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        csv_names = sorted(
+            name for name in archive.namelist() if name.lower().endswith('.csv')
+            )
+        ws_names = {name: os.path.basename(name)[:-4] for name in csv_names}
+        ded_ws_name = ClientInformationWorkbook.DED_WS_NAME
+        if ded_ws_name not in ws_names.values():
+            return False
+
+        cliprt_wb = openpyxl.Workbook(write_only=True)
+        csv_names.sort(key=lambda name: ws_names[name] != ded_ws_name)
+        for csv_name in csv_names:
+            cliprt_ws = cliprt_wb.create_sheet(ws_names[csv_name][:31])
+            with archive.open(csv_name) as csv_file:
+                for row in csv.reader(io.TextIOWrapper(csv_file, 'utf-8-sig')):
+                    cliprt_ws.append([value if value else None for value in row])
+        cliprt_wb.save(wb_filename)
+        return True
+
+    async def handle_connection(self, reader, writer):
+        """
+        Handle one HTTP request.  Connections are not kept alive.
+        """
+        try:
+            request = await self.read_request(reader)
+            if isinstance(request, tuple) and isinstance(request[0], int):
+                # The request could not be read.
+                await self.send_response(writer, *request)
+            else:
+                await self.route(writer, *request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The client went away.
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def error_response(self, status, msg_no, *args):
+        """
+        A JSON error response with a message registry message.
+        """
+        return (
+            status,
+            self.JSON_TYPE,
+            json.dumps({'error': self.cliprt.msg(msg_no).format(*args)})
+            )
+
+    def evict_jobs(self):
+        """
+        Forget the finished jobs that are older than the job time to
+        live, and the oldest finished jobs while there are max_jobs jobs
+        or more, to make room for a new job.  Returns the evicted jobs,
+        whose files are still to be removed.
+        """
+        now = time.perf_counter()
+        kept_cnt = len(self.jobs)
+        evicted_jobs = []
+        # The jobs are kept in the order they were submitted.
+        for job in list(self.jobs.values()):
+            if not job.is_finished():
+                continue
+            if kept_cnt >= self.max_jobs or now - job.finished_time > self.job_ttl_secs:
+                del self.jobs[job.job_id]
+                evicted_jobs.append(job)
+                kept_cnt -= 1
+        if evicted_jobs:
+            CLIPRT_LOGGER.info(7004, len(evicted_jobs))
+        return evicted_jobs
+
+    def get_job(self, job_id):
+        """
+        Return the job, or None if there is no such job.
+        """
+        return self.jobs.get(job_id)
+
+    def job_failed(self, job, future):
+        """
+        Fail a job whose report worker was lost.  The job events of the
+        jobs that finish are sent by the workers themselves.
+        """
+        if future.cancelled() or future.exception() is None or job.is_finished():
+            return False
+        CLIPRT_LOGGER.error(7003, job.job_id, future.exception())
+        job.set_status(ReportJob.FAILED, str(future.exception()))
+        return True
+
+    async def read_request(self, reader):
+        """
+        Read the request line, the headers and the body.  Returns the
+        method, the path and the body, or an error response.
+        """
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            return self.error_response(400, 7015)
+        method, path = request_line[0].upper(), request_line[1]
+        headers = {}
+        while True:
+            header_line = (await reader.readline()).decode('latin-1')
+            if header_line in ('\r\n', '\n', ''):
+                break
+            name, _, value = header_line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        body = b''
+        if method == 'POST':
+            if 'content-length' not in headers or\
+                    not headers['content-length'].isdigit():
+                return self.error_response(411, 7016)
+            content_length = int(headers['content-length'])
+            if content_length > self.MAX_UPLOAD_BYTES:
+                return self.error_response(413, 7012, self.MAX_UPLOAD_BYTES)
+            body = await reader.readexactly(content_length)
+        return method, path.split('?', 1)[0].rstrip('/'), body
+
+    async def route(self, writer, method, path, body):
+        """
+        Dispatch the request.
+        """
+        path_parts = path.strip('/').split('/')
+        if path_parts[0] != 'jobs' or len(path_parts) > 3:
+            await self.send_response(writer, *self.error_response(404, 7017, path))
+            return
+        if len(path_parts) == 1:
+            if method != 'POST':
+                await self.send_response(writer, *self.error_response(405, 7018, method))
+                return
+            await self.send_response(writer, *await self.submit_job(body))
+            return
+
+        if method != 'GET':
+            await self.send_response(writer, *self.error_response(405, 7018, method))
+            return
+        job = self.get_job(path_parts[1])
+        if job is None:
+            await self.send_response(writer, *self.error_response(404, 7010, path_parts[1]))
+            return
+        if len(path_parts) == 2:
+            await self.send_response(
+                writer,
+                200,
+                self.JSON_TYPE,
+                json.dumps(job.status_report())
+                )
+        elif path_parts[2] == 'progress':
+            await self.stream_progress(writer, job)
+        elif path_parts[2] == 'report':
+            await self.send_response(writer, *await self.report_response(job))
+        else:
+            await self.send_response(writer, *self.error_response(404, 7017, path))
+
+    def read_job_events(self):
+        """
+        Apply the job events sent by the report workers until the
+        service stops.  Runs in a thread of its own.
+        """
+        while True:
+            job_event = self.job_events.get()
+            if job_event is None:
+                return True
+            job_id, event = job_event
+            job = self.get_job(job_id)
+            if job is not None:
+                self.apply_job_event(job, event)
+
+    @staticmethod
+    def read_report(wb_filename):
+        """
+        Read a finished workbook.
+        """
+        with open(wb_filename, 'rb') as wb_file:
+            return wb_file.read()
+
+    @staticmethod
+    def remove_job_files(jobs):
+        """
+        Remove the uploads and the workbooks of the jobs.
+        """
+        for job in jobs:
+            # The upload of a workbook is the workbook.
+            for filename in (job.upload_filename, job.wb_filename):
+                if os.path.exists(filename):
+                    os.remove(filename)
+        return True
+
+    async def report_response(self, job):
+        """
+        The finished workbook, with its client report worksheets.  The
+        workbook is read off the event loop.
+        """
+        if job.status != ReportJob.DONE:
+            return self.error_response(409, 7011, job.job_id, job.status)
+        wb_bytes = await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.read_report,
+            job.wb_filename
+            )
+        return 200, self.XLSX_TYPE, wb_bytes
+
+    @staticmethod
+    def run_job(job_id, upload_filename, wb_filename):
+        """
+        Create the client reports for a job.  Runs in a report worker
+        process, and sends the job events back to the service.
+        """
+        worker_events = ReportService.worker_events
+        ded_cache = ReportService.worker_ded_cache
+        worker_events.put((job_id, {'status': ReportJob.RUNNING}))
+        ded_cache_hits = ded_cache.hits
+        try:
+            if upload_filename != wb_filename:
+                with zipfile.ZipFile(upload_filename) as archive:
+                    if not ReportService.csv_archive_to_workbook(archive, wb_filename):
+                        raise Exception(MESSAGE_REGISTRY.msg(7014))
+            client_info = ClientInformationWorkbook(wb_filename)
+            if not client_info.has_a_ded_ws():
+                raise Exception(MESSAGE_REGISTRY.msg(1002))
+            client_info.ded_cache = ded_cache
+            client_info.progress_listener =\
+                lambda ws_name, rows_done, rows_total: worker_events.put((job_id, {
+                    'ws_name': ws_name,
+                    'rows_done': rows_done,
+                    'rows_total': rows_total,
+                    }))
+            client_info.create_client_reports(True)
+        except Exception as err: #pylint: disable=broad-except
+            # Report the failure to the service client rather than
+            # losing the worker.
+            worker_events.put((job_id, {'status': ReportJob.FAILED, 'error': str(err)}))
+            return False
+        worker_events.put((job_id, {
+            'status': ReportJob.DONE,
+            'ded_cached': ded_cache.hits > ded_cache_hits,
+            }))
+        return True
+
+    @staticmethod
+    def save_upload(upload_filename, body):
+        """
+        Save an upload.
+        """
+        with open(upload_filename, 'wb') as upload_file:
+            upload_file.write(body)
+        return True
+
+    async def send_response(self, writer, status, content_type, body):
+        """
+        Write a complete response.
+        """
+        if isinstance(body, str):
+            body = body.encode('utf8')
+        writer.write(
+            f'HTTP/1.1 {status} {self.REASONS[status]}\r\n'\
+            f'Content-Type: {content_type}\r\n'\
+            f'Content-Length: {len(body)}\r\n'\
+            'Connection: close\r\n\r\n'.encode('latin-1') + body
+            )
+        await writer.drain()
+
+    async def serve_forever(self):
+        """
+        Run the service until it is cancelled.
+        """
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def start(self):
+        """
+        Start the report workers and start listening.
+        """
+        # Imported on first use to keep the startup fast.
+        #pylint: disable=import-outside-toplevel
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if self.jobs_dir is None:
+            self.jobs_dir = tempfile.mkdtemp(prefix='cliprt_jobs_')
+        ctx = multiprocessing.get_context('spawn')
+        self.job_events = ctx.Queue()
+        self.event_reader = threading.Thread(
+            target=self.read_job_events,
+            name='cliprt_job_events',
+            daemon=True
+            )
+        self.event_reader.start()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.worker_cnt,
+            mp_context=ctx,
+            initializer=self.start_worker,
+            initargs=(self.ded_cache_size, self.job_events)
+            )
+        self.server = await asyncio.start_server(
+            self.handle_connection,
+            self.host,
+            self.port
+            )
+        # The port is chosen by the system when port 0 is requested.
+        self.port = self.server.sockets[0].getsockname()[1]
+        CLIPRT_LOGGER.info(7000, self.host, self.port)
+        return True
+
+    @staticmethod
+    def start_worker(ded_cache_size, worker_events):
+        """
+        Set up a report worker process.
+        """
+        ReportService.worker_ded_cache = DedCache(ded_cache_size)
+        ReportService.worker_events = worker_events
+        return True
+
+    async def stop(self):
+        """
+        Stop listening, let the report workers finish and remove the
+        temporary jobs directory.
+        """
+        if self.server is None:
+            return False
+        self.server.close()
+        await self.server.wait_closed()
+        self.server = None
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.executor.shutdown
+            )
+        self.executor = None
+        # The workers are gone, so the last job events are queued.
+        self.job_events.put(None)
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.event_reader.join
+            )
+        self.event_reader = None
+        self.job_events.close()
+        self.job_events = None
+        if self.jobs_dir_is_temporary:
+            shutil.rmtree(self.jobs_dir, ignore_errors=True)
+            self.jobs_dir = None
+        return True
+
+    async def stream_progress(self, writer, job):
+        """
+        Stream the job events as newline delimited JSON until the job is
+        finished.  The end of the stream is marked by closing the
+        connection.
+        """
+        writer.write(
+            'HTTP/1.1 200 OK\r\n'\
+            f'Content-Type: {self.NDJSON_TYPE}\r\n'\
+            'Connection: close\r\n\r\n'.encode('latin-1')
+            )
+        event_idx = 0
+        while True:
+            is_finished = job.is_finished()
+            with job.lock:
+                events = job.events[event_idx:]
+            event_idx += len(events)
+            for event in events:
+                writer.write(json.dumps(event).encode('utf8') + b'\n')
+            await writer.drain()
+            if is_finished:
+                return True
+            await asyncio.sleep(self.PROGRESS_POLL_SECS)
+
+    async def submit_job(self, body):
+        """
+        Save the upload and queue the job.  Workbooks and zip archives
+        of CSV sources are both zip files; workbooks are recognized by
+        their content types part.  The finished jobs that have expired
+        are removed first.
+        """
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(body))
+        except zipfile.BadZipFile:
+            return self.error_response(415, 7013)
+
+        with archive:
+            is_workbook = '[Content_Types].xml' in archive.namelist()
+        loop = asyncio.get_running_loop()
+        evicted_jobs = self.evict_jobs()
+        if evicted_jobs:
+            await loop.run_in_executor(None, self.remove_job_files, evicted_jobs)
+        job_id = uuid.uuid4().hex
+        wb_filename = os.path.join(self.jobs_dir, f'{job_id}.xlsx')
+        upload_filename = wb_filename if is_workbook\
+            else os.path.join(self.jobs_dir, f'{job_id}.zip')
+        await loop.run_in_executor(None, self.save_upload, upload_filename, body)
+
+        job = ReportJob(job_id, upload_filename, wb_filename)
+        self.jobs[job_id] = job
+        CLIPRT_LOGGER.info(7001, job_id)
+        self.executor.submit(
+            self.run_job,
+            job_id,
+            upload_filename,
+            wb_filename
+            ).add_done_callback(lambda future: self.job_failed(job, future))
+        return (
+            202,
+            self.JSON_TYPE,
+            json.dumps({'job_id': job_id, 'status': job.status})
+            )
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import itertools
+import os
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class ReportSharder:
+    """
+    Excel worksheets are limited to 1,048,576 rows.  A client report
+    with more client rows than the shard size is split into shards,
+    e.g. comm_report_for_ims_1, comm_report_for_ims_2, each with the
+    column headings.  The shards are either worksheets of the workbook
+    or separate workbook files; the shard files are independent, so
+    they are written in parallel.
+    """
+    def __init__(self, shard_size=None, shard_dir=None, max_workers=None):
+        """
+        Shard the reports with more than shard_size client rows.  If
+        shard_dir is provided, the shards are written to workbook files
+        in shard_dir, by up to max_workers processes.
+        """
+        # Class attributes.
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.shard_dir = shard_dir
+        self.shard_filenames = []
+        self.shard_writes = []
+        self.shard_size = CLIPRT_SETTINGS.report_shard_size\
+            if shard_size is None else shard_size
+
+    @staticmethod
+    def add_shard_ws(cliprt_wb, ws_idx, ws_name, rows):
+        """
+        Add a shard to the workbook as a worksheet.
+        """
+        shard_ws = cliprt_wb.create_sheet(ws_name, ws_idx)
+        for row in rows:
+            shard_ws.append(row)
+        return shard_ws
+
+    def shard_cnt(self, dest_ws):
+        """
+        The number of shards of a report, or 0 if the report fits in one
+        worksheet.
+        """
+        if dest_ws.row_cnt() <= self.shard_size:
+            return 0
+        return -(-dest_ws.row_cnt() // self.shard_size)
+
+    def shard_report(self, cliprt_wb, dest_ws, pool=None):
+        """
+        Move the client rows of a report to its shards, last shard
+        first, deleting the rows from the report worksheet as they are
+        moved, so that only the rows of the shards being written by the
+        worker processes are held twice.  The report worksheet, with the
+        first client rows left in it, becomes the first shard, unless
+        the shards are written to files.  Buffered rows stay in the row
+        buffer, and the shard worksheets only get the column headings
+        until the rows are streamed to the workbook file.
+        """
+        cliprt_ws = dest_ws.cliprt_ws
+        max_col = max(dest_ws.next_col_idx - 1, 1)
+        headings = next(cliprt_ws.iter_rows(
+            min_row=dest_ws.first_row_idx,
+            max_row=dest_ws.first_row_idx,
+            max_col=max_col,
+            values_only=True
+            ))
+        ws_idx = cliprt_wb.sheetnames.index(dest_ws.cliprt_ws_name)
+        shard_ws_names = [
+            dest_ws.shard_ws_name(shard_no)
+            for shard_no in range(1, self.shard_cnt(dest_ws) + 1)
+            ]
+        is_buffered = dest_ws.row_buffer is not None
+        for shard_no in range(len(shard_ws_names), 0, -1):
+            ws_name = shard_ws_names[shard_no - 1]
+            min_row = dest_ws.first_row_idx + 1 + (shard_no - 1) * self.shard_size
+            max_row = min(min_row + self.shard_size, dest_ws.next_row_idx) - 1
+            rows = dest_ws.iter_rows(min_row, max_row)
+            if self.shard_dir is not None:
+                self.write_shard(
+                    pool,
+                    os.path.join(self.shard_dir, f'{ws_name}.xlsx'),
+                    ws_name,
+                    itertools.chain([headings], rows)
+                    )
+            elif shard_no == 1:
+                cliprt_ws.title = ws_name
+                break
+            else:
+                self.add_shard_ws(
+                    cliprt_wb,
+                    ws_idx + 1,
+                    ws_name,
+                    itertools.chain([headings], [] if is_buffered else rows)
+                    )
+            if not is_buffered:
+                cliprt_ws.delete_rows(min_row, amount=max_row - min_row + 1)
+        if self.shard_dir is not None:
+            cliprt_wb.remove(cliprt_ws)
+        dest_ws.shard_size = self.shard_size
+        dest_ws.shard_ws_names = shard_ws_names
+        CLIPRT_LOGGER.info(
+            6110,
+            dest_ws.cliprt_ws_name,
+            dest_ws.row_cnt(),
+            ', '.join(shard_ws_names)
+            )
+        return shard_ws_names
+
+    def shard_reports(self, cliprt_wb, dest_ws_reg):
+        """
+        Shard the reports with more client rows than the shard size.
+        The shard files are written by up to max_workers processes.
+        """
+        dest_ws_list = [
+            dest_ws for dest_ws in dest_ws_reg.dest_ws_by_ind_list.values()
+            if self.shard_cnt(dest_ws)
+            ]
+        worker_cnt = 0 if self.shard_dir is None else min(
+            self.max_workers,
+            sum(self.shard_cnt(dest_ws) for dest_ws in dest_ws_list)
+            )
+        if worker_cnt <= 1:
+            for dest_ws in dest_ws_list:
+                self.shard_report(cliprt_wb, dest_ws)
+            return True
+
+        # Imported on first use to keep the startup fast.
+        import multiprocessing #pylint: disable=import-outside-toplevel
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(worker_cnt) as pool:
+            for dest_ws in dest_ws_list:
+                self.shard_report(cliprt_wb, dest_ws, pool)
+            while self.shard_writes:
+                self.shard_filenames.append(self.shard_writes.pop(0).get())
+        return True
+
+    def write_shard(self, pool, filename, ws_name, rows):
+        """
+        Write a shard file, in a worker process if there is a pool.  At
+        most max_workers shards are held in memory while they are
+        written.
+        """
+        if pool is None:
+            self.shard_filenames.append(self.write_shard_file(filename, ws_name, rows))
+            return True
+        if len(self.shard_writes) >= self.max_workers:
+            self.shard_filenames.append(self.shard_writes.pop(0).get())
+        self.shard_writes.append(
+            pool.apply_async(self.write_shard_file, (filename, ws_name, list(rows)))
+            )
+        return True
+
+    @staticmethod
+    def write_shard_file(filename, ws_name, rows):
+        """
+        Write a shard to a workbook file of its own.
+        """
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        shard_wb = openpyxl.Workbook(write_only=True)
+        shard_ws = shard_wb.create_sheet(ws_name)
+        for row in rows:
+            shard_ws.append(row)
+        shard_wb.save(filename)
+        return filename
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import csv
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.identifier import Identifier
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class RowQuarantine:
+    """
+    Error-tolerant mode: a content row that fails is set aside with the
+    worksheet, row, column and error rather than aborting the run.  The
+    quarantined rows are saved to a quarantine worksheet, or to a CSV
+    file, once the client reports are created.  The run is aborted once
+    more rows fail than the error budget allows.
+    """
+    # Quarantine worksheet and CSV file column headings.
+    HEADINGS = ['worksheet', 'row', 'column', 'error']
+
+    def __init__(self, error_budget=None, csv_filename=None):
+        """
+        Quarantine up to error_budget rows.  If csv_filename is provided
+        the quarantined rows are saved there rather than to a worksheet.
+        """
+        # Class attributes.
+        self.cliprt = MESSAGE_REGISTRY
+        self.csv_filename = csv_filename
+        self.error_budget = CLIPRT_SETTINGS.quarantine_error_budget\
+            if error_budget is None else error_budget
+        self.rows = []
+        self.settings = CLIPRT_SETTINGS
+
+    def export_state(self):
+        """
+        Compact state of the quarantined rows for checkpoints.
+        """
+        return {'rows': self.rows}
+
+    def failing_col_name(self, content_ws, row_idx):
+        """
+        The heading of the first column of the row whose value cannot be
+        made into an identifier or formatted for the reports, or None
+        if the failure is not down to a single value.
+        """
+        formatters = {
+            self.settings.date_format: self.settings.format_date,
+            self.settings.name_format: self.settings.format_name,
+            self.settings.phone_format: self.settings.format_phone,
+            }
+        cliprt_ws = content_ws.cliprt_ws
+        for de_name, col_idx in content_ws.projected_cols:
+            de_value = cliprt_ws.cell(row_idx, col_idx).value
+            if de_value is None or de_name not in content_ws.ded:
+                continue
+            try:
+                if de_name in content_ws.identifier_col_names:
+                    Identifier(de_name, de_value, content_ws.ded)
+                formatters.get(content_ws.ded[de_name].dest_de_format, str)(de_value)
+            except Exception: #pylint: disable=broad-except
+                return cliprt_ws.cell(content_ws.min_row, col_idx).value
+        return None
+
+    def import_state(self, state):
+        """
+        Restore the quarantined rows from a checkpoint.
+        """
+        self.rows = [tuple(row) for row in state['rows']]
+        return True
+
+    def quarantine_row(self, content_ws, row_idx, err):
+        """
+        Set a failed row aside.  Once the error budget is spent the run
+        is aborted.
+        """
+        col_name = self.failing_col_name(content_ws, row_idx)
+        error = f'{type(err).__name__}: {err}'
+        self.rows.append((content_ws.cliprt_ws_name, row_idx, col_name, error))
+        CLIPRT_LOGGER.warning(6090, content_ws.cliprt_ws_name, row_idx, col_name, error)
+        if len(self.rows) > self.error_budget:
+            # Fatal error
+            raise Exception(
+                self.cliprt.msg(4030).format(len(self.rows), self.error_budget)
+                ) from err
+        return True
+
+    def save(self, cliprt_wb, quarantine_ws_name):
+        """
+        Save the quarantined rows to the CSV file or to the quarantine
+        worksheet, which replaces that of a previous run.
+        """
+        if quarantine_ws_name in cliprt_wb.sheetnames:
+            cliprt_wb.remove(cliprt_wb[quarantine_ws_name])
+        if self.csv_filename is not None:
+            with open(self.csv_filename, 'w', newline='', encoding='utf8') as csv_file:
+                csv_writer = csv.writer(csv_file)
+                csv_writer.writerow(self.HEADINGS)
+                csv_writer.writerows(self.rows)
+            CLIPRT_LOGGER.info(6091, len(self.rows), self.csv_filename)
+            return True
+        if not self.rows:
+            return False
+        quarantine_ws = cliprt_wb.create_sheet(quarantine_ws_name)
+        quarantine_ws.append(self.HEADINGS)
+        for row in self.rows:
+            quarantine_ws.append(row)
+        CLIPRT_LOGGER.info(6091, len(self.rows), quarantine_ws_name)
+        return True
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import gzip
+import hashlib
+import json
+import os
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
+
+class RunState:
+    """
+    The state of the last run, for incremental runs.  A content hash is
+    kept for each row of each content worksheet, along with the client
+    the row was resolved to, as well as the client reports state.  The
+    next run restores the client reports and only resolves the rows
+    that are new or changed.  The rows are hashed as they are processed,
+    so each content worksheet is read once.  The existing destination
+    rows are updated in place.
+
+    Rows are recognized by their contents rather than their position,
+    so inserting or sorting rows does not cause them to be reprocessed.
+    Values from rows that were since changed or removed stay in the
+    reports until the next full run.  If the registries are persisted in
+    a registry store the identifiers are left to the store.
+    """
+    # Run state file name suffix.
+    RUN_STATE_SUFFIX = '.run_state.json.gz'
+
+    # Run state layout version.
+    VERSION = 2
+
+    def __init__(self, client_info):
+        """
+        Keep the run state of the client information workbook.  The run
+        state is kept next to the workbook, so the workbook needs a file
+        name.
+        """
+        # Dependency injections.
+        self.client_info = client_info
+
+        # Class attributes.
+        self.cliprt = MESSAGE_REGISTRY
+        if client_info.cliprt_wb_filename is None:
+            # Fatal error
+            raise Exception(self.cliprt.msg(4012))
+        self.prev_row_clients = {}
+        self.prev_ws_states = {}
+        self.row_hashes = {}
+        self.run_state_filename =\
+            client_info.cliprt_wb_filename + self.RUN_STATE_SUFFIX
+        self.ws_states = {}
+
+    def exists(self):
+        """
+        Determine if there is a previous run to build on.
+        """
+        return os.path.exists(self.run_state_filename)
+
+    def export_state(self):
+        """
+        Compact state of the rows resolved so far for checkpoints: the
+        column headings hash and the client of each row, by content
+        worksheet.
+        """
+        return dict(self.ws_states)
+
+    @staticmethod
+    def hash_row(row):
+        """
+        Hash the values of a row.
+        """
+        return hashlib.blake2b(repr(row).encode('utf8'), digest_size=8).hexdigest()
+
+    def is_new_row(self, ws_name, row_idx, row):
+        """
+        Hash the values of a row of the content worksheet and determine
+        if the row is new or changed since the previous run.  Rows seen
+        before keep their client.
+        """
+        row_hash = self.hash_row(row)
+        prev_row_clients = self.prev_row_clients[ws_name]
+        if prev_row_clients is not None and row_hash in prev_row_clients:
+            self.ws_states[ws_name]['row_clients'][row_hash] =\
+                prev_row_clients[row_hash]
+            return False
+        self.row_hashes[ws_name][row_idx] = row_hash
+        return True
+
+    def import_state(self, state):
+        """
+        Restore the rows resolved before a checkpoint.  The worksheet
+        in progress at the checkpoint keeps its rows when it is started
+        again.
+        """
+        self.ws_states = dict(state)
+        return True
+
+    def load(self):
+        """
+        Read the state of the previous run.  Returns the client reports
+        state of the previous run, or None if there is no previous run.
+        """
+        if not self.exists():
+            return None
+        with gzip.open(self.run_state_filename, 'rt', encoding='utf8')\
+                as run_state_file:
+            state = json.load(run_state_file)
+        if state['version'] != self.VERSION:
+            return None
+        self.prev_ws_states = state['ws_states']
+        return state['reports']
+
+    def restore(self):
+        """
+        Restore the client reports of the previous run.  If there is no
+        previous run, or the DED has changed since, everything is
+        processed.
+        """
+        reports_state = self.load()
+        if reports_state is None:
+            return False
+        if not self.client_info.import_state(reports_state):
+            CLIPRT_LOGGER.warning(6043, self.run_state_filename)
+            self.prev_ws_states = {}
+            return False
+        return True
+
+    def row_resolved(self, ws_name, row_idx, identity):
+        """
+        Record the client the row was resolved to.  Rows without any
+        useful identifiers are recorded too, so that they are not
+        processed again.
+        """
+        row_hash = self.row_hashes[ws_name][row_idx]
+        self.ws_states[ws_name]['row_clients'][row_hash] =\
+            None if identity is None else identity.client_idno
+        return True
+
+    def save(self):
+        """
+        Save the run state for the next run.  The state is written to a
+        temporary file first so that a failure while saving does not
+        lose the previous state.
+        """
+        state = {
+            'version': self.VERSION,
+            'ws_states': self.ws_states,
+            'reports': self.client_info.export_state(
+                include_identifiers=self.client_info.registry_store is None
+                ),
+            }
+        tmp_filename = self.run_state_filename + '.tmp'
+        with gzip.open(tmp_filename, 'wt', encoding='utf8', compresslevel=1)\
+                as run_state_file:
+            json.dump(state, run_state_file, separators=(',', ':'))
+        os.replace(tmp_filename, self.run_state_filename)
+        return True
+
+    def start_ws(self, ws_name, cliprt_ws, min_row):
+        """
+        Start on the rows of the content worksheet.  If the column
+        headings have changed since the previous run every row is
+        processed.
+        """
+        header_hash = self.hash_row(next(cliprt_ws.iter_rows(
+            min_row=min_row,
+            max_row=min_row,
+            values_only=True
+            )))
+        prev_ws_state = self.prev_ws_states.get(ws_name)
+        if prev_ws_state is not None and\
+                prev_ws_state['header_hash'] != header_hash:
+            prev_ws_state = None
+        self.prev_row_clients[ws_name] = None if prev_ws_state is None\
+            else prev_ws_state['row_clients']
+        self.row_hashes[ws_name] = {}
+        # Rows resolved before the checkpoint that this run resumed.
+        resumed_ws_state = self.ws_states.get(ws_name, {})
+        self.ws_states[ws_name] = {
+            'header_hash': header_hash,
+            'row_clients': dict(resumed_ws_state.get('row_clients', {})),
+            }
+        return True
+
+    def ws_processed(self, ws_name):
+        """
+        Report what changed in the content worksheet since the previous
+        run.
+        """
+        # The new or changed rows.
+        new_row_cnt = len(self.row_hashes[ws_name])
+        prev_row_clients = self.prev_row_clients[ws_name] or {}
+        stale_row_cnt = len(
+            prev_row_clients.keys() - self.ws_states[ws_name]['row_clients'].keys()
+            )
+        self.row_hashes[ws_name] = {}
+        if self.prev_row_clients[ws_name] is not None and\
+                not new_row_cnt and not stale_row_cnt:
+            CLIPRT_LOGGER.info(6040, ws_name)
+            return False
+        CLIPRT_LOGGER.info(6041, ws_name, new_row_cnt)
+        if stale_row_cnt:
+            CLIPRT_LOGGER.warning(6042, ws_name, stale_row_cnt)
+        return True
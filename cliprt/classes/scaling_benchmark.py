@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#pylint: disable=too-many-arguments
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+class ScalingBenchmark:
+    """
+    End-to-end scaling benchmark.  Synthetic workbooks of increasing
+    size are generated and the time and memory needed to create the
+    client reports are recorded for each size.
+    """
+    # Default benchmark sizes, in content rows.
+    DEFAULT_ROW_CNTS = [1000, 10000, 100000, 1000000]
+
+    def __init__(
+            self,
+            row_cnts=None,
+            *,
+            duplication_rate=0.25,
+            identifier_noise=0.25,
+            ded_shape='standard',
+            seed=1,
+            isolate=True
+        ):
+        """
+        Configure the benchmark.  The options after row_cnts are keyword
+        only.  Each size is run in its own process by default so that
+        the peak memory of one run is not inherited by the next.
+        """
+        # Class attributes.
+        self.row_cnts = row_cnts if row_cnts else self.DEFAULT_ROW_CNTS
+        self.duplication_rate = duplication_rate
+        self.identifier_noise = identifier_noise
+        self.ded_shape = ded_shape
+        self.seed = seed
+        self.isolate = isolate
+        self.results = []
+
+    def make_generator(self, row_cnt):
+        """
+        Create the synthetic workbook generator for a benchmark size.
+        """
+        return SyntheticWorkbookGenerator(
+            client_cnt=SyntheticWorkbookGenerator.client_cnt_for_rows(
+                row_cnt,
+                self.duplication_rate
+                ),
+            duplication_rate=self.duplication_rate,
+            identifier_noise=self.identifier_noise,
+            ded_shape=self.ded_shape,
+            seed=self.seed
+            )
+
+    def run(self, progress_reporting_is_disabled=True):
+        """
+        Run the benchmark for each of the requested sizes.
+        """
+        self.results = []
+        for row_cnt in self.row_cnts:
+            result = self.run_case(row_cnt)
+            if not progress_reporting_is_disabled:
+                print(self.format_result(result))
+            self.results.append(result)
+        return self.results
+
+    def run_case(self, row_cnt):
+        """
+        Generate a workbook with the requested number of content rows
+        and time the creation of its client reports.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wb_filename = os.path.join(tmp_dir, f'scaling_{row_cnt}.xlsx')
+            generator = self.make_generator(row_cnt)
+            generator.save_workbook(wb_filename)
+            generator.content_ws = {}
+            if self.isolate:
+                ctx = multiprocessing.get_context('spawn')
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(self.measure, (wb_filename,))
+            else:
+                result = self.measure(wb_filename)
+        result['row_cnt'] = generator.row_cnt
+        result['client_cnt'] = generator.client_cnt
+        result['rows_per_sec'] =\
+            round(generator.row_cnt / max(result['total_secs'], 1e-9), 1)
+        return result
+
+    @staticmethod
+    def measure(wb_filename):
+        """
+        Time the creation of the client reports for a workbook and
+        record the peak memory of the process.
+        """
+        start_time = time.perf_counter()
+        client_info = ClientInformationWorkbook(wb_filename)
+        load_time = time.perf_counter()
+        client_info.create_client_reports(True, save_wb=False)
+        report_time = time.perf_counter()
+        client_info.cliprt_wb.save(wb_filename)
+        save_time = time.perf_counter()
+        return {
+            'identified_client_cnt': len(client_info.client_reg.client_id_list),
+            'load_secs': round(load_time - start_time, 4),
+            'report_secs': round(report_time - load_time, 4),
+            'save_secs': round(save_time - report_time, 4),
+            'total_secs': round(save_time - start_time, 4),
+            'peak_memory_mb': ScalingBenchmark.peak_memory_mb(),
+            }
+
+    @staticmethod
+    def peak_memory_mb():
+        """
+        Peak resident memory of the current process.  Not available on
+        all platforms.
+        """
+        if resource is None:
+            return None
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            # Linux reports kilobytes, macOS reports bytes.
+            peak_memory *= 1024
+        return round(peak_memory / 2**20, 2)
+
+    @staticmethod
+    def format_result(result):
+        """
+        Format a benchmark result for the console.
+        """
+        return\
+            f"{result['row_cnt']:>9} rows: "\
+            f"{result['total_secs']:>9.2f}s total, "\
+            f"{result['report_secs']:>9.2f}s report, "\
+            f"{result['rows_per_sec']:>10.1f} rows/s, "\
+            f"{result['peak_memory_mb']} MB peak"
+
+    def save_results(self, results_filename):
+        """
+        Record the benchmark results.
+        """
+        with open(results_filename, 'w', encoding='utf8') as results_file:
+            json.dump(self.results, results_file, indent=2)
+        return results_filename
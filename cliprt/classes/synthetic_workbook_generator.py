@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+#pylint: disable=too-many-instance-attributes
+#pylint: disable=too-many-arguments
+#pylint: disable=import-error
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import csv
+import os
+import random
+import openpyxl
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class SyntheticWorkbookGenerator:
+    """
+    Generate deterministic, seeded client information workbooks (or
+    CSV sources) of any size.  Each client is spread over the content
+    worksheets, some clients are duplicated, and the identifiers are
+    made noisy in the same ways that real exports are noisy.  The
+    ground truth client number of every content row is retained so
+    that identity resolution results can be evaluated.
+    """
+    # Sample data used to build the client names.
+    FIRST_NAMES = [
+        'Alba', 'Bruce', 'Carmen', 'Dana', 'Elias', 'Fatima', 'Grace',
+        'Hiro', 'Ines', 'Jon', 'Keoni', 'Laura', 'Malia', 'Noa', 'Omar',
+        'Pua', 'Quinn', 'Rosa', 'Sam', 'Tomas', 'Uma', 'Vera', 'Wes',
+        'Xena', 'Yuki', 'Zane',
+        ]
+    LAST_NAMES = [
+        'Able', 'Actor', 'Baker', 'Chun', 'Diaz', 'Evans', 'Fong',
+        'Garcia', 'Hale', 'Ito', 'Jones', 'Kahale', 'Lee', 'Moore',
+        'Nakamura', 'Ortiz', 'Park', 'Reyes', 'Smith', 'Tanaka',
+        'Vega', 'Wong', 'Young',
+        ]
+    EMAIL_DOMAINS = ['gmail.not', 'yahoo.not', 'aol.not', 'hawaii.not']
+
+    # Phone number layouts used for the identifier noise.
+    PHONE_MASKS = [
+        '({}) {}-{}',
+        '{}-{}-{}',
+        '{}.{}.{}',
+        '{}{}{}',
+        '1-{}-{}-{}',
+        ]
+
+    # Destination worksheet indicators used by the generated DED.
+    DEST_WS_INDS = 'ims,fb'
+
+    # Valid DED shapes.
+    DED_SHAPES = ['minimal', 'standard', 'wide']
+
+    def __init__(
+            self,
+            client_cnt=1000,
+            *,
+            content_ws_cnt=3,
+            duplication_rate=0.25,
+            identifier_noise=0.25,
+            fragment_cols=True,
+            ded_shape='standard',
+            seed=1,
+            client_id_col=True,
+            household_rate=0.0,
+            typo_rate=0.0,
+            missing_rate=0.0
+        ):
+        """
+        Configure the generator.  The options after client_cnt are
+        keyword only.
+        - client_cnt: number of unique clients.
+        - content_ws_cnt: number of content worksheets.
+        - duplication_rate: average number of extra rows per client.
+        - identifier_noise: probability that an identifier value is
+            reformatted (phone layout, email case, padding).
+        - fragment_cols: split names into first/last name fragments on
+            every other content worksheet.
+        - ded_shape: 'minimal', 'standard' or 'wide' content columns.
+        - client_id_col: include the client id column.  The client ids
+            are unique per client, so they give the ground truth away
+            to identity resolution.
+        - household_rate: probability that a client lives with the
+            previous client, sharing the last name and the phone, and
+            half of the time the email.
+        - typo_rate: probability that a name or email value has a typo.
+        - missing_rate: probability that a phone or email value is
+            missing.
+        """
+        if ded_shape not in self.DED_SHAPES:
+            raise Exception(
+                f'Error: invalid DED shape "{ded_shape}". '\
+                f'Valid values: "{self.DED_SHAPES}".'
+                )
+
+        # Dependencies.
+        self.settings = CLIPRT_SETTINGS
+
+        # Class attributes.
+        self.client_cnt = client_cnt
+        self.content_ws_cnt = max(1, content_ws_cnt)
+        self.duplication_rate = duplication_rate
+        self.identifier_noise = identifier_noise
+        self.fragment_cols = fragment_cols
+        self.ded_shape = ded_shape
+        self.seed = seed
+        self.client_id_col = client_id_col
+        self.household_rate = household_rate
+        self.typo_rate = typo_rate
+        self.missing_rate = missing_rate
+        self.content_ws = {}
+        self.email_client_nos = []
+        self.household_nos = []
+        self.row_labels = {}
+        self.row_cnt = 0
+
+    @staticmethod
+    def client_cnt_for_rows(row_cnt, duplication_rate):
+        """
+        Determine the number of clients needed to produce roughly the
+        requested number of content rows.
+        """
+        return max(1, int(round(row_cnt / (1 + duplication_rate))))
+
+    def content_col_names(self, ws_no):
+        """
+        Column headings for a content worksheet.  Alternate the name
+        and phone layouts from worksheet to worksheet the same way that
+        different sources disagree on their layouts.
+        """
+        if self.fragment_cols and ws_no % 2 == 1:
+            name_cols = ['First Name', 'Last Name']
+        else:
+            name_cols = ['Client']
+        phone_col = ['Phone', 'Home Phone', 'Mobile Phone'][ws_no % 3]
+        col_names = ['Client ID'] if self.client_id_col else []
+        col_names += name_cols + [phone_col, 'Email']
+        if self.ded_shape != 'minimal':
+            col_names += ['First Visit Date', 'Gender']
+        if self.ded_shape == 'wide':
+            col_names += [f'Note {i}' for i in range(1, 9)]
+        return col_names
+
+    def ded_rows(self):
+        """
+        The DED worksheet rows, column headings first.
+        """
+        dest_ws = self.DEST_WS_INDS
+        rows = [
+            list(self.settings.col_headings),
+            ['client id', 'identifier', dest_ws, None, None],
+            ['name', 'identifier', dest_ws, None, 'name'],
+            ['client', None, None, 'name', None],
+            ['first name', 'fragment=1', None, 'name', None],
+            ['last name', 'fragment=2', None, 'name', None],
+            ['phone', 'identifier', dest_ws, None, 'phone'],
+            ['home phone', None, None, 'phone', None],
+            ['mobile phone', None, None, 'phone', None],
+            ['email', 'identifier', dest_ws, None, None],
+            ]
+        if self.ded_shape != 'minimal':
+            rows += [
+                ['first visit date', None, 'fb', None, 'date'],
+                ['gender', None, 'ims', None, None],
+                ]
+        if self.ded_shape == 'wide':
+            rows += [[f'note {i}', None, dest_ws, None, None] for i in range(1, 9)]
+        return rows
+
+    def generate(self):
+        """
+        Generate the content worksheets rows.  The same seed always
+        produces the same rows.
+        """
+        rng = random.Random(self.seed)
+        ws_names = [f'Source {i}' for i in range(1, self.content_ws_cnt + 1)]
+        ws_rows = {ws_name: [] for ws_name in ws_names}
+
+        for client_no in range(self.client_cnt):
+            # Every client appears at least once, extra appearances
+            # are duplicates of the same client.
+            appearances = 1 + int(self.duplication_rate)
+            if rng.random() < self.duplication_rate - int(self.duplication_rate):
+                appearances += 1
+            for _ in range(appearances):
+                ws_no = rng.randrange(self.content_ws_cnt)
+                ws_rows[ws_names[ws_no]].append(client_no)
+
+        self.make_households(rng)
+        self.content_ws = {}
+        self.row_labels = {}
+        self.row_cnt = 0
+        for ws_no, ws_name in enumerate(ws_names):
+            client_nos = ws_rows[ws_name]
+            rng.shuffle(client_nos)
+            col_names = self.content_col_names(ws_no)
+            rows = [col_names]
+            for client_no in client_nos:
+                rows.append(self.make_row(rng, client_no, col_names))
+            self.content_ws[ws_name] = rows
+            self.row_labels[ws_name] = client_nos
+            self.row_cnt += len(client_nos)
+        return self.content_ws
+
+    def make_households(self, rng):
+        """
+        Decide which clients live together.  The clients of a household
+        share the household number of the first client of the household
+        and, half of the time, the email of the first client.
+        """
+        self.household_nos = list(range(self.client_cnt))
+        self.email_client_nos = list(range(self.client_cnt))
+        if not self.household_rate:
+            return False
+        for client_no in range(1, self.client_cnt):
+            if rng.random() < self.household_rate:
+                self.household_nos[client_no] = self.household_nos[client_no - 1]
+                if rng.random() < 0.5:
+                    self.email_client_nos[client_no] =\
+                        self.household_nos[client_no]
+        return True
+
+    def make_name(self, client_no):
+        """
+        The first and last names of a client.  The last name is the
+        last name of the household.
+        """
+        household_no = self.household_nos[client_no]
+        first_name = self.FIRST_NAMES[client_no % len(self.FIRST_NAMES)]
+        last_name = self.LAST_NAMES[
+            (household_no // len(self.FIRST_NAMES)) % len(self.LAST_NAMES)
+            ]
+        return first_name, last_name
+
+    def make_row(self, rng, client_no, col_names):
+        """
+        Create the content row values for a client.
+        """
+        first_name, last_name = self.make_name(client_no)
+        email_first_name, email_last_name =\
+            self.make_name(self.email_client_nos[client_no])
+        values = {
+            'Client ID': 100000000 + client_no,
+            'Client': self.make_typo(rng, f'{last_name}, {first_name}'),
+            'First Name': self.make_typo(rng, first_name),
+            'Last Name': last_name,
+            'Email': self.make_email(
+                rng,
+                self.email_client_nos[client_no],
+                email_first_name,
+                email_last_name
+                ),
+            'First Visit Date':
+                f'{1 + client_no % 12}/{1 + client_no % 28}/{2015 + client_no % 8}',
+            'Gender': ['F', 'M', 'NB'][client_no % 3],
+            }
+        phone_value = self.make_phone(rng, self.household_nos[client_no])
+        for phone_col in ['Phone', 'Home Phone', 'Mobile Phone']:
+            values[phone_col] = phone_value
+        for i in range(1, 9):
+            values[f'Note {i}'] = f'note {i} for client {client_no}'
+        return [values[col_name] for col_name in col_names]
+
+    def make_email(self, rng, client_no, first_name, last_name):
+        """
+        Unique email address per client, with random case and padding
+        noise, typos and missing values.
+        """
+        if self.missing_rate and rng.random() < self.missing_rate:
+            return None
+        domain = self.EMAIL_DOMAINS[client_no % len(self.EMAIL_DOMAINS)]
+        email = self.make_typo(rng, f'{first_name}.{last_name}{client_no}'.lower())
+        email = f'{email}@{domain}'
+        if rng.random() < self.identifier_noise:
+            email = email.title() if rng.random() < 0.5 else email.upper()
+        if rng.random() < self.identifier_noise:
+            email = f' {email} '
+        return email
+
+    def make_phone(self, rng, household_no):
+        """
+        Unique phone number per household, with random layout noise and
+        missing values.
+        """
+        if self.missing_rate and rng.random() < self.missing_rate:
+            return None
+        # Scatter the household numbers across the phone number space.
+        local_no = f'{(household_no * 7919) % 8000000 + 2000000}'
+        parts = ['808', local_no[0:3], local_no[3:7]]
+        if rng.random() < self.identifier_noise:
+            mask = self.PHONE_MASKS[rng.randrange(len(self.PHONE_MASKS))]
+        else:
+            mask = self.PHONE_MASKS[0]
+        return mask.format(*parts)
+
+    def make_typo(self, rng, value):
+        """
+        The value, or the value with two neighbouring characters swapped
+        as a typo.  Typos survive the normalization of the identifiers.
+        """
+        if not self.typo_rate or len(value) < 2 or rng.random() >= self.typo_rate:
+            return value
+        char_idx = rng.randrange(len(value) - 1)
+        return value[:char_idx] + value[char_idx + 1] + value[char_idx]\
+            + value[char_idx + 2:]
+
+    def save_csv_sources(self, csv_dir):
+        """
+        Save the DED and the content worksheets as CSV sources, one
+        file per worksheet.
+        """
+        if not self.content_ws:
+            self.generate()
+        os.makedirs(csv_dir, exist_ok=True)
+        sheets = {'DED': self.ded_rows()}
+        sheets.update(self.content_ws)
+        for ws_name, rows in sheets.items():
+            csv_file = os.path.join(csv_dir, f'{ws_name}.csv')
+            with open(csv_file, 'w', newline='', encoding='utf8') as csv_out:
+                csv.writer(csv_out).writerows(rows)
+        return list(sheets)
+
+    def save_workbook(self, wb_filename):
+        """
+        Save the DED and the content worksheets to an Excel workbook.
+        The write-only mode keeps very large workbooks within reach.
+        """
+        if not self.content_ws:
+            self.generate()
+        cliprt_wb = openpyxl.Workbook(write_only=True)
+        ded_ws = cliprt_wb.create_sheet('DED')
+        for row in self.ded_rows():
+            ded_ws.append(row)
+        for ws_name, rows in self.content_ws.items():
+            cliprt_ws = cliprt_wb.create_sheet(ws_name)
+            for row in rows:
+                cliprt_ws.append(row)
+        cliprt_wb.save(wb_filename)
+        return wb_filename
@@ -166,6 +166,8 @@ class ClientIdentityResolverTest:
             ['home phone', '12345'],
             ['email', 'noemail'],
             ['email', 'botched@com'],
+            ['email', 'none@none.com'],
+            ['name', 'N/A'],
             ]
         for id_data in bad_identifiers:
             bad_identifier = Identifier(id_data[0], id_data[1], test_ded)
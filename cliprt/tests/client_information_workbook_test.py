@@ -10,6 +10,7 @@ from IPython.utils.capture import capture_output
 from cliprt.classes.client_information_workbook import ClientInformationWorkbook
 from cliprt.classes.message_registry import MessageRegistry
 from cliprt.classes.cliprt_settings import CliprtSettings
+from cliprt.classes.ded_cache import DedCache
 
 class ClientInformationWorkbookTest:
     """
@@ -63,6 +64,46 @@ class ClientInformationWorkbookTest:
         assert self.client_info.ded_processor.hydrate_ded()
         assert self.client_info.ded_is_verified()
 
+    def enable_hashed_client_ids_test(self):
+        """
+        Unit test
+        """
+        client_idnos = []
+        for chunk_size in [None, 7]:
+            client_info = ClientInformationWorkbook(self.client_wb_file)
+            assert client_info.enable_hashed_client_ids()
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            client_info.create_client_reports(True, save_wb=False)
+            client_idnos.append(set(client_info.client_reg.client_id_list))
+        assert len(client_idnos[0]) == 66
+        assert client_idnos[0] == client_idnos[1]
+        assert min(client_idnos[0]) >= client_info.client_reg.HASHED_CLIENT_IDNO_BASE
+
+    def hydrate_ded_test(self):
+        """
+        Unit test
+        """
+        ded_cache = DedCache()
+        reports = []
+        for _ in range(2):
+            client_info = ClientInformationWorkbook(self.client_wb_file)
+            client_info.ded_cache = ded_cache
+            progress = {}
+            client_info.progress_listener =\
+                lambda ws_name, rows_done, rows_total, progress=progress:\
+                    progress.update({ws_name: (rows_done, rows_total)})
+            client_info.create_client_reports(True, save_wb=False)
+            for rows_done, rows_total in progress.values():
+                assert rows_done == rows_total
+            reports.append([
+                list(client_info.cliprt_wb[ws_name].values)
+                for ws_name in client_info.dest_ws_reg.dest_ws_names
+                ])
+        assert ded_cache.misses == 1
+        assert ded_cache.hits == 1
+        assert reports[0] == reports[1]
+
     @staticmethod
     def init_bad_file_test():
         """
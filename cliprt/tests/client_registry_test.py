@@ -25,6 +25,36 @@ class ClientRegistryTest:
         client_id = client_identity.client_idno
         assert self.client_reg.client_id_list[client_id] == client_identity
 
+    def export_state_test(self):
+        """
+        Unit test
+        """
+        self.client_reg.create_identity()
+        state = self.client_reg.export_state()
+        client_reg = ClientRegistry(DestinationWorksheetsRegistry())
+        assert client_reg.import_state(state)
+        assert client_reg.next_client_idno == self.client_reg.next_client_idno
+        assert client_reg.client_id_list.keys() == self.client_reg.client_id_list.keys()
+
+    def get_hashed_client_idno_test(self):
+        """
+        Unit test
+        """
+        client_reg = ClientRegistry(DestinationWorksheetsRegistry())
+        client_reg.hashed_client_idnos = True
+        client_idno = client_reg.get_hashed_client_idno('email::a@b.com')
+        assert client_idno >= ClientRegistry.HASHED_CLIENT_IDNO_BASE
+        assert client_reg.get_hashed_client_idno('email::a@b.com') == client_idno
+        assert client_reg.get_hashed_client_idno('email::c@d.com') != client_idno
+
+        # A client id that is taken is not reused.
+        identity = client_reg.create_identity('email::a@b.com')
+        assert identity.client_idno == client_idno
+        identity = client_reg.create_identity('email::a@b.com')
+        assert identity.client_idno == client_idno + 1
+        assert client_reg.client_idno_collision_cnt == 1
+        assert client_reg.next_client_idno == 1000
+
     def get_identity_by_idno_test(self):
         """
         Unit test
@@ -34,6 +64,11 @@ class ClientRegistryTest:
         assert self.client_reg.get_identity_by_idno(client_id) == client_identity
         assert self.client_reg.get_identity_by_idno(9999) is None
 
+        # Clients known from previous runs are created when first seen.
+        self.client_reg.known_client_idnos.add(9999)
+        assert self.client_reg.get_identity_by_idno(9999).client_idno == 9999
+        assert 9999 in self.client_reg.client_id_list
+
     def init_test(self):
         """
         Unit test
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+#pylint: disable=import-error
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import subprocess
+import sys
+from IPython.utils.capture import capture_output
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+import cliprt_cli
+
+class CliprtCliTest:
+    """
+    Command line interface test harness.
+    """
+    settings = CLIPRT_SETTINGS
+    client_wb_file = settings.test_resources_path + '/test_workbook.xlsx'
+
+    # Measure the import time in a fresh interpreter and report whether
+    # the heavy dependencies were imported.
+    import_time_script =\
+        'import sys, time\n'\
+        'start_time = time.perf_counter()\n'\
+        'import cliprt_cli\n'\
+        'print(time.perf_counter() - start_time)\n'\
+        'print("openpyxl" in sys.modules or "dateutil" in sys.modules)\n'
+
+    def import_time_test(self):
+        """
+        Unit test
+        """
+        import_times = []
+        for _ in range(3):
+            output = subprocess.run(
+                [sys.executable, '-c', self.import_time_script],
+                capture_output=True,
+                check=True,
+                text=True
+                ).stdout.split()
+            import_times.append(float(output[0]))
+            assert output[1] == 'False'
+        assert min(import_times) < self.settings.import_time_budget
+
+    @staticmethod
+    def help_test():
+        """
+        Unit test
+        """
+        completed = subprocess.run(
+            [sys.executable, 'cliprt_cli.py', '--help'],
+            capture_output=True,
+            check=True,
+            text=True
+            )
+        assert 'usage: cliprt' in completed.stdout
+
+    def validate_test(self):
+        """
+        Unit test
+        """
+        with capture_output() as captured:
+            assert cliprt_cli.main(['--validate', self.client_wb_file]) == 0
+            assert cliprt_cli.main(['--validate', 'bad_file_name']) == 1
+        captured()
+        assert 'The DED configuration is valid.' in captured.stdout
+        assert '(E1000)' in captured.stdout
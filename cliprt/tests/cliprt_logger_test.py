@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import argparse
+import io
+import logging
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_logger import CliprtLogger, LogMessage, CLIPRT_LOGGER
+from cliprt.classes.deferred_queue_handler import DeferredQueueHandler
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class CliprtLoggerTest:
+    """
+    Logging test harness.
+    """
+    settings = CLIPRT_SETTINGS
+    client_wb_file = settings.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def add_arguments_test():
+        """
+        Unit test
+        """
+        parser = CliprtLogger.add_arguments(argparse.ArgumentParser())
+        args = parser.parse_args([])
+        assert (args.log_level, args.log_file) == ('info', None)
+        args = parser.parse_args(['--log-level', 'debug', '--log-file', 'cliprt.log'])
+        assert (args.log_level, args.log_file) == ('debug', 'cliprt.log')
+
+    @staticmethod
+    def configure_test():
+        """
+        Unit test
+        """
+        log_stream = io.StringIO()
+        cliprt_logger = CliprtLogger()
+        assert not cliprt_logger.stop()
+        assert cliprt_logger.configure(level=logging.WARNING, stream=log_stream)
+        cliprt_logger.info(6000, 'not logged')
+        cliprt_logger.warning(5000, 'logged')
+        cliprt_logger.error(1000, 'also logged')
+        assert cliprt_logger.stop()
+        assert '(W5000)' in log_stream.getvalue()
+        assert '(E1000)' in log_stream.getvalue()
+        assert 'not logged' not in log_stream.getvalue()
+
+    def create_client_reports_test(self):
+        """
+        Unit test
+        """
+        log_stream = io.StringIO()
+        CLIPRT_LOGGER.configure(
+            level=logging.INFO,
+            stream=log_stream,
+            trace_ws_names=['First Visit']
+            )
+        try:
+            client_info = ClientInformationWorkbook(self.client_wb_file)
+            client_info.create_client_reports(True, save_wb=False)
+        finally:
+            CLIPRT_LOGGER.stop()
+        log_text = log_stream.getvalue()
+        assert '(I6000)' in log_text
+        assert '(I6001)' in log_text
+        assert log_text.count('(I6010)') == 2
+        # Only the traced worksheet has its rows traced.
+        assert log_text.count('(D6020)') == 19
+        assert 'worksheet "Mail List" row' not in log_text
+
+    @staticmethod
+    def is_row_tracing_test():
+        """
+        Unit test
+        """
+        cliprt_logger = CliprtLogger()
+        assert not cliprt_logger.is_row_tracing('First Visit')
+        cliprt_logger.configure(stream=io.StringIO(), trace_ws_names=['First Visit'])
+        assert cliprt_logger.is_row_tracing('First Visit')
+        assert not cliprt_logger.is_row_tracing('Mail List')
+        cliprt_logger.stop()
+        assert not cliprt_logger.is_row_tracing('First Visit')
+
+    @staticmethod
+    def log_message_test():
+        """
+        Unit test
+        """
+        log_message = LogMessage(5000, ('test ws',))
+        assert str(log_message) ==\
+            '(W5000) Warning: insufficient content to report for worksheet test ws.'
+
+    @staticmethod
+    def prepare_test():
+        """
+        Unit test
+        """
+        # Queued records are formatted by the listener, not the caller.
+        log_message = LogMessage(5000, ('test ws',))
+        record = logging.LogRecord('cliprt', logging.INFO, '', 0, log_message, None, None)
+        assert DeferredQueueHandler.prepare(record).msg is log_message
+
+    @staticmethod
+    def run_command_test(tmp_path):
+        """
+        Unit test
+        """
+        log_filename = str(tmp_path / 'cliprt.log')
+        args = CliprtLogger.add_arguments(argparse.ArgumentParser()).parse_args(
+            ['--log-level', 'warning', '--log-file', log_filename]
+            )
+        cliprt_logger = CliprtLogger()
+        def command(_args):
+            cliprt_logger.info(6000, 'not logged')
+            cliprt_logger.warning(5000, 'logged')
+            raise KeyboardInterrupt
+        try:
+            cliprt_logger.run_command(command, args)
+        except KeyboardInterrupt:
+            pass
+        # The log is flushed, and logging stopped, even if the command
+        # is interrupted.
+        assert cliprt_logger.listener is None
+        with open(log_filename, encoding='utf8') as log_file:
+            log_text = log_file.read()
+        assert '(W5000)' in log_text
+        assert 'not logged' not in log_text
+        assert cliprt_logger.run_command(lambda _args: None, args) == 0
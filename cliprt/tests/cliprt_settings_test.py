@@ -4,7 +4,9 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from cliprt.classes.cliprt_settings import CliprtSettings
+import datetime
+import pytest
+from cliprt.classes.cliprt_settings import CliprtSettings, CLIPRT_SETTINGS
 
 class CliprtSettingsTest:
     """
@@ -29,12 +31,36 @@ class CliprtSettingsTest:
         assert self.settings.format_phone('321-321') == \
             '321-321'
 
+    def format_typed_values_test(self):
+        """
+        Unit test
+        """
+        assert self.settings.format_date(datetime.datetime(2021, 12, 31, 8, 30)) ==\
+            '12/31/2021'
+        assert self.settings.format_date(datetime.date(2021, 1, 2)) == '01/02/2021'
+        assert self.settings.format_date('12/31/2021') == '12/31/2021'
+        assert self.settings.format_phone(8883214321.0) == '1-888-321-4321'
+        assert self.settings.format_phone(3214321) == '1-808-321-4321'
+        assert self.settings.format_phone('1-888-321-4321') == '1-888-321-4321'
+        assert self.settings.format_name(1234.0) == '1234'
+        assert self.settings.format_number(12.5) == '12.5'
+
     def format_name_test(self):
         """
         Unit test
         """
         assert self.settings.format_name('name') == 'name'
 
+    def read_only_test(self):
+        """
+        Unit test
+        """
+        with pytest.raises(AttributeError):
+            self.settings.identity_match_threshold = 1
+        with pytest.raises(AttributeError):
+            CLIPRT_SETTINGS.default_area_code = '999'
+        assert CLIPRT_SETTINGS.identity_match_threshold == 2
+
     def str_normalize_test(self):
         """
         Unit test
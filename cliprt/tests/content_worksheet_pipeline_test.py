@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import os
+import shutil
+import threading
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.content_worksheet_pipeline import ContentWorksheetPipeline
+
+class ContentWorksheetPipelineTest:
+    """
+    Content worksheet pipeline test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _create_client_reports(self, chunk_size=None, wb_filename=None, **kwargs):
+        """
+        Create the client reports, with or without the pipeline, and
+        return the report contents.
+        """
+        queue_size = kwargs.pop('queue_size', None)
+        client_info = ClientInformationWorkbook(
+            wb_filename or self.client_wb_file,
+            kwargs.pop('cliprt_wb', None)
+            )
+        if chunk_size is not None:
+            client_info.enable_pipeline(chunk_size, queue_size)
+        client_info.create_client_reports(True, save_wb=False, **kwargs)
+        return client_info, [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+
+    def run_test(self):
+        """
+        Unit test
+        """
+        client_info, expected_reports = self._create_client_reports()
+        expected_client_cnt = len(client_info.client_reg.client_id_list)
+        for chunk_size in [1, 7, ContentWorksheetPipeline.DEFAULT_CHUNK_SIZE]:
+            for queue_size in [1, None]:
+                client_info, reports = self._create_client_reports(
+                    chunk_size,
+                    queue_size=queue_size
+                    )
+                assert client_info.pipeline.wb_filename == self.client_wb_file
+                assert reports == expected_reports
+                assert len(client_info.client_reg.client_id_list) == expected_client_cnt
+
+        # A workbook that was not loaded from a file is read in memory.
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        client_info, reports = self._create_client_reports(
+            7,
+            cliprt_wb=openpyxl.load_workbook(self.client_wb_file)
+            )
+        assert client_info.pipeline.wb_filename is None
+        assert reports == expected_reports
+
+    def read_error_test(self, tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_pipeline(chunk_size=4, queue_size=1)
+
+        # The reader fails when the workbook file is gone, and the
+        # error stops the pipeline.
+        os.remove(wb_filename)
+        with pytest.raises(FileNotFoundError):
+            client_info.create_client_reports(True, save_wb=False)
+        assert 'cliprt_chunk_reader' not in [
+            thread.name for thread in threading.enumerate()
+            ]
+
+    def data_extent_test(self, tmp_path):
+        """
+        Unit test
+        """
+        _, expected_reports = self._create_client_reports()
+
+        # A blank row, a row without identifiers and formatting far
+        # below the last row of a content worksheet.
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        cliprt_wb = openpyxl.load_workbook(self.client_wb_file)
+        cliprt_wb['Mail List'].insert_rows(10)
+        cliprt_ws = cliprt_wb['First Visit']
+        cliprt_ws.cell(row=cliprt_ws.max_row + 1, column=3, value='2022-04-01')
+        cliprt_ws.cell(row=5000, column=1).number_format = '@'
+        cliprt_wb.save(wb_filename)
+
+        progress = {}
+        def progress_listener(ws_name, rows_done, rows_total):
+            progress[ws_name] = (rows_done, rows_total)
+        for chunk_size in [None, 7]:
+            client_info = ClientInformationWorkbook(wb_filename)
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            progress.clear()
+            client_info.progress_listener = progress_listener
+            client_info.create_client_reports(True, save_wb=False)
+            assert [
+                list(client_info.cliprt_wb[ws_name].values)
+                for ws_name in client_info.dest_ws_reg.dest_ws_names
+                ] == expected_reports
+            assert progress == {'First Visit': (20, 20), 'Mail List': (58, 58)}
+
+    def resume_test(self, tmp_path):
+        """
+        Unit test
+        """
+        _, expected_reports = self._create_client_reports()
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+
+        # A failing stage stops the pipeline.  The last checkpoint is
+        # at the end of the last chunk that was written.
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_pipeline(chunk_size=4)
+        checkpoint = client_info.enable_checkpoints(row_interval=4)
+        failing_ws_name = client_info.cliprt_wb.sheetnames[2]
+        def identity_listener(ws_name, row_idx, _identity):
+            if (ws_name, row_idx) == (failing_ws_name, 13):
+                raise Exception('Simulated stage failure')
+        client_info.identity_listener = identity_listener
+        with pytest.raises(Exception):
+            client_info.create_client_reports(True, save_wb=False)
+        assert checkpoint.ws_name == failing_ws_name
+        assert checkpoint.row_idx == 9
+
+        _, reports = self._create_client_reports(4, wb_filename, resume=True)
+        assert reports == expected_reports
@@ -131,6 +131,40 @@ class ContentWorksheetTest:
         assert test_content.content_cols == {6: 'gender'}
         self._create_test_content(action='remove')
 
+    def data_max_row_test(self):
+        """
+        Unit test
+        """
+        content_ws = self._create_test_content()
+        test_data = [['name', 'phone'], ['jon', None], [None, None], [None, '8085550123']]
+        self._update_test_content_ws(content_ws.cliprt_ws, test_data)
+        content_ws.cliprt_ws.cell(row=50, column=1).number_format = '@'
+        assert content_ws.cliprt_ws.max_row == 50
+        assert content_ws.data_max_row(content_ws.cliprt_ws, None) == 4
+        assert content_ws.data_max_row(content_ws.cliprt_ws, 10) == 4
+        assert content_ws.data_max_row(content_ws.cliprt_ws, 1) == 2
+        self._create_test_content('remove')
+
+    def init_test(self):
+        """
+        Unit test
+        """
+        content_ws_args = (
+            self.client_info.ded_processor.cliprt_wb,
+            self.client_info.cliprt_wb.sheetnames[2],
+            self.client_info.ded_processor,
+            self.client_info.client_reg,
+            self.client_info.identifier_reg,
+            self.client_info.dest_ws_reg
+            )
+        content_ws = ContentWorksheet(*content_ws_args, identity_match_threshold=1)
+        assert content_ws.identity_match_threshold == 1
+        assert content_ws.trailing_empty_rows_limit ==\
+            self.settings.trailing_empty_rows_limit
+        # The options are keyword-only.
+        with pytest.raises(TypeError):
+            ContentWorksheet(*content_ws_args, None, 1) #pylint: disable=too-many-function-args
+
     def process_row_de_fragments_test(self):
         """
         Unit test
@@ -150,12 +184,8 @@ class ContentWorksheetTest:
             ['100000', '101', '999-123-1201', 'jane1', 'doe'],
             ]
         self._update_test_content_ws(test_content.cliprt_ws, test_data)
-        identity_resolver = ClientIdentityResolver(
-            self.client_info.client_reg,
-            self.client_info.identifier_reg
-            )
         with pytest.raises(Exception) as excinfo:
-            test_content.process_row_de_identifiers(identity_resolver, 2)
+            test_content.process_row_de_identifiers(2)
         assert '(E5012)' in excinfo.value.args[0]
         self._create_test_content(action='remove')
 
@@ -171,7 +201,8 @@ class ContentWorksheetTest:
             self.client_info.identifier_reg
             )
         test_content.identifier_col_names['id'] = 1
-        test_content.process_row_de_identifiers(identity_resolver, 2)
+        for identifier in test_content.process_row_de_identifiers(2):
+            identity_resolver.save_identifier(identifier)
         assert len(identity_resolver.identifiers_matched) == 1
         for identity in identity_resolver.identifiers_matched:
             assert identity.key == 'client id::100000'
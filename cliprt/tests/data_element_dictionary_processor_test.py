@@ -213,6 +213,60 @@ class DataElementDictionaryProcessorTest:
             test_ded.process_dest_de_format('bad_de', 'bad_format')
         assert 'E3217' in excinfo.value.args[0]
 
+    def process_dest_de_merge_test(self):
+        """
+        Unit test
+        """
+        test_ded = self.client_info.ded_processor
+
+        # Bad merge policy test.
+        with pytest.raises(Exception) as excinfo:
+            test_ded.process_dest_de_merge('bad_de', 'bad_merge')
+        assert 'E3219' in excinfo.value.args[0]
+
+        # The merge policy column is optional.
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        ded_ws = client_info.cliprt_wb[client_info.DED_WS_NAME]
+        ded_ws.cell(1, 6, value=self.settings.dest_de_merge_col_heading)
+        ded_ws.cell(11, 6, value='Most Frequent')
+        client_info.hydrate_ded()
+        assert client_info.ded_processor.ded['phone'].dest_de_merge ==\
+            self.settings.most_frequent_merge
+        assert client_info.ded_processor.ded['email'].dest_de_merge is None
+
+        # A merge policy applies to the destination data element.
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        ded_ws = client_info.cliprt_wb[client_info.DED_WS_NAME]
+        ded_ws.cell(1, 6, value=self.settings.dest_de_merge_col_heading)
+        ded_ws.cell(12, 6, value='last-seen')
+        with pytest.raises(Exception) as excinfo:
+            client_info.hydrate_ded()
+        assert 'E3239' in excinfo.value.args[0]
+
+        # A date merge policy needs the date format.
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        ded_ws = client_info.cliprt_wb[client_info.DED_WS_NAME]
+        ded_ws.cell(1, 6, value=self.settings.dest_de_merge_col_heading)
+        ded_ws.cell(15, 6, value='earliest date')
+        client_info.hydrate_ded()
+        test_ded = client_info.ded_processor
+        assert test_ded.ded['first visit date'].dest_de_merge ==\
+            self.settings.earliest_date_merge
+        assert test_ded.process_dest_de_merge('birthday', self.settings.latest_date_merge)
+        with pytest.raises(Exception) as excinfo:
+            test_ded.hydration_validation()
+        assert 'E3240' in excinfo.value.args[0]
+
+        # A merge policy needs a data element name.
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        test_ded = client_info.ded_processor
+        ded_ws = client_info.cliprt_wb[client_info.DED_WS_NAME]
+        ded_ws.cell(1, 6, value=self.settings.dest_de_merge_col_heading)
+        ded_ws.cell(ded_ws.max_row + 1, 6, value='earliest date')
+        with pytest.raises(Exception) as excinfo:
+            test_ded.hydrate_ded_by_dest_de_merge(test_ded.read_col_headings())
+        assert 'E3150' in excinfo.value.args[0]
+
     def util_make_list_test(self):
         """
         Unit test
@@ -4,6 +4,7 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+from types import SimpleNamespace
 from cliprt.classes.data_element_fragments_assembler\
     import DataElementFragmentsAssembler as FragAssembler
 
@@ -39,6 +40,30 @@ class DataElementFragmentsAssemblerTest:
         frag_assembler.add_fragment_value(2, 'and part 2')
         assert frag_assembler.assembled_value() == 'frag part 1 and part 2'
 
+    @staticmethod
+    def compile_plan_test():
+        """
+        Unit test
+        """
+        frag_assembler = FragAssembler('name')
+        frag_assembler.add_fragment_col_index('last name', 2)
+        frag_assembler.add_fragment_col_index('first name', 5)
+        ded = {
+            'first name': SimpleNamespace(fragment_idx=1),
+            'last name': SimpleNamespace(fragment_idx=2),
+            }
+        assert frag_assembler.compile_plan(ded) == [5, 2]
+
+        # Every row is assembled from its own values only.
+        row = (None, 'Doe', None, None, 'Jane')
+        assert frag_assembler.assemble(
+            row[col_idx - 1] for col_idx in frag_assembler.fragment_plan
+            ) == 'Jane Doe'
+        row = (None, 'Roe', None, None, None)
+        assert frag_assembler.assemble(
+            row[col_idx - 1] for col_idx in frag_assembler.fragment_plan
+            ) == 'Roe'
+
     @staticmethod
     def init_test():
         """
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import openpyxl
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.data_frame_workbook import DataFrameWorkbook
+
+class DataFrameWorkbookTest:
+    """
+    DataFrame workbook test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def init_test(self):
+        """
+        Unit test
+        """
+        pandas = pytest.importorskip('pandas')
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.create_client_reports(True, save_wb=False)
+        expected_reports = {
+            dest_ws.cliprt_ws_name: list(dest_ws.cliprt_ws.values)
+            for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values()
+            }
+
+        source_wb = openpyxl.load_workbook(self.client_wb_file)
+        ded_rows = list(source_wb[ClientInformationWorkbook.DED_WS_NAME].values)
+        col_cnt = len(CLIPRT_SETTINGS.col_headings)
+        ded = pandas.DataFrame(
+            [row[:col_cnt] for row in ded_rows[1:]],
+            columns=ded_rows[0][:col_cnt]
+            )
+        sources = {}
+        for ws_name in source_wb.sheetnames:
+            if ws_name == ClientInformationWorkbook.DED_WS_NAME or ws_name in expected_reports:
+                continue
+            rows = list(source_wb[ws_name].values)
+            sources[ws_name] = pandas.DataFrame(rows[1:], columns=rows[0])
+
+        for ded_arg in [ded, ded.to_dict('list')]:
+            cliprt_wb = DataFrameWorkbook(sources, ded_arg)
+            client_info = ClientInformationWorkbook(None, cliprt_wb)
+            client_info.create_client_reports(True)
+            report_data_frames = cliprt_wb.report_data_frames(client_info.dest_ws_reg)
+            assert list(report_data_frames) == list(expected_reports)
+            for ws_name, report_data_frame in report_data_frames.items():
+                assert [tuple(report_data_frame.columns)]\
+                    + [tuple(row) for row in report_data_frame.values.tolist()]\
+                    == expected_reports[ws_name]
+
+    @staticmethod
+    def is_missing_test():
+        """
+        Unit test
+        """
+        assert DataFrameWorkbook.is_missing(None)
+        assert DataFrameWorkbook.is_missing(float('nan'))
+        assert not DataFrameWorkbook.is_missing(0.0)
+        assert not DataFrameWorkbook.is_missing('nan')
+        assert not DataFrameWorkbook.is_missing('')
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+from cliprt.classes.ded_cache import DedCache
+
+class DedCacheTest:
+    """
+    DED cache test harness.
+    """
+    @staticmethod
+    def get_test():
+        """
+        Unit test
+        """
+        ded_cache = DedCache()
+        assert ded_cache.get('a') is None
+        assert ded_cache.misses == 1
+        ded_cache.put('a', {'ded': {}})
+        assert ded_cache.get('a') == {'ded': {}}
+        assert ded_cache.hits == 1
+
+    @staticmethod
+    def put_test():
+        """
+        Unit test
+        """
+        ded_cache = DedCache(max_size=2)
+        ded_cache.put('a', 1)
+        ded_cache.put('b', 2)
+        # Using 'a' makes 'b' the least recently used.
+        ded_cache.get('a')
+        ded_cache.put('c', 3)
+        assert len(ded_cache) == 2
+        assert ded_cache.get('b') is None
+        assert ded_cache.get('a') == 1
+        assert ded_cache.get('c') == 3
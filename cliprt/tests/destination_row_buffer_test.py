@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import os
+import shutil
+import tracemalloc
+import openpyxl
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.destination_row_buffer import DestinationRowBuffer
+from cliprt.classes.destination_worksheet import DestinationWorksheet
+
+class DestinationRowBufferTest:
+    """
+    Destination row buffer test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _create_test_workbook(self, tmp_path, client_cnt):
+        """
+        The test workbook with client_cnt more clients.
+        """
+        cliprt_wb = openpyxl.load_workbook(self.client_wb_file)
+        cliprt_ws = cliprt_wb['Mail List']
+        for client_no in range(client_cnt):
+            cliprt_ws.append([
+                f'Last{client_no}',
+                f'First{client_no}',
+                10000 + client_no,
+                f'555{client_no:07d}',
+                f'client{client_no}@example.com',
+                'F'
+                ])
+        wb_filename = str(tmp_path / f'workbook_{client_cnt}.xlsx')
+        cliprt_wb.save(wb_filename)
+        return wb_filename
+
+    @staticmethod
+    def _measure_report_peaks(workbook_writer):
+        """
+        The peak memory allocated while each report worksheet is written,
+        as it is written.
+        """
+        # Small chunks, so the reports take several chunks.
+        workbook_writer.chunk_row_cnt = 100
+        write_report_ws = workbook_writer.write_report_ws
+        report_peaks = []
+
+        def measured_write_report_ws(wb_zip, report_ws):
+            tracemalloc.start()
+            try:
+                return write_report_ws(wb_zip, report_ws)
+            finally:
+                report_peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+        workbook_writer.write_report_ws = measured_write_report_ws
+        return report_peaks
+
+    @staticmethod
+    def _saved_reports(wb_filename):
+        """
+        The rows of each report saved to the workbook, with the rows of
+        its shards joined.
+        """
+        saved_wb = openpyxl.load_workbook(wb_filename)
+        saved_reports = {}
+        for ws_name in saved_wb.sheetnames:
+            if not ws_name.startswith('comm_report_for_'):
+                continue
+            rows = list(saved_wb[ws_name].values)
+            report_name = ws_name.rstrip('0123456789').rstrip('_')
+            if report_name in saved_reports:
+                rows = rows[1:]
+            saved_reports.setdefault(report_name, []).extend(rows)
+        return saved_reports
+
+    @staticmethod
+    def set_value_test(tmp_path):
+        """
+        Unit test
+        """
+        row_buffer = DestinationRowBuffer(memory_budget=1000, spill_dir=str(tmp_path))
+        for row_idx in range(2, 12):
+            row_buffer.set_value('ims', row_idx, 2, f'client {row_idx}')
+        assert row_buffer.spill_cnt > 0
+        assert row_buffer.memory_used <= 1000
+        assert row_buffer.memory_used == sum(
+            row_buffer.row_size(row) for row in row_buffer.rows.values()
+            )
+        assert len(os.listdir(tmp_path)) == 1
+
+        # Spilled rows are read back when they are updated again.
+        assert row_buffer.get_value('ims', 2, 2) == 'client 2'
+        row_buffer.set_value('ims', 2, 3, 'more')
+        assert row_buffer.memory_used == sum(
+            row_buffer.row_size(row) for row in row_buffer.rows.values()
+            )
+        rows = list(row_buffer.iter_rows('ims'))
+        assert [row_idx for row_idx, _ in rows] == list(range(2, 12))
+        assert rows[0][1] == [None, 'client 2', 'more']
+        assert not list(row_buffer.iter_rows('fb'))
+
+        row_buffer.discard('ims')
+        assert not list(row_buffer.iter_rows('ims'))
+        assert row_buffer.close()
+        assert not os.listdir(tmp_path)
+
+    def merge_counts_test(self, tmp_path):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        dest_ws = DestinationWorksheet(client_info.cliprt_wb, 'fb')
+        row_buffer = DestinationRowBuffer(memory_budget=100000, spill_dir=str(tmp_path))
+        dest_ws.row_buffer = row_buffer
+        for value in ['a', 'bb', 'bb']:
+            dest_ws.update_cell(2, 1, value, merge_policy=CLIPRT_SETTINGS.most_frequent_merge)
+
+        # The merge counts are kept in the row buffer, within its budget.
+        assert not dest_ws.merge_counts
+        assert row_buffer.get_value(dest_ws.merge_counts_ind, 2, 1) is not None
+        assert row_buffer.memory_used == sum(
+            row_buffer.row_size(row) for row in row_buffer.rows.values()
+            )
+        state = dest_ws.export_state()
+        assert dest_ws.flush()
+        assert dest_ws.export_state() == state
+        assert dest_ws.cliprt_ws.cell(2, 1).value == 'bb'
+        assert not row_buffer.rows
+
+    def create_client_reports_test(self, tmp_path):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.create_client_reports(True, save_wb=False)
+        expected_reports = [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+        spill_dir = tmp_path / 'spill'
+        spill_dir.mkdir()
+
+        for chunk_size in [None, 7]:
+            client_info = ClientInformationWorkbook(wb_filename)
+            row_buffer = client_info.enable_memory_budget(4000, str(spill_dir))
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            # Checkpoints export the buffered rows.
+            client_info.enable_checkpoints(row_interval=10)
+            client_info.create_client_reports(True, save_wb=False)
+            assert row_buffer.spill_cnt > 0
+            assert not os.listdir(spill_dir)
+            # The flushed rows are exported from the worksheets.
+            assert [
+                [tuple(row) for row in dest_ws_state['rows']]
+                for dest_ws_state in client_info.dest_ws_reg.export_state().values()
+                ] == [rows[1:] for rows in expected_reports]
+            assert [
+                list(client_info.cliprt_wb[ws_name].values)
+                for ws_name in client_info.dest_ws_reg.dest_ws_names
+                ] == expected_reports
+
+    def save_test(self, tmp_path):
+        """
+        Unit test
+        """
+        spill_dir = tmp_path / 'spill'
+        spill_dir.mkdir()
+        peaks = {}
+        for client_cnt, shard_size in [(300, None), (1200, None), (300, 100)]:
+            wb_filename = self._create_test_workbook(tmp_path, client_cnt)
+            client_info = ClientInformationWorkbook(wb_filename)
+            client_info.create_client_reports(True, save_wb=False)
+            expected_reports = {
+                ws_name: list(client_info.cliprt_wb[ws_name].values)
+                for ws_name in client_info.dest_ws_reg.dest_ws_names
+                }
+
+            # The buffered rows are streamed to the workbook file rather
+            # than copied to the report worksheets.
+            client_info = ClientInformationWorkbook(wb_filename)
+            row_buffer = client_info.enable_memory_budget(20000, str(spill_dir))
+            if shard_size is not None:
+                client_info.enable_report_sharding(shard_size)
+            report_peaks = self._measure_report_peaks(client_info.enable_parallel_save(1))
+            client_info.create_client_reports(True)
+            assert row_buffer.spill_cnt > 0
+            assert not os.listdir(spill_dir)
+            assert all(
+                client_info.cliprt_wb[ws_name].max_row == 1
+                for ws_name in client_info.dest_ws_reg.report_ws_names()
+                )
+            assert self._saved_reports(wb_filename) == expected_reports
+            if shard_size is None:
+                peaks[client_cnt] = max(report_peaks)
+
+        # The memory needed to save the reports does not grow with them.
+        assert peaks[1200] < peaks[300] * 1.25
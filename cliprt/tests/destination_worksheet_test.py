@@ -4,6 +4,7 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+import datetime
 from cliprt.classes.client_information_workbook import ClientInformationWorkbook
 from cliprt.classes.cliprt_settings import CliprtSettings
 from cliprt.classes.destination_worksheet import DestinationWorksheet
@@ -41,6 +42,13 @@ class DestinationWorksheetTest:
         assert self.dest_ws.update_cell(3, 1, '12/31/2021', self.settings.date_format)
         assert self.dest_ws.update_cell(3, 2, 'Doe, John', self.settings.name_format)
         assert self.dest_ws.update_cell(3, 3, '123-1234', self.settings.phone_format)
+        assert self.dest_ws.format_value(12) == '12'
+        assert self.dest_ws.format_value(5551234567.0) == '5551234567'
+        assert self.dest_ws.format_value(2.5) == '2.5'
+        assert self.dest_ws.format_value(datetime.datetime(2022, 1, 1)) == '01/01/2022'
+        assert self.dest_ws.format_value(True) == 'True'
+        assert self.dest_ws.format_value('2021-12-31', self.settings.date_format) ==\
+            '12/31/2021'
 
         # Identical data avoidance test.
         self.dest_ws.update_cell(4, 1, 'cell_data')
@@ -51,6 +59,70 @@ class DestinationWorksheetTest:
         self.dest_ws.update_cell(4, 1, 'cell_data_02')
         assert self.dest_ws.cliprt_ws.cell(4, 1).value == 'cell_data, cell_data_02'
 
+    def merge_policy_test(self):
+        """
+        Unit test
+        """
+        test_cases = [
+            [self.settings.all_unique_merge, ['a', 'bb', 'a'], 'a, bb'],
+            [self.settings.first_seen_merge, ['a', 'bb', 'c'], 'a'],
+            [self.settings.last_seen_merge, ['a', 'bb', 'c'], 'c'],
+            [self.settings.longest_merge, ['a', 'ccc', 'bb'], 'ccc'],
+            [self.settings.most_frequent_merge, ['a', 'bb', 'bb', 'c', 'bb'], 'bb'],
+            [self.settings.most_frequent_merge, ['a', 'A', 'b', 'c', 'd'], 'a'],
+            [self.settings.most_frequent_merge, ['a', 'b', 'b', 'a'], 'b'],
+            [self.settings.earliest_date_merge, ['03/01/2020', '2019-12-31', '01/02/2021'],
+                '12/31/2019'],
+            [self.settings.latest_date_merge, ['03/01/2020', '2019-12-31', '01/02/2021'],
+                '01/02/2021'],
+            ]
+        for row_idx, (merge_policy, values, merged_value) in enumerate(test_cases, start=10):
+            for value in values:
+                self.dest_ws.update_cell(
+                    row_idx,
+                    1,
+                    value,
+                    self.settings.date_format if 'date' in merge_policy else None,
+                    merge_policy
+                    )
+            assert self.dest_ws.cliprt_ws.cell(row_idx, 1).value == merged_value
+
+        # The value counts are part of the checkpointed state.
+        state = self.dest_ws.export_state()
+        assert [14, 1, {'a': 1, 'bb': 3, 'c': 1}] in state['merge_counts']
+        assert [15, 1, {'a': 2, 'b': 1, 'c': 1, 'd': 1}] in state['merge_counts']
+
+    def merge_policy_reports_test(self):
+        """
+        Unit test
+        """
+        reports = []
+        for chunk_size in [None, None, 7]:
+            client_info = ClientInformationWorkbook(self.cliprt_wb_file)
+            if reports:
+                # Keep the first email address of each client, and the
+                # longest name.
+                ded_ws = client_info.cliprt_wb[client_info.DED_WS_NAME]
+                ded_ws.cell(1, 6, value=self.settings.dest_de_merge_col_heading)
+                ded_ws.cell(6, 6, value='Longest')
+                ded_ws.cell(14, 6, value='first_seen')
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            client_info.create_client_reports(True, save_wb=False)
+            dest_ws = client_info.dest_ws_reg.dest_ws_by_ind_list['ims']
+            reports.append([
+                (row[dest_ws.dest_de_list['name'] - 1], row[dest_ws.dest_de_list['email'] - 1])
+                for row in dest_ws.cliprt_ws.values
+                ][1:])
+        for report_idx, has_lists in [(0, True), (1, False)]:
+            for col_idx in [0, 1]:
+                assert any(
+                    ', ' in row[col_idx] for row in reports[report_idx]
+                    if row[col_idx] is not None
+                    ) == has_lists
+        assert ('laura deactor', 'actor@yahoo.not') in reports[1]
+        assert reports[1] == reports[2]
+
     def update_column_headings_test(self):
         """
         Unit test
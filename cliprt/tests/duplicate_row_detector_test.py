@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import openpyxl
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.duplicate_row_detector import DuplicateRowDetector
+
+class DuplicateRowDetectorTest:
+    """
+    Duplicate row detector test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    # Rows repeated at the end of the first content worksheet.
+    REPEATED_ROW_CNT = 4
+
+    def _create_client_reports(self, wb_filename, chunk_size=None):
+        """
+        Create the client reports, skipping duplicate rows, and return
+        the report contents.
+        """
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_duplicate_row_detection()
+        if chunk_size is not None:
+            client_info.enable_pipeline(chunk_size)
+        client_info.create_client_reports(True, save_wb=False)
+        return client_info, [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+
+    def _create_test_workbook(self, tmp_path):
+        """
+        Repeat some rows of the first content worksheet, and copy the
+        whole worksheet, columns reversed, to a new content worksheet.
+        """
+        cliprt_wb = openpyxl.load_workbook(self.client_wb_file)
+        content_ws = cliprt_wb[cliprt_wb.sheetnames[1]]
+        rows = list(content_ws.values)
+        for row in rows[1:self.REPEATED_ROW_CNT + 1]:
+            content_ws.append(row)
+        copy_ws = cliprt_wb.create_sheet('Copy')
+        for row in rows:
+            copy_ws.append(list(reversed(row)))
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        cliprt_wb.save(wb_filename)
+        return wb_filename, content_ws.title, len(rows) - 1
+
+    def check_row_test(self):
+        """
+        Unit test
+        """
+        duplicate_rows = DuplicateRowDetector()
+        row_key = duplicate_rows.row_key([('email', 'a@b.com'), ('name', 'A')])
+        # Rows are only remembered once they are processed.
+        assert not duplicate_rows.check_row('ws1', row_key)
+        assert not duplicate_rows.check_row('ws1', row_key)
+        duplicate_rows.save_row(row_key, 'identity')
+        assert duplicate_rows.check_row('ws1', row_key)
+        assert duplicate_rows.check_row('ws2', row_key)
+        assert duplicate_rows.identity(row_key) == 'identity'
+        assert duplicate_rows.duplicate_cnts == {'ws1': 1, 'ws2': 1}
+        assert duplicate_rows.row_key([('name', 'A'), ('email', 'a@b.com')]) == row_key
+        other_row_key = duplicate_rows.row_key([('email', 'a@b.com')])
+        assert other_row_key != row_key
+        assert not duplicate_rows.check_row('ws1', other_row_key)
+
+    def client_report_test(self, tmp_path):
+        """
+        Unit test
+        """
+        expected_client_info, expected_reports =\
+            self._create_client_reports(self.client_wb_file)
+        expected_cnts = expected_client_info.duplicate_rows.duplicate_cnts
+        wb_filename, content_ws_name, row_cnt = self._create_test_workbook(tmp_path)
+
+        # The repeated rows are reported for the clients of the rows
+        # that they repeat, so the reports are unchanged.
+        for chunk_size in [None, 3]:
+            client_info, reports = self._create_client_reports(wb_filename, chunk_size)
+            assert reports == expected_reports
+            assert len(client_info.client_reg.client_id_list) ==\
+                len(expected_client_info.client_reg.client_id_list)
+            duplicate_cnts = client_info.duplicate_rows.duplicate_cnts
+            assert duplicate_cnts[content_ws_name] ==\
+                expected_cnts.get(content_ws_name, 0) + self.REPEATED_ROW_CNT
+            assert duplicate_cnts['Copy'] == row_cnt
+
+    def dest_de_name_test(self, tmp_path):
+        """
+        Unit test
+        """
+        # Copy the first content worksheet with its Client and Home
+        # Phone columns renamed to Client Name and Phone.  Both pairs of
+        # source columns map to the same destination data elements.
+        cliprt_wb = openpyxl.load_workbook(self.client_wb_file)
+        rows = list(cliprt_wb[cliprt_wb.sheetnames[1]].values)
+        renames = {'Client': 'Client Name', 'Home Phone': 'Phone'}
+        copy_ws = cliprt_wb.create_sheet('Copy')
+        copy_ws.append([renames.get(de_name, de_name) for de_name in rows[0]])
+        for row in rows[1:]:
+            copy_ws.append(row)
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        cliprt_wb.save(wb_filename)
+
+        for chunk_size in [None, 3]:
+            client_info, _ = self._create_client_reports(wb_filename, chunk_size)
+            assert client_info.duplicate_rows.duplicate_cnts['Copy'] == len(rows) - 1
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+from cliprt.classes.client_identity_resolver import ClientIdentityResolver
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.fuzzy_name_matcher import FuzzyNameMatcher
+from cliprt.classes.identifier import Identifier
+
+class FuzzyNameMatcherTest:
+    """
+    Fuzzy name matcher test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _resolve_rows(self, fuzzy_names):
+        """
+        Resolve two rows with the same phone number and similar names.
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.ded_processor.hydrate_ded()
+        if fuzzy_names:
+            client_info.enable_fuzzy_name_matching()
+        identities = []
+        for name in ['Jon Smith', 'Smith, Jonathan']:
+            id_resolver = ClientIdentityResolver(
+                client_info.client_reg,
+                client_info.identifier_reg
+                )
+            for de_name, de_value in [('name', name), ('phone', '(808) 555-0123')]:
+                id_resolver.save_identifier(
+                    Identifier(de_name, de_value, client_info.ded_processor.ded)
+                    )
+            identities.append(id_resolver.resolve_client_identity(
+                client_info.identity_match_threshold
+                ))
+        return identities
+
+    @staticmethod
+    def phonetic_code_test():
+        """
+        Unit test
+        """
+        assert FuzzyNameMatcher.phonetic_code('robert') == 'r163'
+        assert FuzzyNameMatcher.phonetic_code('rupert') == 'r163'
+        assert FuzzyNameMatcher.phonetic_code('ashcraft') == 'a261'
+        assert FuzzyNameMatcher.phonetic_code('lee') == 'l000'
+
+    def resolve_client_identity_test(self):
+        """
+        Unit test
+        """
+        identities = self._resolve_rows(fuzzy_names=False)
+        assert identities[0] is not identities[1]
+        identities = self._resolve_rows(fuzzy_names=True)
+        assert identities[0] is identities[1]
+
+    def similar_keys_test(self):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.ded_processor.hydrate_ded()
+        ded = client_info.ded_processor.ded
+        matcher = FuzzyNameMatcher()
+        for name in ['Jon Smith', 'Mary Jones', 'Jane Smyth', 'Jon Smithers']:
+            assert matcher.add_identifier(Identifier('name', name, ded))
+        assert not matcher.add_identifier(Identifier('email', 'jon@smith.biz', ded))
+
+        # Only the names in the same blocks are compared.
+        similar_keys = matcher.similar_keys(Identifier('name', 'Smith, Jonathan', ded))
+        assert similar_keys == ['name::jon smith']
+        assert matcher.comparison_cnt == 2
+
+    def block_size_limit_test(self):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.ded_processor.hydrate_ded()
+        ded = client_info.ded_processor.ded
+        matcher = FuzzyNameMatcher()
+        matcher.block_size_limit = 1
+        for name in ['Jon Smith', 'Jon Smithe']:
+            matcher.add_identifier(Identifier('name', name, ded))
+
+        # Both blocks of the name are too large, so they are skipped.
+        assert not matcher.similar_keys(Identifier('name', 'Jon Smyth', ded))
+        assert matcher.skipped_block_keys == {'s530:j', 'j500:s'}
+        assert matcher.comparison_cnt == 0
+
+    def save_fuzzy_matches_test(self):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.ded_processor.hydrate_ded()
+        client_info.enable_fuzzy_name_matching()
+        ded = client_info.ded_processor.ded
+        def resolver(identifiers):
+            id_resolver = ClientIdentityResolver(
+                client_info.client_reg,
+                client_info.identifier_reg
+                )
+            for de_name, de_value in identifiers:
+                id_resolver.save_identifier(Identifier(de_name, de_value, ded))
+            return id_resolver
+
+        # Similar names that do not belong to a client yet do not count.
+        id_resolver = resolver([('name', 'Jon Smith'), ('name', 'Jonathan Smith')])
+        assert not id_resolver.identifiers_fuzzy_matched
+        assert 'name' not in id_resolver.matched_identifier_types
+        id_resolver.resolve_client_identity(client_info.identity_match_threshold)
+
+        # Known names are matched to similar names too.
+        id_resolver = resolver([('name', 'Jonathan Smith')])
+        assert [identifier.key for identifier in id_resolver.identifiers_fuzzy_matched] ==\
+            ['name::jon smith']
+
+        # Stopped names do not count.
+        for key in ['name::jon smith', 'name::jonathan smith']:
+            client_info.identifier_reg.stop_identifier(
+                client_info.identifier_reg.identifier_list[key]
+                )
+        id_resolver = resolver([('name', 'Jonny Smith')])
+        assert not id_resolver.identifiers_fuzzy_matched
+        assert 'name' not in id_resolver.matched_identifier_types
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+from cliprt.classes.hot_function_benchmark import HotFunctionBenchmark
+
+class HotFunctionBenchmarkTest:
+    """
+    Hot-function micro-benchmark test harness.
+    """
+    benchmark = HotFunctionBenchmark(repeat=1, min_secs=0.001)
+
+    def benchmarks_test(self):
+        """
+        Unit test
+        """
+        identifier_cnt = len(self.benchmark.identifier_reg.identifier_list)
+        for func, make_args in self.benchmark.benchmarks().values():
+            for args in [()] if make_args is None else make_args(2):
+                func(*args)
+        # The benchmarks do not change the registries of the fixture.
+        assert len(self.benchmark.client_reg.client_id_list) ==\
+            HotFunctionBenchmark.REGISTRY_CLIENT_CNT
+        assert len(self.benchmark.identifier_reg.identifier_list) == identifier_cnt
+
+    def update_cell_args_test(self):
+        """
+        Unit test
+        """
+        # Every call writes to a cell of its own.
+        args_list = HotFunctionBenchmark.update_cell_args(3)
+        assert [row_idx for _, row_idx in args_list] == [2, 3, 4]
+        for args in args_list:
+            self.benchmark.update_cell(*args)
+        dest_ws = args_list[0][0]
+        assert [dest_ws.cliprt_ws.cell(row_idx, 1).value for row_idx in [2, 3, 4]] ==\
+            ['Jane Doe'] * 3
+
+        args_list = HotFunctionBenchmark.update_cell_args(1, 'Doe, John')
+        self.benchmark.update_cell(*args_list[0])
+        assert args_list[0][0].cliprt_ws.cell(2, 1).value == 'Doe, John, Jane Doe'
+
+    @staticmethod
+    def compare_test():
+        """
+        Unit test
+        """
+        baseline = {
+            'fast': {'ns_per_call': 100.0},
+            'slow': {'ns_per_call': 100.0},
+            }
+        results = {
+            'fast': {'ns_per_call': 110.0},
+            'slow': {'ns_per_call': 150.0},
+            'new': {'ns_per_call': 999.0},
+            }
+        regressions = HotFunctionBenchmark.compare(baseline, results, 0.25)
+        assert [regression['name'] for regression in regressions] == ['slow']
+        assert regressions[0]['change'] == 0.5
+        assert not HotFunctionBenchmark.compare(baseline, results, 0.6)
+
+    def run_test(self, tmp_path):
+        """
+        Unit test
+        """
+        results = self.benchmark.run(['format_phone', 'assembled_value'])
+        assert list(results) == ['assembled_value', 'format_phone']
+        assert results['format_phone']['ns_per_call'] > 0
+
+        baseline_filename = str(tmp_path / 'baseline.json')
+        self.benchmark.save_baseline(baseline_filename)
+        assert HotFunctionBenchmark.load_baseline(baseline_filename) == results
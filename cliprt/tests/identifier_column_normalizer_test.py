@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+from cliprt.classes.client_identity_resolver import ClientIdentityResolver
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.identifier import Identifier
+from cliprt.classes.identifier_column_normalizer import IdentifierColumnNormalizer
+
+class IdentifierColumnNormalizerTest:
+    """
+    Identifier column normalizer test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+    client_info = ClientInformationWorkbook(client_wb_file)
+    client_info.ded_processor.hydrate_ded()
+
+    # Column values, including values that trip up bulk processing.
+    values = [
+        '  Jon Smith ', 'MARY\tJONES', '', '   ', None, 8085550123, 8085550123.0, 1.5,
+        '(808) 555-0123', '808-000-0123', '999-9999', '555-012', 'JON@SMITH.BIZ ',
+        'noemail@smith.biz', 'jon@smith', '.jon@smith.biz', 'a\x00b', 'ΟΣ ',
+        ' x ', '١٢٣٤٥٦٧',
+        ]
+
+    @staticmethod
+    def _is_useful(identifier):
+        """
+        The usefulness checks of the client identity resolver.
+        """
+        if identifier.type == 'phone':
+            return ClientIdentityResolver.is_useful_phone_identifier(identifier.de_value)
+        if identifier.type == 'email':
+            return bool(
+                ClientIdentityResolver.is_useful_email_identifier(identifier.de_value)
+                )
+        return True
+
+    def identifiers_test(self):
+        """
+        Unit test
+        """
+        ded = self.client_info.ded_processor.ded
+        normalizer = IdentifierColumnNormalizer()
+        # Values holding the separator are normalized a value at a time.
+        bulk_values = [value for value in self.values if value != 'a\x00b']
+        for values in [self.values, bulk_values]:
+            for de_name in ['name', 'phone', 'email', 'client id']:
+                identifiers = normalizer.identifiers(ded, de_name, values)
+                assert len(identifiers) == len(values)
+                for value, identifier in zip(values, identifiers):
+                    expected = Identifier(de_name, value, ded)
+                    if not self._is_useful(expected):
+                        assert identifier is None
+                        continue
+                    assert identifier.key == expected.key
+                    assert identifier.type == expected.type
+        assert normalizer.identifiers(ded, 'name', []) == []
+
+    def normalize_column_test(self):
+        """
+        Unit test
+        """
+        normalizer = IdentifierColumnNormalizer()
+        de_values, valid = normalizer.normalize_column(
+            'phone',
+            ['(808) 555-0123', '555-0000', 8085550123.0]
+            )
+        assert de_values == ['8085550123', '5550000', '8085550123']
+        assert valid == [True, False, True]
+        de_values, valid = normalizer.normalize_column(
+            'email',
+            [' Jon@Smith.biz', 'noemail@smith.biz', 'jon@']
+            )
+        assert de_values == ['jon@smith.biz', 'noemail@smith.biz', 'jon@']
+        assert valid == [True, False, False]
@@ -1,5 +1,4 @@
 #!/usr/bin/env python
-#pylint: disable=too-few-public-methods
 """
 Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
@@ -7,6 +6,7 @@ Copyright   2022 Michael Hodges
 """
 from cliprt.classes.client_information_workbook import ClientInformationWorkbook
 from cliprt.classes.identifier import Identifier
+from cliprt.classes.identifier_registry import IdentifierRegistry
 from cliprt.classes.cliprt_settings import CliprtSettings
 
 class IdentifierRegistryTest:
@@ -25,3 +25,37 @@ class IdentifierRegistryTest:
         """
         self.client_info.identifier_reg.add_identifier(self.identifier)
         assert len(self.client_info.identifier_reg.identifier_list) == 1
+
+    def is_stopped_test(self, tmp_path):
+        """
+        Unit test
+        """
+        ded = self.client_info.ded_processor.ded
+        identifier_reg = IdentifierRegistry()
+        assert identifier_reg.is_stopped(Identifier('email', 'None@None.com ', ded))
+        assert not identifier_reg.is_stopped(self.identifier)
+
+        stop_list_filename = tmp_path / 'stop_list.txt'
+        stop_list_filename.write_text('TBD\nphone::8085551234\n\n', encoding='utf8')
+        assert identifier_reg.load_stop_list(stop_list_filename)
+        assert identifier_reg.is_stopped(Identifier('name', 'tbd', ded))
+        assert identifier_reg.is_stopped(Identifier('phone', '808-555-1234', ded))
+        assert not identifier_reg.is_stopped(Identifier('name', '808-555-1234', ded))
+
+    def save_identifier_client_idno_test(self):
+        """
+        Unit test
+        """
+        ded = self.client_info.ded_processor.ded
+        identifier_reg = IdentifierRegistry()
+        identifier_reg.fan_out_threshold = 2
+        front_desk = Identifier('phone', '808-555-1234', ded)
+        identifier_reg.add_identifier(front_desk)
+        identifier_reg.add_identifier(self.identifier)
+        identifier_reg.save_identifier_client_idno(self.identifier.key, 1000)
+        for client_idno in [1000, 1001, 1002]:
+            assert not identifier_reg.is_stopped(front_desk)
+            identifier_reg.save_identifier_client_idno(front_desk.key, client_idno)
+        assert identifier_reg.is_stopped(front_desk)
+        assert identifier_reg.heaviest_identifiers() ==\
+            [(front_desk.key, 3), (self.identifier.key, 1)]
@@ -40,6 +40,8 @@ class IdentifierTest:
         Unit test.
         """
         assert self.client_id.make_searchable(' aBcD ') == 'abcd'
+        assert self.client_id.make_searchable(8085551234.0) == '8085551234'
+        assert self.client_id.make_searchable(100000) == '100000'
 
     def save_client_idno_test(self):
         """
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import json
+from cliprt.classes.identity_resolution_evaluator\
+    import IdentityResolutionEvaluator
+
+class IdentityResolutionEvaluatorTest:
+    """
+    Identity resolution evaluator test harness.
+    """
+    @staticmethod
+    def evaluate_test(tmp_path):
+        """
+        Unit test
+        """
+        evaluator = IdentityResolutionEvaluator(client_cnt=60, seed=3)
+        results = evaluator.evaluate([1, 2, 5])
+        assert [result['identity_match_threshold'] for result in results]\
+            == [1, 2, 5]
+        for result in results:
+            assert result['row_cnt'] == evaluator.generator.row_cnt
+            assert result['true_client_cnt'] == 60
+            assert result['rows_per_sec'] > 0
+            assert 0 <= result['precision'] <= 1
+            assert 0 <= result['recall'] <= 1
+        # The identifiers are ambiguous, so the thresholds trade
+        # precision for recall.
+        assert results[0]['f1'] != results[1]['f1']
+        assert results[0]['precision'] < results[1]['precision']
+        assert results[0]['recall'] > results[1]['recall']
+        # An unreachable threshold never merges rows.
+        assert results[2]['resolved_pairs'] == 0
+        assert results[2]['precision'] == 1.0
+        assert results[2]['recall'] == 0.0
+        assert 'F1' in evaluator.format_result(results[0])
+
+        results_filename = evaluator.save_results(str(tmp_path / 'results.json'))
+        with open(results_filename, encoding='utf8') as results_file:
+            assert json.load(results_file) == results
+
+    @staticmethod
+    def data_options_test():
+        """
+        Unit test
+        """
+        # The ground truth client ids are left out unless requested.
+        evaluator = IdentityResolutionEvaluator(client_cnt=10)
+        assert 'Client ID' not in evaluator.generator.content_col_names(0)
+        evaluator = IdentityResolutionEvaluator(client_cnt=10, client_id_col=True)
+        assert 'Client ID' in evaluator.generator.content_col_names(0)
+
+    @staticmethod
+    def pairwise_scores_test():
+        """
+        Unit test
+        """
+        scores = IdentityResolutionEvaluator.pairwise_scores(
+            [1, 1, 1, 2, 2],
+            ['a', 'a', 'b', 'b', 'b']
+            )
+        # True pairs: 3 + 1; resolved pairs: 1 + 3; shared pairs: 1 + 1.
+        assert scores['precision'] == 0.5
+        assert scores['recall'] == 0.5
+        assert scores['f1'] == 0.5
+
+        scores = IdentityResolutionEvaluator.pairwise_scores([1, 2], ['a', 'b'])
+        assert scores['precision'] == 1.0
+        assert scores['recall'] == 1.0
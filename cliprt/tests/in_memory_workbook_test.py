@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.in_memory_workbook import InMemoryWorkbook
+
+class InMemoryWorkbookTest:
+    """
+    In-memory workbook test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _create_client_reports(self):
+        """
+        The client reports of the test workbook file, and the values of
+        its worksheets.
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        ws_values = {
+            ws_name: list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.cliprt_wb.sheetnames
+            }
+        client_info.create_client_reports(True, save_wb=False)
+        return ws_values, {
+            ws_name: list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            }
+
+    @staticmethod
+    def cell_test():
+        """
+        Unit test
+        """
+        cliprt_wb = InMemoryWorkbook()
+        cliprt_ws = cliprt_wb.create_sheet('test ws', rows=[['a', 'b'], [1]])
+        assert cliprt_ws.max_row == 2
+        assert cliprt_ws.max_column == 2
+        assert cliprt_ws.cell(2, 2).value is None
+        assert cliprt_ws.cell(3, 28, value='x').coordinate == 'AB3'
+        assert cliprt_ws.max_column == 28
+        assert [cell.value for cell in cliprt_ws[1]][:3] == ['a', 'b', None]
+        assert list(cliprt_ws.iter_cols(min_col=1, max_col=1, min_row=2))[0][0].value == 1
+        cliprt_ws.delete_rows(1, amount=3)
+        assert cliprt_ws.max_row == 1
+        assert list(cliprt_ws.values) == [(None,)]
+        assert 'test ws' in cliprt_wb
+        cliprt_wb.remove(cliprt_ws)
+        with pytest.raises(KeyError):
+            _ = cliprt_wb['test ws']
+
+    def create_client_reports_test(self):
+        """
+        Unit test
+        """
+        ws_values, expected_reports = self._create_client_reports()
+        for chunk_size in [None, 7]:
+            cliprt_wb = InMemoryWorkbook()
+            for ws_name, rows in ws_values.items():
+                cliprt_wb.create_sheet(ws_name, rows=rows)
+            client_info = ClientInformationWorkbook(None, cliprt_wb)
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            assert client_info.create_client_reports(True)
+            assert {
+                ws_name: list(cliprt_wb[ws_name].values)
+                for ws_name in client_info.dest_ws_reg.dest_ws_names
+                } == expected_reports
@@ -4,7 +4,8 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
-from cliprt.classes.message_registry import MessageRegistry
+import pytest
+from cliprt.classes.message_registry import MessageRegistry, MESSAGE_REGISTRY
 
 class MessageRegistryTest():
     """
@@ -18,6 +19,13 @@ class MessageRegistryTest():
         message_registry = MessageRegistry()
         assert len(message_registry.message) > 1
 
+        # The message catalog is shared and read-only.
+        assert message_registry.message is MESSAGE_REGISTRY.message
+        with pytest.raises(TypeError):
+            # The assignment is expected to fail.
+            #pylint: disable=unsupported-assignment-operation
+            message_registry.message[1000] = 'Error: overwritten.'
+
     @staticmethod
     def msg_test():
         """
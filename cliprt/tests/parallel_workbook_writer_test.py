@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import shutil
+import zipfile
+from xml.etree import ElementTree
+import openpyxl
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.parallel_workbook_writer import ParallelWorkbookWriter
+
+class ParallelWorkbookWriterTest:
+    """
+    Parallel workbook writer test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def render_rows_xml_test():
+        """
+        Unit test
+        """
+        assert ParallelWorkbookWriter.col_letters(1) == 'A'
+        assert ParallelWorkbookWriter.col_letters(28) == 'AB'
+        rows_xml = ParallelWorkbookWriter.render_rows_xml(2, [
+            ('client id', 'name', None, 'flag'),
+            (12, ' Jon <&> Smith', 1.5, True),
+            (None, None),
+            (float('nan'), float('inf'), float('-inf')),
+            ])
+        namespaces = {'main': ParallelWorkbookWriter.MAIN_NS}
+        rows = ElementTree.fromstring(
+            f'<sheetData xmlns="{ParallelWorkbookWriter.MAIN_NS}">'.encode('utf-8')
+            + rows_xml + b'</sheetData>'
+            ).findall('main:row', namespaces)
+        assert [row.get('r') for row in rows] == ['2', '3', '5']
+        cells = rows[1].findall('main:c', namespaces)
+        assert [cell.get('r') for cell in cells] == ['A3', 'B3', 'C3', 'D3']
+        assert cells[0].find('main:v', namespaces).text == '12'
+        assert cells[1].find('main:is/main:t', namespaces).text == ' Jon <&> Smith'
+        assert cells[3].get('t') == 'b'
+        # Non-finite numbers are strings.
+        assert [
+            cell.find('main:is/main:t', namespaces).text
+            for cell in rows[2].findall('main:c', namespaces)
+            ] == ['nan', 'inf', '-inf']
+
+    def save_test(self, tmp_path):
+        """
+        Unit test
+        """
+        for shard_size in [None, 10]:
+            rendered_ws_cnts = []
+            wb_values = []
+            for max_workers in [None, 2]:
+                wb_filename = str(tmp_path / f'workbook_{max_workers}.xlsx')
+                shutil.copy(self.client_wb_file, wb_filename)
+                client_info = ClientInformationWorkbook(wb_filename)
+                if shard_size is not None:
+                    client_info.enable_report_sharding(shard_size)
+                if max_workers is not None:
+                    # Small chunks, so the reports take several chunks.
+                    client_info.enable_parallel_save(max_workers).chunk_row_cnt = 7
+                client_info.create_client_reports(True)
+                report_ws_names = client_info.dest_ws_reg.report_ws_names()
+                assert len(report_ws_names) > 1
+                # The report worksheets are still in the workbook.
+                assert all(
+                    client_info.cliprt_wb[ws_name].max_row > 1
+                    for ws_name in report_ws_names
+                    )
+                with zipfile.ZipFile(wb_filename) as wb_zip:
+                    rendered_ws_cnts.append(sum(
+                        b'<dimension' not in wb_zip.read(ws_path)
+                        for ws_path in wb_zip.namelist()
+                        if ws_path.startswith('xl/worksheets/sheet')
+                        ))
+                saved_wb = openpyxl.load_workbook(wb_filename)
+                wb_values.append([
+                    (ws_name, list(saved_wb[ws_name].values))
+                    for ws_name in saved_wb.sheetnames
+                    ])
+                assert wb_values[-1] == [
+                    (ws_name, list(client_info.cliprt_wb[ws_name].values))
+                    for ws_name in client_info.cliprt_wb.sheetnames
+                    ]
+            # The report worksheets were rendered by the workers.
+            assert rendered_ws_cnts[1] - rendered_ws_cnts[0] == len(report_ws_names)
+            assert wb_values[0] == wb_values[1]
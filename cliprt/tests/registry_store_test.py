@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import sqlite3
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class RegistryStoreTest:
+    """
+    Registry store test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _run(self, store_filename):
+        """
+        Create the client reports with the registry store.  Returns the
+        workbook and the client id of each row.
+        """
+        row_idnos = {}
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.enable_registry_store(store_filename)
+        client_info.identity_listener = lambda ws_name, row_idx, identity:\
+            row_idnos.update({
+                (ws_name, row_idx): None if identity is None else identity.client_idno
+                })
+        client_info.create_client_reports(True, save_wb=False)
+        return client_info, row_idnos
+
+    def stable_client_idnos_test(self, tmp_path):
+        """
+        Unit test
+        """
+        store_filename = str(tmp_path / 'registry.sqlite')
+        client_info, row_idnos = self._run(store_filename)
+        next_client_idno = client_info.client_reg.next_client_idno
+        report_row_cnts = [
+            dest_ws.next_row_idx
+            for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values()
+            ]
+
+        # The next run gives every row the same client, and creates no
+        # new clients.
+        client_info, second_row_idnos = self._run(store_filename)
+        assert second_row_idnos == row_idnos
+        assert client_info.client_reg.next_client_idno == next_client_idno
+        assert not client_info.identifier_reg.changed_keys
+        assert report_row_cnts == [
+            dest_ws.next_row_idx
+            for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values()
+            ]
+
+        connection = sqlite3.connect(store_filename)
+        client_cnt = connection.execute('SELECT COUNT(*) FROM clients').fetchone()[0]
+        connection.close()
+        assert client_cnt == len(set(row_idnos.values()) - {None})
+
+    def identity_signatures_test(self, tmp_path):
+        """
+        Unit test
+        """
+        # Identity signatures are only kept with a registry store.
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_reg = client_info.client_reg
+        assert not client_reg.save_identity_signature('phone::8085551234', 1000)
+        assert client_reg.get_identity_by_signature('phone::8085551234') is None
+
+        client_info, _ = self._run(str(tmp_path / 'registry.sqlite'))
+        client_reg = client_info.client_reg
+        assert client_reg.keeps_identity_signatures
+        signature, client_idno = next(iter(client_reg.identity_signatures.items()))
+        assert client_reg.get_identity_by_signature(signature).client_idno == client_idno
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import shutil
+import openpyxl
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class ReportCheckpointTest:
+    """
+    Report checkpoint test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def _reports(client_info):
+        """
+        The contents of the client report worksheets.
+        """
+        return [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+
+    def resume_test(self, tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.create_client_reports(True, save_wb=False)
+        expected_reports = self._reports(client_info)
+        expected_client_cnt = len(client_info.client_reg.client_id_list)
+
+        # Fail part way through the second content worksheet.
+        client_info = ClientInformationWorkbook(wb_filename)
+        checkpoint = client_info.enable_checkpoints(row_interval=5)
+        failing_ws_name = client_info.cliprt_wb.sheetnames[2]
+        def identity_listener(ws_name, row_idx, _identity):
+            if ws_name == failing_ws_name and row_idx == 13:
+                raise Exception('Simulated failure')
+        client_info.identity_listener = identity_listener
+        with pytest.raises(Exception):
+            client_info.create_client_reports(True, save_wb=False)
+        assert checkpoint.exists()
+        assert checkpoint.ws_name == failing_ws_name
+        assert checkpoint.row_idx == 11
+
+        # Resume and compare to the uninterrupted run.
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.create_client_reports(True, save_wb=False, resume=True)
+        assert len(client_info.client_reg.client_id_list) == expected_client_cnt
+        assert self._reports(client_info) == expected_reports
+        assert not client_info.checkpoint.exists()
+
+    def _run(self, wb_filename, interrupt=False):
+        """
+        Create the client reports with the duplicate row detector, the
+        quarantine and incremental runs enabled.  Rows 3 and 12 of the
+        first content worksheet fail.  If requested, the run is
+        interrupted part way through the second content worksheet and
+        resumed.
+        """
+        client_info = ClientInformationWorkbook(wb_filename)
+        ws_names = client_info.cliprt_wb.sheetnames
+        def identity_listener(ws_name, row_idx, _identity):
+            if ws_name == ws_names[1] and row_idx in [3, 12]:
+                raise ValueError('Simulated row failure')
+        def progress_listener(ws_name, row_cnt, _row_total):
+            if ws_name == ws_names[2] and row_cnt == 12:
+                raise KeyboardInterrupt('Simulated interruption')
+        resume = False
+        if interrupt:
+            client_info.enable_checkpoints(row_interval=5)
+            client_info.enable_duplicate_row_detection()
+            client_info.enable_quarantine()
+            client_info.enable_incremental_runs()
+            client_info.identity_listener = identity_listener
+            client_info.progress_listener = progress_listener
+            with pytest.raises(KeyboardInterrupt):
+                client_info.create_client_reports(True, save_wb=False)
+            assert client_info.checkpoint.exists()
+            client_info = ClientInformationWorkbook(wb_filename)
+            resume = True
+        client_info.enable_duplicate_row_detection()
+        client_info.enable_quarantine()
+        client_info.enable_incremental_runs()
+        client_info.identity_listener = identity_listener
+        client_info.create_client_reports(True, save_wb=False, resume=resume)
+        return {
+            'reports': self._reports(client_info),
+            'client_cnt': len(client_info.client_reg.client_id_list),
+            'duplicate_cnts': client_info.duplicate_rows.duplicate_cnts,
+            'quarantined_rows': client_info.quarantine.rows,
+            'ws_states': client_info.run_state.ws_states,
+            }
+
+    def resume_processing_state_test(self, tmp_path):
+        """
+        Unit test
+        """
+        results = []
+        for interrupt in [False, True]:
+            wb_filename = str(tmp_path / f'workbook_{interrupt}.xlsx')
+            shutil.copy(self.client_wb_file, wb_filename)
+            results.append(self._run(wb_filename, interrupt))
+        assert len(results[0]['quarantined_rows']) == 2
+        assert results[1] == results[0]
+
+    @staticmethod
+    def checkpoint_filename_test(tmp_path):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(None, openpyxl.Workbook())
+        with pytest.raises(Exception) as excinfo:
+            client_info.enable_checkpoints()
+        assert '(E4011)' in excinfo.value.args[0]
+        checkpoint_filename = str(tmp_path / 'reports.checkpoint.json.gz')
+        checkpoint = client_info.enable_checkpoints(checkpoint_filename=checkpoint_filename)
+        assert checkpoint.checkpoint_filename == checkpoint_filename
+
+    def restore_test(self, tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+        client_info = ClientInformationWorkbook(wb_filename)
+        checkpoint = client_info.enable_checkpoints()
+        assert not checkpoint.restore()
+
+        # A checkpoint does not apply to a workbook with a different DED.
+        client_info.hydrate_ded()
+        checkpoint.save()
+        client_info.ded_ws.cell(1, 1).value = 'Changed'
+        with pytest.raises(Exception):
+            checkpoint.restore()
+        assert checkpoint.remove()
+        assert not checkpoint.remove()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import gzip
+import json
+import pytest
+from cliprt.classes.client_identity import ClientIdentity
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.identifier import Identifier
+from cliprt.classes.report_partitioner import ReportPartitioner
+
+class ReportPartitionerTest:
+    """
+    Report partitioner test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def _reports(client_info):
+        """
+        The contents of the client reports.
+        """
+        return [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+
+    @staticmethod
+    def _identifiers(client_info, identifier_clients):
+        """
+        The identifiers of (data element name, value) with their client
+        ids.
+        """
+        identifiers = {}
+        for (de_name, de_value), client_idnos in identifier_clients.items():
+            identifier = Identifier(de_name, de_value, client_info.ded_processor.ded)
+            identifier.client_ids.update(client_idnos)
+            identifiers[identifier.key] = identifier
+        return identifiers
+
+    def _partition_reports(self, tmp_path, partition_cnt):
+        """
+        Partition the test workbook, resolve the partitions and merge
+        them.
+        """
+        partitioner = ReportPartitioner(partition_cnt)
+        partition_filenames =\
+            partitioner.partition(self.client_wb_file, str(tmp_path / 'partitions'))
+        assert len(partition_filenames) == partition_cnt
+        state_filenames = [
+            partitioner.resolve_partition(partition_filename)
+            for partition_filename in partition_filenames
+            ]
+        return partitioner, state_filenames,\
+            partitioner.merge(self.client_wb_file, state_filenames, save_wb=False)
+
+    def partition_test(self, tmp_path):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.hydrate_ded()
+        client_info.create_content_ws_names_list()
+        partitioner = ReportPartitioner(3)
+        assert partitioner.blocking_key([]) is None
+
+        # Every content row lands in exactly one partition.
+        row_cnt = 0
+        for ws_name in client_info.content_ws_names:
+            cliprt_ws = client_info.cliprt_wb[ws_name]
+            row_cnt += cliprt_ws.max_row - cliprt_ws.min_row
+        partition_row_cnt = 0
+        for partition_filename in partitioner.partition(
+                self.client_wb_file,
+                str(tmp_path / 'partitions')
+            ):
+            partition_info = ClientInformationWorkbook(partition_filename)
+            assert partition_info.ded_processor.ded_content_hash() ==\
+                client_info.ded_processor.ded_content_hash()
+            for ws_name in client_info.content_ws_names:
+                cliprt_ws = partition_info.cliprt_wb[ws_name]
+                partition_row_cnt += cliprt_ws.max_row - cliprt_ws.min_row
+        assert partition_row_cnt == row_cnt
+
+    def join_clients_test(self):
+        """
+        Unit test
+        """
+        partitioner = ReportPartitioner()
+        parents = {client_idno: client_idno for client_idno in [1, 2, 3, 4]}
+        assert partitioner.join_clients(parents, 3, 4)
+        assert partitioner.join_clients(parents, 2, 4)
+        assert not partitioner.join_clients(parents, 2, 3)
+        assert partitioner.find_client_idno(parents, 4) == 2
+        assert partitioner.find_client_idno(parents, 1) == 1
+
+    def join_partitioned_clients_test(self):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.hydrate_ded()
+        partitioner = ReportPartitioner()
+        client_partitions = {1: 0, 2: 0, 3: 1, 4: 1}
+        identifiers = self._identifiers(client_info, {
+            ('name', 'Jon Smith'): [1, 3, 4],
+            ('phone', '555-123-4567'): [1, 3],
+            ('name', 'Ann Lee'): [2, 4],
+            ('email', 'ann@example.com'): [2, 4],
+            ('phone', '555-765-4321'): [1, 2],
+            })
+
+        # Clients of different partitions that share identifiers of two
+        # identifier types are joined.  Clients of the same partition, or
+        # that share a single identifier type, are not.
+        parents, joined_cnt = partitioner.join_partitioned_clients(
+            client_partitions,
+            identifiers,
+            client_info.identifier_reg,
+            2
+            )
+        assert joined_cnt == 2
+        assert [partitioner.find_client_idno(parents, client_idno)
+                for client_idno in [1, 2, 3, 4]] == [1, 2, 1, 2]
+        parents, joined_cnt = partitioner.join_partitioned_clients(
+            client_partitions,
+            identifiers,
+            client_info.identifier_reg,
+            1
+            )
+        assert joined_cnt == 3
+
+        # Stopped identifiers, and identifiers shared by too many
+        # clients, do not join clients.
+        client_info.identifier_reg.add_stop_list(['ann@example.com'])
+        client_info.identifier_reg.fan_out_threshold = 2
+        parents, joined_cnt = partitioner.join_partitioned_clients(
+            client_partitions,
+            identifiers,
+            client_info.identifier_reg,
+            1
+            )
+        assert joined_cnt == 2
+        assert [partitioner.find_client_idno(parents, client_idno)
+                for client_idno in [1, 2, 3, 4]] == [1, 2, 1, 2]
+        parents, joined_cnt = partitioner.join_partitioned_clients(
+            client_partitions,
+            identifiers,
+            client_info.identifier_reg,
+            2
+            )
+        assert joined_cnt == 0
+
+    def merge_row_test(self):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.hydrate_ded()
+        client_info.dest_ws_reg.prep_worksheets()
+        identity = ClientIdentity(1, client_info.dest_ws_reg)
+        client_info.client_reg.client_id_list[1] = identity
+        row_idx = identity.get_row_idx('ims')
+        cliprt_ws = client_info.cliprt_wb[client_info.dest_ws_reg.dest_ws_list['ims']]
+
+        # Values holding commas are kept whole.
+        ReportPartitioner.merge_row(client_info, identity, 'ims', [None, None, 'Jane Doe'])
+        ReportPartitioner.merge_row(client_info, identity, 'ims', [None, None, 'Doe, Jane'])
+        ReportPartitioner.merge_row(client_info, identity, 'ims', [None, None, 'Doe, Jane'])
+        assert cliprt_ws.cell(row_idx, 3).value == 'Jane Doe, Doe, Jane'
+
+    def merge_test(self, tmp_path):
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.enable_hashed_client_ids()
+        client_info.create_client_reports(True, save_wb=False)
+
+        # A single partition gives the same reports as a single run.
+        _, _, merged_info = self._partition_reports(tmp_path / 'single', 1)
+        assert self._reports(merged_info) == self._reports(client_info)
+
+        # The clients split across partitions are joined again.
+        partitioner, state_filenames, merged_info =\
+            self._partition_reports(tmp_path / 'split', 3)
+        assert len(merged_info.client_reg.client_id_list) ==\
+            len(client_info.client_reg.client_id_list)
+
+        # Partial states must match the DED of the workbook.
+        with gzip.open(state_filenames[0], 'rt', encoding='utf8') as state_file:
+            state = json.load(state_file)
+        state['reports']['ded_hash'] = 'other'
+        with gzip.open(state_filenames[0], 'wt', encoding='utf8') as state_file:
+            json.dump(state, state_file)
+        with pytest.raises(Exception) as excinfo:
+            partitioner.merge(self.client_wb_file, state_filenames, save_wb=False)
+        assert 'E4020' in excinfo.value.args[0]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import asyncio
+import io
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+import openpyxl
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.report_service import ReportJob, ReportService
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+class ReportServiceTest:
+    """
+    Report service test harness.  The service is run in its own thread
+    and event loop, and is used as any other HTTP client would.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def _request(service, path, body=None):
+        """
+        Send a request to the service.  Returns the status and the body.
+        """
+        request = urllib.request.Request(
+            f'http://{service.host}:{service.port}{path}',
+            data=body,
+            method='GET' if body is None else 'POST'
+            )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as err:
+            return err.code, err.read()
+
+    @staticmethod
+    def _start_service(service):
+        """
+        Run the service in a background event loop.
+        """
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(service.start(), loop).result()
+        return loop
+
+    @staticmethod
+    def _stop_service(service, loop):
+        """
+        Stop the service and its event loop.
+        """
+        asyncio.run_coroutine_threadsafe(service.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _submit(self, service, body):
+        """
+        Submit a job and follow its progress until it is finished.
+        """
+        status, response = self._request(service, '/jobs', body)
+        assert status == 202
+        job_id = json.loads(response)['job_id']
+        status, response = self._request(service, f'/jobs/{job_id}/progress')
+        assert status == 200
+        events = [json.loads(line) for line in response.splitlines()]
+        assert events[0]['status'] == ReportJob.QUEUED
+        return job_id, events
+
+    def csv_archive_to_workbook_test(self, tmp_path):
+        """
+        Unit test
+        """
+        generator = SyntheticWorkbookGenerator(client_cnt=10, seed=3)
+        generator.save_csv_sources(str(tmp_path))
+        archive_bytes = io.BytesIO()
+        with zipfile.ZipFile(archive_bytes, 'w') as archive:
+            for csv_name in os.listdir(tmp_path):
+                archive.write(tmp_path / csv_name, csv_name)
+        wb_filename = str(tmp_path / 'sources.xlsx')
+        with zipfile.ZipFile(archive_bytes) as archive:
+            assert ReportService.csv_archive_to_workbook(archive, wb_filename)
+        cliprt_wb = openpyxl.load_workbook(wb_filename)
+        assert cliprt_wb.sheetnames[0] == 'DED'
+        assert len(cliprt_wb.sheetnames) == 1 + len(generator.content_ws)
+
+        with zipfile.ZipFile(io.BytesIO(), 'w') as archive:
+            archive.writestr('Source 1.csv', 'Name\nJane\n')
+            assert not ReportService.csv_archive_to_workbook(archive, wb_filename)
+
+    def service_test(self):
+        """
+        Unit test
+        """
+        # Each worker has a DED cache of its own, so one worker is used
+        # for the DED cache to be hit.
+        service = ReportService(port=0, worker_cnt=1, max_jobs=3)
+        loop = self._start_service(service)
+        try:
+            with open(self.client_wb_file, 'rb') as wb_file:
+                wb_bytes = wb_file.read()
+
+            job_id, events = self._submit(service, wb_bytes)
+            assert events[-1]['status'] == ReportJob.DONE
+            assert any('rows_done' in event for event in events)
+            status, response = self._request(service, f'/jobs/{job_id}')
+            assert status == 200
+            assert json.loads(response)['status'] == ReportJob.DONE
+            status, response = self._request(service, f'/jobs/{job_id}/report')
+            assert status == 200
+            report_wb = openpyxl.load_workbook(io.BytesIO(response))
+            assert 'comm_report_for_ims' in report_wb.sheetnames
+
+            # The second submission of the same DED skips the hydration.
+            self._submit(service, wb_bytes)
+            assert service.ded_cache_hits == 1
+            assert service.ded_cache_misses == 1
+
+            # Errors.
+            assert self._request(service, '/jobs', b'not a workbook')[0] == 415
+            assert self._request(service, '/jobs/nope')[0] == 404
+            assert self._request(service, '/reports')[0] == 404
+            archive_bytes = io.BytesIO()
+            with zipfile.ZipFile(archive_bytes, 'w') as archive:
+                archive.writestr('Source 1.csv', 'Name\nJane\n')
+            job_id, events = self._submit(service, archive_bytes.getvalue())
+            assert events[-1]['status'] == ReportJob.FAILED
+            assert self._request(service, f'/jobs/{job_id}/report')[0] == 409
+
+            # The oldest finished jobs, and their files, are removed to
+            # keep at most max_jobs jobs.
+            first_job_id = next(iter(service.jobs))
+            self._submit(service, wb_bytes)
+            assert len(service.jobs) == 3
+            assert self._request(service, f'/jobs/{first_job_id}')[0] == 404
+            assert not os.path.exists(os.path.join(service.jobs_dir, f'{first_job_id}.xlsx'))
+        finally:
+            self._stop_service(service, loop)
+        assert service.jobs_dir is None
+
+    @staticmethod
+    def evict_jobs_test():
+        """
+        Unit test
+        """
+        service = ReportService(max_jobs=2, job_ttl_secs=60)
+        for job_id in ['a', 'b', 'c']:
+            service.jobs[job_id] = ReportJob(job_id, f'{job_id}.xlsx', f'{job_id}.xlsx')
+        # Unfinished jobs are kept.
+        assert not service.evict_jobs()
+        service.jobs['b'].set_status(ReportJob.DONE)
+        service.jobs['c'].set_status(ReportJob.FAILED, 'error')
+        assert [job.job_id for job in service.evict_jobs()] == ['b', 'c']
+        assert list(service.jobs) == ['a']
+
+        # Expired jobs are removed however many jobs there are.
+        service.jobs['a'].set_status(ReportJob.DONE)
+        assert not service.evict_jobs()
+        service.job_ttl_secs = 0
+        assert [job.job_id for job in service.evict_jobs()] == ['a']
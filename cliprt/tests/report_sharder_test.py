@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import os
+import shutil
+import openpyxl
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class ReportSharderTest:
+    """
+    Report sharder test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+    shard_size = 10
+
+    def _expected_reports(self):
+        """
+        The client reports of the test workbook, without sharding.
+        """
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        client_info.create_client_reports(True, save_wb=False)
+        return {
+            dest_ws.cliprt_ws_name: list(dest_ws.cliprt_ws.values)
+            for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values()
+            }
+
+    def _assert_shards(self, expected_rows, shard_rows):
+        """
+        The shards hold the rows of the report, with the column headings
+        replicated.
+        """
+        rows = [expected_rows[0]]
+        for shard in shard_rows:
+            assert shard[0] == expected_rows[0]
+            assert 1 < len(shard) <= self.shard_size + 1
+            rows.extend(shard[1:])
+        assert rows == expected_rows
+
+    def shard_worksheets_test(self, tmp_path):
+        """
+        Unit test
+        """
+        expected_reports = self._expected_reports()
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        shutil.copy(self.client_wb_file, wb_filename)
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_report_sharding(self.shard_size)
+        client_info.create_client_reports(True)
+
+        sharded_cnt = 0
+        for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values():
+            expected_rows = expected_reports[dest_ws.cliprt_ws_name]
+            if len(expected_rows) <= self.shard_size + 1:
+                assert not dest_ws.shard_ws_names
+                assert list(dest_ws.cliprt_ws.values) == expected_rows
+                continue
+            sharded_cnt += 1
+            assert dest_ws.cliprt_ws_name not in client_info.cliprt_wb
+            assert dest_ws.shard_ws_names[0] == dest_ws.cliprt_ws_name + '_1'
+            # The rows are moved: the report worksheet is the first
+            # shard.
+            assert client_info.cliprt_wb[dest_ws.shard_ws_names[0]] is dest_ws.cliprt_ws
+            self._assert_shards(expected_rows, [
+                list(client_info.cliprt_wb[ws_name].values)
+                for ws_name in dest_ws.shard_ws_names
+                ])
+        assert sharded_cnt > 0
+
+        # The shards are replaced on the next run.
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.create_client_reports(True, save_wb=False)
+        for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values():
+            assert list(dest_ws.cliprt_ws.values) ==\
+                expected_reports[dest_ws.cliprt_ws_name]
+        assert sorted(client_info.cliprt_wb.sheetnames) ==\
+            sorted(openpyxl.load_workbook(self.client_wb_file).sheetnames)
+
+    def shard_files_test(self, tmp_path):
+        """
+        Unit test
+        """
+        expected_reports = self._expected_reports()
+        client_info = ClientInformationWorkbook(self.client_wb_file)
+        report_sharder = client_info.enable_report_sharding(
+            self.shard_size,
+            str(tmp_path),
+            max_workers=2
+            )
+        client_info.create_client_reports(True, save_wb=False)
+        assert len(report_sharder.shard_filenames) > 1
+        assert sorted(os.listdir(tmp_path)) ==\
+            sorted(os.path.basename(filename) for filename in report_sharder.shard_filenames)
+        for dest_ws in client_info.dest_ws_reg.dest_ws_by_ind_list.values():
+            if not dest_ws.shard_ws_names:
+                continue
+            assert dest_ws.cliprt_ws_name not in client_info.cliprt_wb
+            shard_rows = []
+            for ws_name in dest_ws.shard_ws_names:
+                shard_wb = openpyxl.load_workbook(str(tmp_path / f'{ws_name}.xlsx'))
+                assert shard_wb.sheetnames == [ws_name]
+                shard_rows.append(list(shard_wb[ws_name].values))
+            self._assert_shards(expected_reports[dest_ws.cliprt_ws_name], shard_rows)
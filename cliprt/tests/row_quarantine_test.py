@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import csv
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+
+class RowQuarantineTest:
+    """
+    Row quarantine test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    def _create_test_workbook(self, tmp_path):
+        """
+        A copy of the test workbook with a date that cannot be read.
+        """
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        wb_filename = str(tmp_path / 'workbook.xlsx')
+        cliprt_wb = openpyxl.load_workbook(self.client_wb_file)
+        cliprt_ws = cliprt_wb['First Visit']
+        cliprt_ws.cell(row=1, column=3, value='First Visit Date')
+        cliprt_ws.cell(row=5, column=3, value='not a date')
+        cliprt_wb.save(wb_filename)
+        return wb_filename
+
+    def quarantine_row_test(self, tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = self._create_test_workbook(tmp_path)
+        client_info = ClientInformationWorkbook(wb_filename)
+        with pytest.raises(Exception):
+            client_info.create_client_reports(True, save_wb=False)
+
+        # The row is quarantined with or without the pipeline.
+        expected_row = ('First Visit', 5, 'First Visit Date',
+            'ParserError: Unknown string format: not a date')
+        for chunk_size in [None, 3]:
+            client_info = ClientInformationWorkbook(wb_filename)
+            quarantine = client_info.enable_quarantine()
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            assert client_info.create_client_reports(True, save_wb=False)
+            assert quarantine.rows == [expected_row]
+            assert len(client_info.client_reg.client_id_list) == 66
+            quarantine_ws = client_info.cliprt_wb[client_info.QUARANTINE_WS_NAME]
+            assert list(quarantine_ws.values) ==\
+                [tuple(quarantine.HEADINGS), expected_row]
+            assert client_info.QUARANTINE_WS_NAME not in client_info.content_ws_names
+
+        # The run is aborted once the error budget is spent.
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_quarantine(error_budget=0)
+        with pytest.raises(Exception) as excinfo:
+            client_info.create_client_reports(True, save_wb=False)
+        assert 'E4030' in excinfo.value.args[0]
+
+    def quarantined_row_test(self, tmp_path):
+        """
+        Unit test
+        """
+        # The row that cannot be read, and a copy of it at the end, are
+        # left out, and so is the row in another workbook.
+        # Imported on first use to keep the startup fast.
+        import openpyxl #pylint: disable=import-outside-toplevel
+        wb_filename = self._create_test_workbook(tmp_path)
+        cliprt_wb = openpyxl.load_workbook(wb_filename)
+        cliprt_ws = cliprt_wb['First Visit']
+        cliprt_ws.append([cell.value for cell in cliprt_ws[5]])
+        cliprt_wb.save(wb_filename)
+        cliprt_ws.delete_rows(cliprt_ws.max_row)
+        cliprt_ws.delete_rows(5)
+        expected_wb_filename = str(tmp_path / 'expected_workbook.xlsx')
+        cliprt_wb.save(expected_wb_filename)
+
+        # A quarantined row leaves no cells, identifiers or clients
+        # behind, and its copy is not taken for a duplicate.
+        expected_client_info = ClientInformationWorkbook(expected_wb_filename)
+        expected_client_info.create_client_reports(True, save_wb=False)
+        for chunk_size in [None, 3]:
+            client_info = ClientInformationWorkbook(wb_filename)
+            quarantine = client_info.enable_quarantine()
+            client_info.enable_duplicate_row_detection()
+            if chunk_size is not None:
+                client_info.enable_pipeline(chunk_size)
+            client_info.create_client_reports(True, save_wb=False)
+            assert [row[:2] for row in quarantine.rows] ==\
+                [('First Visit', 5), ('First Visit', cliprt_ws.max_row + 2)]
+            assert client_info.duplicate_rows.duplicate_cnts.get('First Visit', 0) == 0
+            assert client_info.identifier_reg.identifier_list.keys() ==\
+                expected_client_info.identifier_reg.identifier_list.keys()
+            assert client_info.client_reg.client_id_list.keys() ==\
+                expected_client_info.client_reg.client_id_list.keys()
+            for ws_name in client_info.dest_ws_reg.dest_ws_names:
+                assert list(client_info.cliprt_wb[ws_name].values) ==\
+                    list(expected_client_info.cliprt_wb[ws_name].values)
+
+    def save_test(self, tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = self._create_test_workbook(tmp_path)
+        csv_filename = str(tmp_path / 'quarantine.csv')
+        client_info = ClientInformationWorkbook(wb_filename)
+        client_info.enable_quarantine(csv_filename=csv_filename)
+        client_info.create_client_reports(True, save_wb=False)
+        assert client_info.QUARANTINE_WS_NAME not in client_info.cliprt_wb.sheetnames
+        with open(csv_filename, newline='', encoding='utf8') as csv_file:
+            rows = list(csv.reader(csv_file))
+        assert rows[0] == ['worksheet', 'row', 'column', 'error']
+        assert rows[1][:3] == ['First Visit', '5', 'First Visit Date']
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import shutil
+import openpyxl
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_settings import CLIPRT_SETTINGS
+from cliprt.classes.run_state import RunState
+
+class RunStateTest:
+    """
+    Run state test harness.
+    """
+    client_wb_file = CLIPRT_SETTINGS.test_resources_path + '/test_workbook.xlsx'
+
+    @staticmethod
+    def _run(wb_filename, incremental=True, chunk_size=None):
+        """
+        Create the client reports.  Returns the workbook and the rows
+        that were resolved.
+        """
+        resolved_rows = []
+        client_info = ClientInformationWorkbook(wb_filename)
+        if incremental:
+            client_info.enable_incremental_runs()
+        if chunk_size:
+            client_info.enable_pipeline(chunk_size)
+        client_info.identity_listener =\
+            lambda ws_name, row_idx, _identity: resolved_rows.append((ws_name, row_idx))
+        client_info.create_client_reports(True)
+        return client_info, resolved_rows
+
+    @staticmethod
+    def _reports(client_info):
+        """
+        The contents of the client report worksheets.
+        """
+        return [
+            list(client_info.cliprt_wb[ws_name].values)
+            for ws_name in client_info.dest_ws_reg.dest_ws_names
+            ]
+
+    def incremental_run_test(self, tmp_path):
+        """
+        Unit test
+        """
+        for chunk_size in [None, 3]:
+            wb_filename = str(tmp_path / f'workbook_{chunk_size}.xlsx')
+            shutil.copy(self.client_wb_file, wb_filename)
+
+            # The first run processes everything.
+            client_info, resolved_rows = self._run(wb_filename, chunk_size=chunk_size)
+            assert resolved_rows
+            assert client_info.run_state.exists()
+            expected_reports = self._reports(client_info)
+
+            # Nothing has changed.
+            client_info, resolved_rows = self._run(wb_filename, chunk_size=chunk_size)
+            assert not resolved_rows
+            assert self._reports(client_info) == expected_reports
+
+            # Only the appended row is processed, and the reports are the
+            # same as those of a full run.
+            cliprt_wb = openpyxl.load_workbook(wb_filename)
+            content_ws_name = client_info.content_ws_names[-1]
+            content_ws = cliprt_wb[content_ws_name]
+            new_row = [cell.value for cell in content_ws[content_ws.max_row]]
+            new_row[0] = 'Zed Newcomer'
+            content_ws.append(new_row)
+            cliprt_wb.save(wb_filename)
+            client_info, resolved_rows = self._run(wb_filename, chunk_size=chunk_size)
+            assert resolved_rows == [(content_ws_name, content_ws.max_row)]
+            incremental_reports = self._reports(client_info)
+            client_info, _ = self._run(wb_filename, incremental=False)
+            assert incremental_reports == self._reports(client_info)
+
+    @staticmethod
+    def hash_row_test():
+        """
+        Unit test
+        """
+        assert RunState.hash_row(('a', 1)) == RunState.hash_row(('a', 1))
+        assert RunState.hash_row(('a', 1)) != RunState.hash_row(('a', '1'))
+        assert len(RunState.hash_row((None,))) == 16
+
+    @staticmethod
+    def run_state_filename_test():
+        """
+        Unit test
+        """
+        client_info = ClientInformationWorkbook(None, openpyxl.Workbook())
+        with pytest.raises(Exception) as excinfo:
+            client_info.enable_incremental_runs()
+        assert '(E4012)' in excinfo.value.args[0]
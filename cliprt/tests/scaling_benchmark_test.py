@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import json
+from cliprt.classes.scaling_benchmark import ScalingBenchmark
+
+class ScalingBenchmarkTest:
+    """
+    Scaling benchmark test harness.
+    """
+    @staticmethod
+    def init_test():
+        """
+        Unit test
+        """
+        benchmark = ScalingBenchmark()
+        assert benchmark.row_cnts == ScalingBenchmark.DEFAULT_ROW_CNTS
+        assert benchmark.isolate
+
+    @staticmethod
+    def run_test(tmp_path):
+        """
+        Unit test
+        """
+        benchmark = ScalingBenchmark(row_cnts=[50, 100], isolate=False)
+        results = benchmark.run()
+        assert len(results) == 2
+        for result in results:
+            assert result['rows_per_sec'] > 0
+            assert result['total_secs'] >= result['report_secs']
+            assert result['identified_client_cnt'] >= result['client_cnt']
+        assert results[0]['row_cnt'] < results[1]['row_cnt']
+        assert 'rows/s' in benchmark.format_result(results[0])
+
+        results_filename = benchmark.save_results(str(tmp_path / 'results.json'))
+        with open(results_filename, encoding='utf8') as results_file:
+            assert json.load(results_file) == results
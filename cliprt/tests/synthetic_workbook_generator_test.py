@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#pylint: disable=import-error
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import os
+import random
+import pytest
+from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+class SyntheticWorkbookGeneratorTest:
+    """
+    Synthetic workbook generator test harness.
+    """
+    @staticmethod
+    def client_cnt_for_rows_test():
+        """
+        Unit test
+        """
+        assert SyntheticWorkbookGenerator.client_cnt_for_rows(1250, 0.25) == 1000
+        assert SyntheticWorkbookGenerator.client_cnt_for_rows(0, 0.25) == 1
+
+    @staticmethod
+    def generate_test():
+        """
+        Unit test
+        """
+        generator = SyntheticWorkbookGenerator(client_cnt=100, seed=7)
+        content_ws = generator.generate()
+        assert len(content_ws) == 3
+        assert generator.row_cnt >= 100
+        assert sum(len(labels) for labels in generator.row_labels.values())\
+            == generator.row_cnt
+
+        # The same seed produces the same rows.
+        assert SyntheticWorkbookGenerator(client_cnt=100, seed=7).generate()\
+            == content_ws
+        assert SyntheticWorkbookGenerator(client_cnt=100, seed=8).generate()\
+            != content_ws
+
+        # Every client appears at least once.
+        client_nos = set()
+        for labels in generator.row_labels.values():
+            client_nos.update(labels)
+        assert client_nos == set(range(100))
+
+        with pytest.raises(Exception) as excinfo:
+            SyntheticWorkbookGenerator(ded_shape='square')
+        assert 'square' in excinfo.value.args[0]
+
+    @staticmethod
+    def ambiguity_test():
+        """
+        Unit test
+        """
+        generator = SyntheticWorkbookGenerator(
+            client_cnt=200,
+            household_rate=0.5,
+            typo_rate=0.2,
+            missing_rate=0.2,
+            seed=7
+            )
+        content_ws = generator.generate()
+        # Households share a phone.
+        assert len(set(generator.household_nos)) < 200
+        assert generator.email_client_nos != list(range(200))
+        values = [
+            value
+            for rows in content_ws.values()
+            for row in rows[1:]
+            for value in row
+            ]
+        assert None in values
+        rng = random.Random(1)
+        typos = {generator.make_typo(rng, 'jon.smith') for _ in range(50)}
+        assert 'jon.smith' in typos
+        assert 'jon.msith' in typos or len(typos) > 2
+
+    @staticmethod
+    def content_col_names_test():
+        """
+        Unit test
+        """
+        generator = SyntheticWorkbookGenerator(ded_shape='wide')
+        assert 'Client' in generator.content_col_names(0)
+        assert 'First Name' in generator.content_col_names(1)
+        assert 'Note 8' in generator.content_col_names(0)
+        generator = SyntheticWorkbookGenerator(
+            ded_shape='minimal',
+            fragment_cols=False
+            )
+        assert generator.content_col_names(1) ==\
+            ['Client ID', 'Client', 'Home Phone', 'Email']
+
+    @staticmethod
+    def save_csv_sources_test(tmp_path):
+        """
+        Unit test
+        """
+        generator = SyntheticWorkbookGenerator(client_cnt=10)
+        ws_names = generator.save_csv_sources(str(tmp_path))
+        assert ws_names == ['DED', 'Source 1', 'Source 2', 'Source 3']
+        for ws_name in ws_names:
+            assert os.path.exists(os.path.join(str(tmp_path), f'{ws_name}.csv'))
+
+    @staticmethod
+    def save_workbook_test(tmp_path):
+        """
+        Unit test
+        """
+        wb_filename = str(tmp_path / 'synthetic.xlsx')
+        generator = SyntheticWorkbookGenerator(client_cnt=40, ded_shape='wide')
+        generator.save_workbook(wb_filename)
+        client_info = ClientInformationWorkbook(wb_filename)
+        assert client_info.has_a_ded_ws()
+        assert client_info.create_client_reports(True, save_wb=False)
+        assert 40 <= len(client_info.client_reg.client_id_list)\
+            <= generator.row_cnt
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#pylint: disable=invalid-name
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+            CLIPRT, sounds like liberty.  Pronounced clipperty.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import argparse
+import sys
+
+from cliprt.classes.hot_function_benchmark import HotFunctionBenchmark
+from cliprt.classes.identity_resolution_evaluator\
+    import IdentityResolutionEvaluator
+from cliprt.classes.scaling_benchmark import ScalingBenchmark
+from cliprt.classes.synthetic_workbook_generator import SyntheticWorkbookGenerator
+
+def evaluate(args):
+    """
+    Score identity resolution quality and throughput on labelled
+    synthetic client data.
+    """
+    evaluator = IdentityResolutionEvaluator(
+        client_cnt=args.clients,
+        content_ws_cnt=args.worksheets,
+        duplication_rate=args.duplication_rate,
+        identifier_noise=args.identifier_noise,
+        ded_shape=args.ded_shape,
+        seed=args.seed,
+        client_id_col=args.client_id_col,
+        household_rate=args.household_rate,
+        typo_rate=args.typo_rate,
+        missing_rate=args.missing_rate,
+        isolate=not args.in_process
+        )
+    for result in evaluator.evaluate(args.thresholds):
+        print(evaluator.format_result(result))
+    if args.output:
+        evaluator.save_results(args.output)
+    return 0
+
+def generate(args):
+    """
+    Generate a synthetic client information workbook or CSV sources.
+    """
+    generator = SyntheticWorkbookGenerator(
+        client_cnt=args.clients,
+        content_ws_cnt=args.worksheets,
+        duplication_rate=args.duplication_rate,
+        identifier_noise=args.identifier_noise,
+        fragment_cols=not args.no_fragments,
+        ded_shape=args.ded_shape,
+        seed=args.seed
+        )
+    if args.csv:
+        generator.save_csv_sources(args.output)
+    else:
+        generator.save_workbook(args.output)
+    print(f'Generated {generator.row_cnt} content rows for '\
+        f'{generator.client_cnt} clients: {args.output}')
+    return 0
+
+def micro(args):
+    """
+    Time the hot functions.  Save the results as the new baseline, or
+    compare them to the existing baseline and fail on regressions.
+    """
+    benchmark = HotFunctionBenchmark(repeat=args.repeat, min_secs=args.min_secs)
+    results = benchmark.run(args.names)
+    baseline = None
+    if args.compare:
+        baseline = HotFunctionBenchmark.load_baseline(args.baseline)
+    for name, result in results.items():
+        baseline_str = ''
+        if baseline and name in baseline:
+            baseline_str = f" (baseline {baseline[name]['ns_per_call']:.1f} ns)"
+        print(f"{name:<25} {result['ns_per_call']:>12.1f} ns/call{baseline_str}")
+    if not args.compare:
+        benchmark.save_baseline(args.baseline)
+        print(f'Baseline saved: {args.baseline}')
+        return 0
+    regressions = HotFunctionBenchmark.compare(baseline, results, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression['name']} is "\
+            f"{regression['change']:.1%} slower than the baseline.")
+    return 1 if regressions else 0
+
+def scaling(args):
+    """
+    Time the creation of the client reports for increasingly large
+    synthetic workbooks.
+    """
+    benchmark = ScalingBenchmark(
+        row_cnts=args.rows,
+        duplication_rate=args.duplication_rate,
+        identifier_noise=args.identifier_noise,
+        ded_shape=args.ded_shape,
+        seed=args.seed,
+        isolate=not args.in_process
+        )
+    benchmark.run(progress_reporting_is_disabled=False)
+    if args.output:
+        benchmark.save_results(args.output)
+    return 0
+
+def add_data_args(parser):
+    """
+    Synthetic data options shared by the commands.
+    """
+    parser.add_argument('--duplication-rate', type=float, default=0.25)
+    parser.add_argument('--identifier-noise', type=float, default=0.25)
+    parser.add_argument(
+        '--ded-shape',
+        choices=SyntheticWorkbookGenerator.DED_SHAPES,
+        default='standard'
+        )
+    parser.add_argument('--seed', type=int, default=1)
+
+def main(argv=None):
+    """
+    CLIPRT benchmarking command line interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog='cliprt_benchmark',
+        description='CLIPRT synthetic data and benchmarking tools.'
+        )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser(
+        'generate',
+        help='generate a synthetic workbook or CSV sources'
+        )
+    generate_parser.add_argument('output', help='workbook file or CSV directory')
+    generate_parser.add_argument('--clients', type=int, default=1000)
+    generate_parser.add_argument('--worksheets', type=int, default=3)
+    generate_parser.add_argument('--no-fragments', action='store_true')
+    generate_parser.add_argument('--csv', action='store_true')
+    add_data_args(generate_parser)
+    generate_parser.set_defaults(func=generate)
+
+    scaling_parser = commands.add_parser(
+        'scaling',
+        help='end-to-end scaling benchmark'
+        )
+    scaling_parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=ScalingBenchmark.DEFAULT_ROW_CNTS
+        )
+    scaling_parser.add_argument('--output', help='JSON results file')
+    scaling_parser.add_argument('--in-process', action='store_true')
+    add_data_args(scaling_parser)
+    scaling_parser.set_defaults(func=scaling)
+
+    evaluate_parser = commands.add_parser(
+        'evaluate',
+        help='identity resolution quality and throughput evaluation'
+        )
+    evaluate_parser.add_argument('--clients', type=int, default=1000)
+    evaluate_parser.add_argument('--worksheets', type=int, default=3)
+    evaluate_parser.add_argument(
+        '--thresholds',
+        type=int,
+        nargs='+',
+        help='identity match thresholds to compare'
+        )
+    evaluate_parser.add_argument(
+        '--client-id-col',
+        action='store_true',
+        help='include the client id column, which gives the true identities away'
+        )
+    for data_option in ['household_rate', 'typo_rate', 'missing_rate']:
+        evaluate_parser.add_argument(
+            '--' + data_option.replace('_', '-'),
+            type=float,
+            default=IdentityResolutionEvaluator.DATA_DEFAULTS[data_option]
+            )
+    evaluate_parser.add_argument('--output', help='JSON results file')
+    evaluate_parser.add_argument('--in-process', action='store_true')
+    add_data_args(evaluate_parser)
+    evaluate_parser.set_defaults(func=evaluate)
+
+    micro_parser = commands.add_parser(
+        'micro',
+        help='hot-function micro-benchmarks with a regression gate'
+        )
+    micro_parser.add_argument(
+        '--baseline',
+        default='benchmark_baseline.json',
+        help='baseline JSON file'
+        )
+    micro_parser.add_argument(
+        '--compare',
+        action='store_true',
+        help='compare to the baseline rather than saving a new one'
+        )
+    micro_parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=HotFunctionBenchmark.DEFAULT_TOLERANCE,
+        help='allowed slowdown before failing, e.g. 0.25 for 25%%'
+        )
+    micro_parser.add_argument('--repeat', type=int, default=5)
+    micro_parser.add_argument('--min-secs', type=float, default=0.2)
+    micro_parser.add_argument('names', nargs='*', help='benchmarks to run')
+    micro_parser.set_defaults(func=micro)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
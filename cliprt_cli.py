@@ -8,11 +8,14 @@ Project:    CLIPRT - Client Information Parsing and Reporting Tool.
 @author:    mhodges
 Copyright   2022 Michael Hodges
 """
+import argparse
 import os
 import sys
 
 from cliprt.classes.client_information_workbook import ClientInformationWorkbook
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
 from cliprt.classes.cliprt_user_guide import CliprtUserGuide
+from cliprt.classes.message_registry import MESSAGE_REGISTRY
 
 if sys.version_info[0] < 3:
     err_str = 'Error: Python version 3 is required. Found version {}.'
@@ -22,7 +25,7 @@ WELCOME_MSG =\
     'Welcome to CLIPRT, the Client Information Parsing and Reporting Tool.'
 EXIT_MSG = 'Ended cliprt as requested.'
 
-def request_create_client_reports(wb):
+def request_create_client_reports(wb, resume=False):
     """
     Create the client report worksheets.
     """
@@ -33,7 +36,7 @@ def request_create_client_reports(wb):
     print('\nCLIPR has started working on your client worksheets...'\
         'this may take some time.')
     print('  ...creating report worksheet(s)...')
-    wb.create_client_reports(verbosity)
+    wb.create_client_reports(verbosity, resume=resume)
     sys.exit(0)
 
 def request_create_ded(wb):
@@ -63,12 +66,183 @@ def request_print_ded(wb):
         wb.print_ded_report()
     return True
 
+def open_workbook(workbook_file):
+    """
+    Open the client data workbook.
+    """
+    print('  ...opening workbook...', end='')
+    wb = ClientInformationWorkbook(workbook_file)
+    print('opened!')
+    return wb
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.  Everything that is not provided
+    on the command line is prompted for.
+    """
+    parser = argparse.ArgumentParser(
+        prog='cliprt',
+        description=WELCOME_MSG
+        )
+    parser.add_argument(
+        'workbook',
+        nargs='?',
+        help='path and name of an Excel-compatible client workbook'
+        )
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='only validate the DED configuration of the workbook'
+        )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='continue the client reports from the last checkpoint'
+        )
+    parser.add_argument(
+        '--checkpoint-rows',
+        type=int,
+        metavar='N',
+        help='checkpoint the client reports after each worksheet and every N rows'
+        )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='only process what is new or changed since the previous '\
+            'incremental run'
+        )
+    parser.add_argument(
+        '--registry',
+        metavar='STORE_FILE',
+        help='keep the identifiers and clients in this registry store so '\
+            'that client ids stay the same from run to run'
+        )
+    parser.add_argument(
+        '--stop-list',
+        metavar='STOP_LIST_FILE',
+        help='never match clients on the identifier values listed in this '\
+            'file, one per line, or type::value to only stop one type'
+        )
+    parser.add_argument(
+        '--max-fan-out',
+        type=int,
+        metavar='N',
+        help='stop matching clients on an identifier once it is shared by '\
+            'more than N clients (default 50)'
+        )
+    parser.add_argument(
+        '--fuzzy-names',
+        action='store_true',
+        help='let similar names, not only equal names, match a client'
+        )
+    parser.add_argument(
+        '--name-similarity',
+        type=float,
+        metavar='S',
+        help='similarity, from 0 to 1, at which two names match (default 0.75)'
+        )
+    parser.add_argument(
+        '--hashed-client-ids',
+        action='store_true',
+        help='derive the client ids from the client identifiers rather than '\
+            'numbering the clients'
+        )
+    parser.add_argument(
+        '--empty-rows',
+        type=int,
+        metavar='N',
+        help='stop reading a worksheet after N empty rows in a row '\
+            '(default 1000)'
+        )
+    parser.add_argument(
+        '--tolerant',
+        action='store_true',
+        help='set the rows that fail aside in the cliprt_quarantine worksheet '\
+            'and keep going'
+        )
+    parser.add_argument(
+        '--error-budget',
+        type=int,
+        metavar='N',
+        help='in tolerant mode, abort once more than N rows fail (default 100)'
+        )
+    parser.add_argument(
+        '--quarantine-csv',
+        metavar='FILE',
+        help='in tolerant mode, save the rows that fail to this CSV file rather '\
+            'than to a worksheet'
+        )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='MB',
+        help='keep at most MB megabytes of report rows in memory, spilling the '\
+            'rest to a temporary file'
+        )
+    parser.add_argument(
+        '--shard-size',
+        type=int,
+        metavar='N',
+        help='shard the reports with more than N client rows across numbered '\
+            'worksheets (default 1048575)'
+        )
+    parser.add_argument(
+        '--shard-dir',
+        metavar='DIR',
+        help='write the sharded reports to workbook files in DIR rather than '\
+            'to worksheets'
+        )
+    parser.add_argument(
+        '--save-workers',
+        type=int,
+        metavar='N',
+        help='render the report worksheets in N worker processes when saving '\
+            'the workbook'
+        )
+    parser.add_argument(
+        '--skip-duplicates',
+        action='store_true',
+        help='skip the rows that repeat a row already processed'
+        )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='process the rows a chunk of rows at a time, in stages'
+        )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help='rows per pipeline chunk (default 1000)'
+        )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        help='pipeline chunks read ahead (default 4)'
+        )
+    parser.add_argument(
+        '--log-level',
+        choices=['debug', 'info', 'warning', 'error'],
+        help='start logging at this level'
+        )
+    parser.add_argument(
+        '--log-file',
+        help='write the log to this file rather than to stderr'
+        )
+    parser.add_argument(
+        '--trace-ws',
+        action='append',
+        metavar='WS_NAME',
+        help='trace every row of this content worksheet (repeatable)'
+        )
+    return parser.parse_args(argv)
+
 def request_workbook():
     """
     Prompt for the client data workbook.
     """
     prompt_hint = '(Help/Quit) <Quit>: '
     print('\nEnter the path and name of an Excel-compatible client workbook.')
+    wb = None
     inputting = True
     while inputting:
         workbook_file = input(prompt_hint) or 'q'
@@ -83,9 +257,7 @@ def request_workbook():
         if os.path.exists(workbook_file):
             # If work book ws provided successfully, we can continue
             # with processing the workbook.
-            print('  ...opening workbook...', end='')
-            wb = ClientInformationWorkbook(workbook_file)
-            print('opened!')
+            wb = open_workbook(workbook_file)
             # Ready to move on and process the workbook.
             inputting = False
         else:
@@ -118,29 +290,116 @@ def user_requests(prompt_a, prompt_b):
             sys.exit(0)
         print('Your intention is not clear. Please answer "Yes" or "No".')
         print(f'{prompt_b} {prompt_hint}')
+    return False
+
+def validate_workbook(wb):
+    """
+    Validate the DED configuration without creating any reports.
+    """
+    if not wb.has_a_ded_ws():
+        print(MESSAGE_REGISTRY.msg(1002))
+        return 1
+    wb.ded_processor.hydrate_ded()
+    wb.ded_processor.hydration_validation()
+    print('The DED configuration is valid.')
+    return 0
+
+def configure_identity_resolution(wb, args):
+    """
+    Configure how the client identities are resolved.
+    """
+    if args.registry:
+        wb.enable_registry_store(args.registry)
+    if args.incremental:
+        wb.enable_incremental_runs()
+    if args.stop_list:
+        wb.identifier_reg.load_stop_list(args.stop_list)
+    if args.max_fan_out is not None:
+        wb.identifier_reg.fan_out_threshold = args.max_fan_out
+    if args.fuzzy_names:
+        wb.enable_fuzzy_name_matching(args.name_similarity)
+    if args.hashed_client_ids:
+        wb.enable_hashed_client_ids()
+
+def configure_processing(wb, args):
+    """
+    Configure how the content rows are processed and the client
+    reports saved.
+    """
+    if args.resume or args.checkpoint_rows is not None:
+        # Checkpoint the client reports so that a failed run can be
+        # resumed.
+        wb.enable_checkpoints(args.checkpoint_rows)
+    if args.empty_rows is not None:
+        wb.trailing_empty_rows_limit = args.empty_rows
+    if args.tolerant:
+        wb.enable_quarantine(args.error_budget, args.quarantine_csv)
+    if args.memory_budget is not None:
+        wb.enable_memory_budget(args.memory_budget * 1024 * 1024)
+    if args.shard_size is not None or args.shard_dir:
+        wb.enable_report_sharding(args.shard_size, args.shard_dir)
+    if args.save_workers is not None:
+        wb.enable_parallel_save(args.save_workers)
+    if args.skip_duplicates:
+        wb.enable_duplicate_row_detection()
+    if args.pipeline:
+        wb.enable_pipeline(args.chunk_size, args.queue_size)
+
+def main(argv=None):
+    """
+    This is the CLIPRT command line interface (CLI).
+    """
+    args = parse_args(argv)
+    if args.log_level or args.log_file or args.trace_ws:
+        CLIPRT_LOGGER.configure(
+            level=(args.log_level or 'info').upper(),
+            log_filename=args.log_file,
+            trace_ws_names=args.trace_ws
+            )
+    try:
+        return run(args)
+    finally:
+        CLIPRT_LOGGER.stop()
+
+def run(args):
+    """
+    Run the CLIPRT command line interface (CLI).
+    """
+    print(WELCOME_MSG)
+
+    # Prompt for the workbook unless it was provided.
+    if args.workbook is None:
+        client_info_wb = request_workbook()
+    elif os.path.exists(args.workbook):
+        client_info_wb = open_workbook(args.workbook)
+    else:
+        print(MESSAGE_REGISTRY.msg(1000).format(args.workbook))
+        return 1
+
+    if args.validate:
+        return validate_workbook(client_info_wb)
 
-# ------------------------------------------------
-# This is the CLIPRT command line interface (CLI).
-# ------------------------------------------------
-print(WELCOME_MSG)
+    configure_identity_resolution(client_info_wb, args)
+    configure_processing(client_info_wb, args)
 
-# Prompt for the workbook.
-client_info_wb = request_workbook()
+    input_loop = True
+    while input_loop:
 
-input_loop = True
-while input_loop:
+        # Process the workbook.
+        if not client_info_wb.has_a_ded_ws():
+            # Create a new DED and exit so that the use can configure it
+            # for the client reporting.
+            request_create_ded(client_info_wb)
 
-    # Process the workbook.
-    if not client_info_wb.has_a_ded_ws():
-        # Create a new DED and exit so that the use can configure it
-        # for the client reporting.
-        request_create_ded(client_info_wb)
+        # Create the client reports.
+        client_info_wb.ded_processor.hydrate_ded()
+        client_info_wb.ded_processor.hydration_validation()
+        if client_info_wb.ded_is_verified():
+            request_print_ded(client_info_wb)
+        request_create_client_reports(client_info_wb, args.resume)
 
-    # Create the client reports.
-    client_info_wb.ded_processor.hydrate_ded()
-    client_info_wb.ded_processor.hydration_validation()
-    if client_info_wb.ded_is_verified():
-        request_print_ded(client_info_wb)
-    request_create_client_reports(client_info_wb)
+    print(EXIT_MSG)
+    return 0
 
-print(EXIT_MSG)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#pylint: disable=invalid-name
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+            CLIPRT, sounds like liberty.  Pronounced clipperty.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import argparse
+import sys
+
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog='cliprt_partition',
+        description='Create the CLIPRT client reports of a large workbook '\
+            'in partitions: partition, resolve each partition, then merge.'
+        )
+    CLIPRT_LOGGER.add_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    partition = commands.add_parser(
+        'partition',
+        help='split the content rows of a workbook into partition workbooks'
+        )
+    partition.add_argument('workbook')
+    partition.add_argument('partitions_dir')
+    partition.add_argument(
+        '--partitions',
+        type=int,
+        default=4,
+        help='number of partitions (default 4)'
+        )
+
+    resolve_partition = commands.add_parser(
+        'resolve-partition',
+        help='resolve the client identities of a partition workbook'
+        )
+    resolve_partition.add_argument('partition')
+    resolve_partition.add_argument(
+        '--state-file',
+        help='write the partial state here rather than next to the partition'
+        )
+
+    merge = commands.add_parser(
+        'merge',
+        help='merge the partial states and create the client reports'
+        )
+    merge.add_argument('workbook')
+    merge.add_argument('state_files', nargs='+', metavar='state_file')
+    merge.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='MB',
+        help='keep at most MB megabytes of merged report rows in memory'
+        )
+    merge.add_argument(
+        '--save-workers',
+        type=int,
+        metavar='N',
+        help='render the merged reports in N worker processes'
+        )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Run one step of the partitioned client report creation.
+    """
+    return CLIPRT_LOGGER.run_command(run_step, parse_args(argv))
+
+def run_step(args):
+    """
+    Run the requested step.
+    """
+    # Imported after the arguments are parsed to keep --help fast.
+    #pylint: disable=import-outside-toplevel
+    from cliprt.classes.report_partitioner import ReportPartitioner
+    if args.command == 'partition':
+        for partition_filename in ReportPartitioner(args.partitions).partition(
+                args.workbook,
+                args.partitions_dir
+            ):
+            print(partition_filename)
+    elif args.command == 'resolve-partition':
+        print(ReportPartitioner().resolve_partition(args.partition, args.state_file))
+    else:
+        ReportPartitioner(
+            memory_budget=None if args.memory_budget is None\
+                else args.memory_budget * 1024 * 1024,
+            save_workers=args.save_workers
+            ).merge(args.workbook, args.state_files)
+    return True
+
+if __name__ == '__main__':
+    sys.exit(main())
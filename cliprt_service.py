@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#pylint: disable=invalid-name
+"""
+Project:    CLIPRT - Client Information Parsing and Reporting Tool.
+            CLIPRT, sounds like liberty.  Pronounced clipperty.
+@author:    mhodges
+Copyright   2022 Michael Hodges
+"""
+import argparse
+import asyncio
+import sys
+
+from cliprt.classes.cliprt_logger import CLIPRT_LOGGER
+from cliprt.classes.report_service import ReportService
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog='cliprt_service',
+        description='CLIPRT report service.'
+        )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=2,
+        help='number of report workers'
+        )
+    parser.add_argument(
+        '--ded-cache-size',
+        type=int,
+        default=32,
+        help='number of compiled DEDs to keep'
+        )
+    parser.add_argument(
+        '--max-jobs',
+        type=int,
+        default=1000,
+        help='number of jobs to keep; the oldest finished jobs are removed'
+        )
+    parser.add_argument(
+        '--job-ttl',
+        type=float,
+        default=24 * 60 * 60,
+        help='seconds to keep a finished job, and its report'
+        )
+    parser.add_argument(
+        '--jobs-dir',
+        help='keep the uploads and reports here rather than in a '\
+            'temporary directory'
+        )
+    CLIPRT_LOGGER.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Run the CLIPRT report service until interrupted.
+    """
+    return CLIPRT_LOGGER.run_command(serve, parse_args(argv))
+
+def serve(args):
+    """
+    Serve the report requests until interrupted.
+    """
+    service = ReportService(
+        host=args.host,
+        port=args.port,
+        worker_cnt=args.workers,
+        ded_cache_size=args.ded_cache_size,
+        jobs_dir=args.jobs_dir,
+        max_jobs=args.max_jobs,
+        job_ttl_secs=args.job_ttl
+        )
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return True
+
+if __name__ == '__main__':
+    sys.exit(main())